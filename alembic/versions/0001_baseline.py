@@ -0,0 +1,115 @@
+"""Baseline: the schema the original create_tables.py created
+
+Databases created before migrations existed already have these tables;
+mark them as migrated with `alembic stamp 0001` and upgrade from there.
+Later columns and indexes (rating aggregates, full-text search) come in
+their own revisions.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BOOK_STATUSES = ("AVAILABLE", "BORROWED", "MAINTENANCE", "LOST")
+LOAN_STATUSES = ("PENDING", "ACTIVE", "RETURNED", "OVERDUE", "LOST")
+
+
+def _timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("username", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(255)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_superuser", sa.Boolean()),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id", name="pk_users"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "books",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("author", sa.String(255), nullable=False),
+        sa.Column("isbn", sa.String(20), nullable=False),
+        sa.Column("publication_year", sa.Integer()),
+        sa.Column("publisher", sa.String(255)),
+        sa.Column("genre", sa.String(100)),
+        sa.Column("description", sa.Text()),
+        sa.Column("cover_image_url", sa.String(255)),
+        sa.Column("status", sa.Enum(*BOOK_STATUSES, name="bookstatus")),
+        sa.Column("rating", sa.Float()),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id", name="pk_books"),
+    )
+    op.create_index("ix_books_id", "books", ["id"])
+    op.create_index("ix_books_title", "books", ["title"])
+    op.create_index("ix_books_author", "books", ["author"])
+    op.create_index("ix_books_isbn", "books", ["isbn"], unique=True)
+    op.create_index("ix_books_genre", "books", ["genre"])
+
+    op.create_table(
+        "loans",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("loan_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("return_date", sa.DateTime(timezone=True)),
+        sa.Column("status", sa.Enum(*LOAN_STATUSES, name="loanstatus")),
+        sa.Column("notes", sa.String(255)),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id", name="pk_loans"),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_loans_user_id_users", ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["book_id"], ["books.id"], name="fk_loans_book_id_books", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_loans_id", "loans", ["id"])
+
+    op.create_table(
+        "reviews",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("rating", sa.Float(), nullable=False),
+        sa.Column("comment", sa.Text()),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id", name="pk_reviews"),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_reviews_user_id_users", ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["book_id"], ["books.id"], name="fk_reviews_book_id_books", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_reviews_id", "reviews", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("reviews")
+    op.drop_table("loans")
+    op.drop_table("books")
+    op.drop_table("users")
@@ -0,0 +1,132 @@
+"""Book rating aggregates and the catalog FULLTEXT index
+
+Adds the running rating aggregates (sum, count and the 1-5 star
+histogram) that reviews keep current, backfills them from the existing
+reviews, and adds the FULLTEXT index behind catalog search on MySQL.
+
+On MySQL the columns are added with ALGORITHM=INSTANT. InnoDB cannot
+build the first FULLTEXT index of a table without blocking writes, so
+that index is built with ALGORITHM=INPLACE, LOCK=SHARED: reads continue,
+writes to `books` wait until it is built. The backfill runs in batches
+of book ids, one commit-sized UPDATE per batch.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:15:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+RATING_COLUMNS = ("ratings_1", "ratings_2", "ratings_3", "ratings_4", "ratings_5")
+
+# Same buckets as app.models.book.rating_bucket, frozen for this revision
+RATING_BUCKET_BOUNDS = (1.5, 2.5, 3.5, 4.5)
+
+BACKFILL_BATCH_SIZE = 1000
+
+books = sa.table(
+    "books",
+    sa.column("id", sa.Integer),
+    sa.column("rating", sa.Float),
+    sa.column("rating_sum", sa.Float),
+    sa.column("rating_count", sa.Integer),
+    *[sa.column(name, sa.Integer) for name in RATING_COLUMNS],
+)
+reviews = sa.table(
+    "reviews",
+    sa.column("id", sa.Integer),
+    sa.column("book_id", sa.Integer),
+    sa.column("rating", sa.Float),
+)
+
+
+def _is_mysql() -> bool:
+    return op.get_bind().dialect.name == "mysql"
+
+
+def _backfill_ratings() -> None:
+    bind = op.get_bind()
+    bucket = sa.case(
+        *[(reviews.c.rating < bound, star) for star, bound in enumerate(RATING_BUCKET_BOUNDS, 1)],
+        else_=len(RATING_BUCKET_BOUNDS) + 1,
+    )
+    set_aggregates = (
+        sa.update(books)
+        .where(books.c.id == sa.bindparam("b_id"))
+        .values(
+            rating=sa.bindparam("b_rating"),
+            rating_sum=sa.bindparam("b_rating_sum"),
+            rating_count=sa.bindparam("b_rating_count"),
+            **{name: sa.bindparam(f"b_{name}") for name in RATING_COLUMNS},
+        )
+    )
+    max_id = bind.execute(sa.select(sa.func.max(books.c.id))).scalar() or 0
+    # Books without reviews keep the new columns' zero defaults
+    for low in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+        rows = bind.execute(
+            sa.select(
+                reviews.c.book_id,
+                sa.func.sum(reviews.c.rating),
+                sa.func.count(reviews.c.id),
+                *[sa.func.sum(sa.case((bucket == star, 1), else_=0)) for star in range(1, 6)],
+            )
+            .where(reviews.c.book_id >= low, reviews.c.book_id < low + BACKFILL_BATCH_SIZE)
+            .group_by(reviews.c.book_id)
+        ).all()
+        params = [
+            {
+                "b_id": book_id,
+                "b_rating": rating_sum / rating_count,
+                "b_rating_sum": rating_sum,
+                "b_rating_count": rating_count,
+                **{f"b_{name}": int(count) for name, count in zip(RATING_COLUMNS, histogram)},
+            }
+            for book_id, rating_sum, rating_count, *histogram in rows
+        ]
+        if params:
+            bind.execute(set_aggregates, params)
+
+
+def upgrade() -> None:
+    columns = [
+        sa.Column("rating_sum", sa.Float(), server_default="0", nullable=False),
+        sa.Column("rating_count", sa.Integer(), server_default="0", nullable=False),
+        *[
+            sa.Column(name, sa.Integer(), server_default="0", nullable=False)
+            for name in RATING_COLUMNS
+        ],
+    ]
+    if _is_mysql():
+        dialect = op.get_bind().dialect
+        clauses = ", ".join(
+            f"ADD COLUMN {column.name} {column.type.compile(dialect=dialect)} "
+            f"NOT NULL DEFAULT '0'"
+            for column in columns
+        )
+        op.execute(f"ALTER TABLE books {clauses}, ALGORITHM=INSTANT")
+    else:
+        with op.batch_alter_table("books") as batch:
+            for column in columns:
+                batch.add_column(column)
+
+    _backfill_ratings()
+
+    if _is_mysql():
+        op.execute(
+            "ALTER TABLE books ADD FULLTEXT INDEX ix_books_fulltext "
+            "(title, author, genre, description), ALGORITHM=INPLACE, LOCK=SHARED"
+        )
+
+
+def downgrade() -> None:
+    if _is_mysql():
+        op.execute("ALTER TABLE books DROP INDEX ix_books_fulltext")
+    with op.batch_alter_table("books") as batch:
+        for name in ("rating_sum", "rating_count") + RATING_COLUMNS:
+            batch.drop_column(name)
@@ -0,0 +1,110 @@
+"""Composite indexes for the loan and review query shapes
+
+Loan lists filter by (user_id, status) and (book_id, status); the overdue
+sweep and the live status filter by (status, due_date). A book's reviews
+are paged by (book_id, id), and each user may review a book only once.
+
+On MySQL the indexes are built with ALGORITHM=INPLACE, LOCK=NONE, so the
+tables stay readable and writable while the migration runs. The statement
+fails instead of falling back to a locking copy if the server cannot do
+that. The upgrade stops before changing anything if a user has reviewed a
+book more than once; the report lists the pairs to resolve (deleting a
+review through the API keeps the book's rating aggregates right).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:30:00
+"""
+import logging
+from typing import List, Sequence, Tuple
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# (table, name, columns, unique)
+INDEXES: List[Tuple[str, str, Sequence[str], bool]] = [
+    ("loans", "ix_loans_user_id_status", ("user_id", "status"), False),
+    ("loans", "ix_loans_book_id_status", ("book_id", "status"), False),
+    ("loans", "ix_loans_status_due_date", ("status", "due_date"), False),
+    ("reviews", "uq_reviews_user_id_book_id", ("user_id", "book_id"), True),
+    ("reviews", "ix_reviews_book_id_id", ("book_id", "id"), False),
+]
+
+# Plain indexes that keep each foreign key covered once the composite
+# indexes leading with its column are dropped (MySQL requires one)
+FOREIGN_KEY_INDEXES = {
+    "ix_loans_user_id_status": ("ix_loans_user_id", "user_id"),
+    "ix_loans_book_id_status": ("ix_loans_book_id", "book_id"),
+    "uq_reviews_user_id_book_id": ("ix_reviews_user_id", "user_id"),
+    "ix_reviews_book_id_id": ("ix_reviews_book_id", "book_id"),
+}
+
+# Duplicate review pairs listed in the log when the upgrade is refused
+DUPLICATE_REPORT_LIMIT = 50
+
+# Never queue behind a long transaction holding the table's metadata lock
+MYSQL_LOCK_WAIT_TIMEOUT_SECONDS = 10
+
+
+def _is_mysql() -> bool:
+    return op.get_bind().dialect.name == "mysql"
+
+
+def _alter_online(table: str, clause: str) -> None:
+    op.execute(f"ALTER TABLE {table} {clause}, ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def _check_duplicate_reviews() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT user_id, book_id, COUNT(*) AS reviews FROM reviews "
+        "GROUP BY user_id, book_id HAVING COUNT(*) > 1 "
+        "ORDER BY user_id, book_id"
+    )).all()
+    if not duplicates:
+        return
+    for user_id, book_id, count in duplicates[:DUPLICATE_REPORT_LIMIT]:
+        logger.error("User %s has %s reviews of book %s", user_id, count, book_id)
+    raise RuntimeError(
+        f"{len(duplicates)} (user_id, book_id) pairs have more than one review; "
+        "delete the extra reviews before adding uq_reviews_user_id_book_id"
+    )
+
+
+def upgrade() -> None:
+    _check_duplicate_reviews()
+    if _is_mysql():
+        op.execute(f"SET SESSION lock_wait_timeout = {MYSQL_LOCK_WAIT_TIMEOUT_SECONDS}")
+    for table, name, columns, unique in INDEXES:
+        if _is_mysql():
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            _alter_online(table, f"ADD {kind} {name} ({', '.join(columns)})")
+        elif unique:
+            with op.batch_alter_table(table) as batch:
+                batch.create_unique_constraint(name, list(columns))
+        else:
+            op.create_index(name, table, list(columns))
+
+
+def downgrade() -> None:
+    if _is_mysql():
+        op.execute(f"SET SESSION lock_wait_timeout = {MYSQL_LOCK_WAIT_TIMEOUT_SECONDS}")
+    for table, name, columns, unique in reversed(INDEXES):
+        if _is_mysql():
+            clauses = [f"DROP INDEX {name}"]
+            if name in FOREIGN_KEY_INDEXES:
+                fk_index, column = FOREIGN_KEY_INDEXES[name]
+                clauses.insert(0, f"ADD INDEX {fk_index} ({column})")
+            _alter_online(table, ", ".join(clauses))
+        elif unique:
+            with op.batch_alter_table(table) as batch:
+                batch.drop_constraint(name, type_="unique")
+        else:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,68 @@
+"""Archive table for loans returned long ago
+
+Filled in batches by the loan archive job (app.services.loan_service).
+Rows keep their id from `loans`, so the primary key is not generated.
+The job selects returned loans by return date through a new
+(status, return_date) index on `loans`, built online on MySQL.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+LOAN_STATUSES = ("PENDING", "ACTIVE", "RETURNED", "OVERDUE", "LOST")
+
+# Never queue behind a long transaction holding the table's metadata lock
+MYSQL_LOCK_WAIT_TIMEOUT_SECONDS = 10
+
+
+def _is_mysql() -> bool:
+    return op.get_bind().dialect.name == "mysql"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "loans_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("loan_date", sa.DateTime(timezone=True)),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("return_date", sa.DateTime(timezone=True)),
+        sa.Column("status", sa.Enum(*LOAN_STATUSES, name="loanstatus")),
+        sa.Column("notes", sa.String(255)),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id", name="pk_loans_archive"),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_loans_archive_user_id_users", ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["book_id"], ["books.id"], name="fk_loans_archive_book_id_books", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_loans_archive_user_id_id", "loans_archive", ["user_id", "id"])
+    op.create_index("ix_loans_archive_book_id_id", "loans_archive", ["book_id", "id"])
+
+    if _is_mysql():
+        op.execute(f"SET SESSION lock_wait_timeout = {MYSQL_LOCK_WAIT_TIMEOUT_SECONDS}")
+        op.execute(
+            "ALTER TABLE loans ADD INDEX ix_loans_status_return_date (status, return_date), "
+            "ALGORITHM=INPLACE, LOCK=NONE"
+        )
+    else:
+        op.create_index("ix_loans_status_return_date", "loans", ["status", "return_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_loans_status_return_date", table_name="loans")
+    op.drop_table("loans_archive")
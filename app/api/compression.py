@@ -0,0 +1,219 @@
+import hashlib
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional
+    zstandard = None
+
+# Levels picked for throughput: most of the size win at a fraction of the
+# CPU cost of the maximum settings
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/cbor",
+    "application/javascript",
+    "application/xml",
+}
+
+compressed_bodies = TTLCache(
+    maxsize=settings.COMPRESSION_CACHE_SIZE,
+    ttl=settings.COMPRESSION_CACHE_TTL_SECONDS,
+)
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+# In order of preference when the client accepts several equally
+COMPRESSORS: Dict[str, Callable[[], Any]] = {}
+if brotli is not None:
+    COMPRESSORS["br"] = _Brotli
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _Zstd
+COMPRESSORS["gzip"] = _Gzip
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding in an Accept-Encoding header, or None for identity"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if coding:
+            accepted[coding.lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in COMPRESSORS:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _is_compressible(headers: MutableHeaders, status: int) -> bool:
+    if status < 200 or status in (204, 304) or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return (
+        content_type.startswith("text/")
+        or content_type.endswith("+json")
+        or content_type in COMPRESSIBLE_TYPES
+    )
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        """
+        Compress responses with brotli, zstd or gzip, whichever the client prefers.
+
+        Complete bodies under `minimum_size` bytes are sent as is. Bodies that
+        carry an ETag are compressed once and served from `compressed_bodies`
+        afterwards, keyed by a digest of the uncompressed bytes. Streaming responses are compressed chunk by chunk and
+        flushed after every chunk, so exports keep streaming.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingSend(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSend:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor: Any = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is not None:
+            chunk = self.compressor.compress(body)
+            chunk += self.compressor.flush() if more_body else self.compressor.finish()
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+        if not _is_compressible(headers, self.start["status"]) or (
+            not more_body and len(body) < self.minimum_size
+        ):
+            self.passthrough = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        if more_body:
+            self.compressor = COMPRESSORS[self.encoding]()
+            self._mark_encoded(headers)
+            if "content-length" in headers:
+                del headers["content-length"]
+            await self.send(self.start)
+            chunk = self.compressor.compress(body) + self.compressor.flush()
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": True})
+            return
+
+        # Keyed by the bytes themselves: an ETag may be reused for a
+        # different body (a route whose validator misses a change), the
+        # digest cannot. It costs a small fraction of compressing the body
+        key: Optional[Tuple[str, bytes]] = None
+        if "etag" in headers:
+            key = (self.encoding, hashlib.sha256(body).digest())
+        compressed = compressed_bodies.get(key) if key else None
+        if compressed is None:
+            compressor = COMPRESSORS[self.encoding]()
+            compressed = compressor.compress(body) + compressor.finish()
+            if key:
+                compressed_bodies.set(key, compressed)
+        self._mark_encoded(headers)
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    def _mark_encoded(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The encoded bytes differ from the identity representation, so the
+        # validator is downgraded to weak (If-None-Match compares weakly)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
@@ -0,0 +1,124 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+
+from app.core.exceptions import NotModifiedError
+
+# Clients may keep a copy but must revalidate it before every use
+PUBLIC_CACHE_CONTROL = "no-cache"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def _field(item: Any, name: str) -> Any:
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # DATETIME columns come back naive; MySQL connections run with
+    # time_zone '+00:00' (app.db.session) and SQLite's clock is UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def row_modified(item: Any) -> Optional[datetime]:
+    """Last change of an ORM object or serialized row: `updated_at`, else `created_at`"""
+    return _as_utc(_field(item, "updated_at") or _field(item, "created_at"))
+
+
+def latest_modified(items: Iterable[Any]) -> Optional[datetime]:
+    """Last-Modified of a page of rows: the latest change among them"""
+    modified = [m for m in (row_modified(item) for item in items) if m is not None]
+    return max(modified, default=None)
+
+
+def body_etag(body: bytes) -> str:
+    """
+    Strong ETag of a rendered response body.
+
+    Derived from the exact bytes sent, so it changes with any change to the
+    representation (a second write within the same clock tick, the response
+    format, sparse fields) and never matches a different body.
+    """
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison function
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def check_conditional(
+    request: Request,
+    response: Response,
+    *,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = PUBLIC_CACHE_CONTROL,
+) -> None:
+    """
+    Set the validators on `response` and raise `NotModifiedError` when the client's copy is current.
+
+    `If-None-Match` takes precedence; `If-Modified-Since` is only consulted
+    when it is absent.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            raise NotModifiedError(headers=headers)
+        return
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return
+        # HTTP dates have whole-second precision
+        if last_modified.replace(microsecond=0) <= since:
+            raise NotModifiedError(headers=headers)
+
+
+def conditional_response(
+    request: Request,
+    rendered: Response,
+    *,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = PUBLIC_CACHE_CONTROL,
+) -> Response:
+    """
+    Validate an already rendered response by a strong ETag of its body.
+
+    Returns `rendered` with its validators set, or raises `NotModifiedError`
+    when the client's copy is current.
+    """
+    check_conditional(
+        request,
+        rendered,
+        etag=body_etag(rendered.body),
+        last_modified=last_modified,
+        cache_control=cache_control,
+    )
+    return rendered
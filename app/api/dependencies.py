@@ -4,36 +4,37 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.security import ALGORITHM
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.user import User
 from app.schemas.user import TokenPayload
 from app.crud.user import user
+from app.services.user_service import aget_principal, get_principal
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def _token_payload(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user_obj = user.get(db, id=token_data.sub)
+
+
+def _require_user(user_obj: Optional[User]) -> User:
     if not user_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -42,9 +43,7 @@ def get_current_user(
     return user_obj
 
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+def _require_active(current_user: User) -> User:
     if not user.is_active(current_user):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -53,12 +52,52 @@ def get_current_active_user(
     return current_user
 
 
-def get_current_active_superuser(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+def _require_superuser(current_user: User) -> User:
     if not user.is_superuser(current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     return current_user
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = _token_payload(token)
+    return _require_user(get_principal(db, user_id=token_data.sub, token=token))
+
+
+def get_current_active_user(
+    current_user: User = Depends(get_current_user),
+) -> User:
+    return _require_active(current_user)
+
+
+def get_current_active_superuser(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    return _require_superuser(current_user)
+
+
+# For async endpoints reading through `get_async_db`: the principal is
+# loaded on the same AsyncSession, on the event loop, instead of through a
+# sync session on a threadpool worker
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = _token_payload(token)
+    return _require_user(await aget_principal(db, user_id=token_data.sub, token=token))
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    return _require_active(current_user)
+
+
+async def get_current_active_superuser_async(
+    current_user: User = Depends(get_current_active_user_async),
+) -> User:
+    return _require_superuser(current_user)
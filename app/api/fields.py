@@ -0,0 +1,42 @@
+from typing import Any, Optional, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.api.responses import render_json
+from app.core.exceptions import BadRequestError
+
+# Always loaded: cursors are built from the id and validators from the timestamps
+REQUIRED_FIELDS = ("id", "created_at", "updated_at")
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Field names requested with `?fields=a,b,c`, checked against `schema`.
+
+    Returns None when every field is wanted. `id` is always included.
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in schema.model_fields]
+    if unknown:
+        raise BadRequestError(detail=f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id", *names]))
+
+
+def loaded_fields(fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys([*fields, *REQUIRED_FIELDS]))
+
+
+def sparse_response(response: Response, content: Any, fields: Tuple[str, ...]) -> Response:
+    """
+    Render serialized rows with only `fields`, bypassing the route's response model.
+
+    Headers already set on the injected `response` are carried over.
+    """
+    if isinstance(content, list):
+        content = [{name: item[name] for name in fields} for item in content]
+    else:
+        content = {name: content[name] for name in fields}
+    return render_json(response, content)
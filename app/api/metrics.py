@@ -0,0 +1,240 @@
+import bisect
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from anyio import to_thread
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.compression import compressed_bodies
+from app.api.routing import ROUTE_SCOPE_KEY
+from app.core.config import settings
+from app.core.metrics import (
+    DEFAULT_BUCKETS, Family, MultiprocessStore, add_sample, family,
+    histogram_samples, registry, render_text
+)
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine, replicas
+from app.services.book_service import catalog_cache
+from app.services.loan_service import loan_archive_stats, overdue_sweep_stats
+from app.services.user_service import principal_cache
+
+METRICS_PATH = "/metrics"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Label for requests that matched no LibraryRoute (404s, the root page)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        """
+        Request latency per (method, route, status) and the in-flight gauge.
+
+        Only the event loop thread updates these, so no locks are taken on
+        the request path.
+        """
+        self.buckets = DEFAULT_BUCKETS
+        self.in_flight = 0
+        self._series: Dict[Tuple[str, str, str], List[float]] = {}
+        # anyio's default thread limiter, captured on the event loop
+        self.limiter: Any = None
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, str(status))
+        series = self._series.get(key)
+        if series is None:
+            # Bucket counts, then the +Inf count and the sum
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def collect(self) -> List[Family]:
+        latency = family(
+            "library_http_request_duration_seconds",
+            "histogram",
+            "Time to serve a request, by method, route template and status",
+        )
+        for (method, route, status), series in sorted(dict(self._series).items()):
+            labels = [("method", method), ("route", route), ("status", status)]
+            cumulative = 0.0
+            buckets: Dict[str, float] = {}
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            histogram_samples(
+                latency, {"buckets": buckets, "count": cumulative, "sum": series[-1]}, labels
+            )
+        in_flight = family(
+            "library_http_requests_in_flight", "gauge", "Requests being served"
+        )
+        add_sample(in_flight, self.in_flight)
+        families = [latency, in_flight]
+        if self.limiter is not None:
+            statistics = self.limiter.statistics()
+            threads = family(
+                "library_threadpool_threads",
+                "gauge",
+                "Worker threads of the sync endpoint threadpool, by state",
+            )
+            add_sample(threads, statistics.borrowed_tokens, [("state", "busy")])
+            add_sample(threads, statistics.total_tokens, [("state", "limit")])
+            waiting = family(
+                "library_threadpool_tasks_waiting",
+                "gauge",
+                "Calls queued for a free threadpool worker",
+            )
+            add_sample(waiting, statistics.tasks_waiting)
+            families.extend([threads, waiting])
+        return families
+
+
+request_metrics = RequestMetrics()
+registry.register(request_metrics.collect)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        """Time every HTTP request and count the ones in flight"""
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+        if self.metrics.limiter is None:
+            self.metrics.limiter = to_thread.current_default_thread_limiter()
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.observe(
+                scope["method"],
+                scope.get(ROUTE_SCOPE_KEY, UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+            )
+
+
+def _pool_families() -> List[Family]:
+    connections = family(
+        "library_db_pool_connections", "gauge", "Pooled database connections, by state"
+    )
+    checkouts = family(
+        "library_db_pool_checkouts_total", "counter", "Connections checked out of the pool"
+    )
+    timeouts = family(
+        "library_db_pool_timeouts_total", "counter", "Checkouts that timed out waiting"
+    )
+    wait = family(
+        "library_db_pool_wait_seconds", "histogram", "Time spent waiting for a connection"
+    )
+    pools = [("primary", "sync", engine.pool), ("primary", "async", async_engine.sync_engine.pool)]
+    if replicas is not None:
+        for index, replica in enumerate(replicas.engines):
+            pools.append((f"replica{index}", "sync", replica.pool))
+        for index, replica in enumerate(replicas.async_engines):
+            pools.append((f"replica{index}", "async", replica.sync_engine.pool))
+    for database, driver, pool in pools:
+        status = pool_status(pool)
+        labels = [("database", database), ("driver", driver)]
+        for state in ("checked_in", "checked_out", "overflow"):
+            if state in status:
+                add_sample(connections, status[state], [*labels, ("state", state)])
+        if "checkouts" in status:
+            add_sample(checkouts, status["checkouts"], labels)
+            add_sample(timeouts, status["timeouts"], labels)
+            histogram_samples(wait, status["wait_seconds"], labels)
+    return [connections, checkouts, timeouts, wait]
+
+
+def _cache_families() -> List[Family]:
+    lookups = family(
+        "library_cache_lookups_total", "counter", "Cache lookups, by cache and result"
+    )
+    entries = family("library_cache_entries", "gauge", "Entries held in the cache")
+    caches = {
+        "principal": principal_cache.stats(),
+        "catalog": catalog_cache.stats(),
+        "compressed_bodies": compressed_bodies.stats(),
+    }
+    for name, stats in caches.items():
+        for result in ("hits", "stale_hits", "misses"):
+            if result in stats:
+                add_sample(lookups, stats[result], [("cache", name), ("result", result)])
+        if "size" in stats:
+            add_sample(entries, stats["size"], [("cache", name)])
+    return [lookups, entries]
+
+
+def _job_families() -> List[Family]:
+    sweep = overdue_sweep_stats.snapshot()
+    archive = loan_archive_stats.snapshot()
+    runs = family("library_job_runs_total", "counter", "Background job runs, by job")
+    failures = family("library_job_failures_total", "counter", "Failed background job runs")
+    rows = family(
+        "library_job_rows_total", "counter", "Rows changed or moved by background jobs"
+    )
+    for job, stats, rows_key in (
+        ("overdue_sweep", sweep, "rows_changed_total"),
+        ("loan_archive", archive, "rows_archived_total"),
+    ):
+        add_sample(runs, stats["runs"], [("job", job)])
+        add_sample(failures, stats["failures"], [("job", job)])
+        add_sample(rows, stats[rows_key], [("job", job)])
+    return [runs, failures, rows]
+
+
+registry.register(_pool_families)
+registry.register(_cache_families)
+registry.register(_job_families)
+
+multiprocess_store: Optional[MultiprocessStore] = None
+if settings.METRICS_MULTIPROCESS_DIR:
+    multiprocess_store = MultiprocessStore(
+        settings.METRICS_MULTIPROCESS_DIR,
+        # Tolerate a couple of missed flushes before a worker's file is left out
+        max_age=3 * settings.METRICS_FLUSH_SECONDS,
+    )
+
+
+def flush_metrics() -> None:
+    """Write this worker's metrics for the other workers to aggregate"""
+    if multiprocess_store is not None:
+        multiprocess_store.write(registry.collect())
+
+
+def _scrape() -> str:
+    if multiprocess_store is None:
+        return render_text(registry.collect())
+    flush_metrics()
+    return render_text(multiprocess_store.read())
+
+
+router = APIRouter()
+
+
+@router.get(METRICS_PATH, include_in_schema=False)
+async def read_metrics() -> PlainTextResponse:
+    """
+    Metrics in the Prometheus text format; across all workers in multiprocess mode.
+    """
+    if multiprocess_store is None:
+        content = _scrape()
+    else:
+        content = await run_in_threadpool(_scrape)
+    return PlainTextResponse(content, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,111 @@
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
+
+import msgpack
+from fastapi.responses import ORJSONResponse
+from starlette.background import BackgroundTask
+
+from app.core.exceptions import NotAcceptableError
+
+try:
+    import cbor2
+except ImportError:  # CBOR is optional
+    cbor2 = None
+
+
+class BinaryFormat(NamedTuple):
+    media_type: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+MSGPACK = BinaryFormat(
+    "application/msgpack",
+    lambda content: msgpack.packb(content, use_bin_type=True),
+    lambda body: msgpack.unpackb(body, raw=False),
+)
+
+# Media types accepted in Accept and Content-Type, besides JSON
+BINARY_FORMATS: Dict[str, BinaryFormat] = {
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+if cbor2 is not None:
+    BINARY_FORMATS["application/cbor"] = BinaryFormat(
+        "application/cbor", cbor2.dumps, cbor2.loads
+    )
+
+_response_format: ContextVar[Optional[BinaryFormat]] = ContextVar(
+    "response_format", default=None
+)
+
+
+def negotiate(accept: Optional[str]) -> Optional[BinaryFormat]:
+    """
+    The binary format preferred by an Accept header, or None for JSON.
+
+    Highest q-value wins; on a tie JSON is kept. An Accept header that
+    rules out JSON and every binary format raises a 406.
+    """
+    if not accept:
+        return None
+    best: Optional[BinaryFormat] = None
+    best_q = 0.0
+    json_q = 0.0
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        if media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, q)
+        elif media_type in BINARY_FORMATS and q > best_q:
+            best, best_q = BINARY_FORMATS[media_type], q
+    if best_q == 0 and json_q == 0:
+        raise NotAcceptableError(
+            detail="Responses are available as application/json or "
+            + ", ".join(sorted(BINARY_FORMATS))
+        )
+    return best if best_q > json_q else None
+
+
+def begin_response_format(response_format: Optional[BinaryFormat]) -> Token:
+    return _response_format.set(response_format)
+
+
+def end_response_format(token: Token) -> None:
+    _response_format.reset(token)
+
+
+def current_response_format() -> Optional[BinaryFormat]:
+    return _response_format.get()
+
+
+class NegotiatedResponse(ORJSONResponse):
+    """JSON by default, or the binary format negotiated for the current request"""
+
+    # Spelled out: FastAPI reads the default status code from this signature
+    # when it builds the OpenAPI schema
+    def __init__(
+        self,
+        content: Any = None,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        self.format = current_response_format()
+        if self.format is not None and media_type is None:
+            media_type = self.format.media_type
+        super().__init__(content, status_code, headers, media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        if self.format is not None:
+            return self.format.encode(content)
+        return super().render(content)
@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional, Sequence
+
+from fastapi import Response
+
+from app.core.exceptions import BadRequestError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Build an opaque cursor pointing just past the row with `last_id`"""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Return the last seen id stored in a cursor produced by `encode_cursor`"""
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = payload["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise BadRequestError(detail="Invalid pagination cursor")
+    if not isinstance(last_id, int):
+        raise BadRequestError(detail="Invalid pagination cursor")
+    return last_id
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], limit: int) -> None:
+    """
+    Expose the cursor for the following page in the `X-Next-Cursor` header.
+
+    A full page means there may be more rows; a short page is the last one.
+    Items may be ORM objects or serialized dicts.
+    """
+    if limit > 0 and len(items) == limit:
+        last = items[-1]
+        last_id = last["id"] if isinstance(last, dict) else last.id
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last_id)
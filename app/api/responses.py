@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.api.negotiation import NegotiatedResponse, current_response_format
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_type: Any) -> TypeAdapter:
+    """Compiled validator/serializer for `response_type`, built once per type"""
+    return TypeAdapter(response_type)
+
+
+def _carry_headers(rendered: Response, response: Response) -> Response:
+    # Headers set on the injected response (cursors, validators) are not
+    # applied by FastAPI when the endpoint returns its own Response
+    rendered.headers.raw.extend(response.headers.raw)
+    return rendered
+
+
+def render(response: Response, response_type: Any, content: Any) -> Response:
+    """
+    Serialize ORM objects as `response_type` in a single pass.
+
+    The objects are read through `from_attributes` and dumped straight to
+    JSON bytes by pydantic-core. Returning a Response skips FastAPI's second
+    validation against the route's response model and `jsonable_encoder`.
+    """
+    adapter = type_adapter(response_type)
+    validated = adapter.validate_python(content, from_attributes=True)
+    if current_response_format() is not None:
+        rendered = NegotiatedResponse(adapter.dump_python(validated, mode="json"))
+    else:
+        rendered = Response(adapter.dump_json(validated), media_type="application/json")
+    return _carry_headers(rendered, response)
+
+
+def render_json(response: Response, content: Any) -> Response:
+    """Encode data that is already serialized (e.g. from the catalog cache) in the negotiated format"""
+    return _carry_headers(NegotiatedResponse(content), response)
@@ -0,0 +1,134 @@
+import inspect
+from typing import Any, Callable, Coroutine, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+
+from app.api.negotiation import (
+    BINARY_FORMATS, begin_response_format, end_response_format, negotiate
+)
+from app.core.config import settings
+from app.core.exceptions import BadRequestError
+from app.db.instrumentation import (
+    begin_query_stats, current_query_stats, end_query_stats, log_query_stats
+)
+from app.db.unit_of_work import commit_request_sessions
+
+# Scope key carrying the matched route template, so request metrics are
+# labelled per route instead of per raw path
+ROUTE_SCOPE_KEY = "library.route"
+
+
+async def _decode_binary_body(request: Request) -> Request:
+    """
+    Hand a MessagePack/CBOR body to FastAPI as if it had been JSON.
+
+    The decoded value is cached as the request's parsed JSON and the
+    Content-Type is rewritten, so body validation runs unchanged.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    body_format = BINARY_FORMATS.get(content_type)
+    if body_format is None:
+        return request
+    body = await request.body()
+    try:
+        decoded = body_format.decode(body) if body else None
+    except Exception:
+        raise BadRequestError(detail=f"Malformed {content_type} request body")
+    scope = dict(request.scope)
+    scope["headers"] = [
+        (name, value) for name, value in request.scope["headers"]
+        if name != b"content-type"
+    ] + [(b"content-type", b"application/json")]
+    transcoded = Request(scope, request.receive)
+    transcoded._body = body
+    if decoded is not None:
+        transcoded._json = decoded
+    return transcoded
+
+
+def _add_vary(response: Response, header: str) -> None:
+    vary = response.headers.get("vary")
+    if vary is None:
+        response.headers["Vary"] = header
+    elif header.lower() not in vary.lower():
+        response.headers["Vary"] = f"{vary}, {header}"
+
+
+def _exception_handler(request: Request, exc: Exception) -> Optional[Callable]:
+    """
+    The app's handler for `exc`, looked up as Starlette's ExceptionMiddleware
+    would: by status code for HTTP errors, then by class. Unhandled errors,
+    left to ServerErrorMiddleware, have none.
+    """
+    handlers = request.app.exception_handlers
+    if isinstance(exc, HTTPException) and exc.status_code != 500:
+        if exc.status_code in handlers:
+            return handlers[exc.status_code]
+    for cls in type(exc).__mro__:
+        if cls is not Exception and cls in handlers:
+            return handlers[cls]
+    return None
+
+
+async def _handle_exception(request: Request, exc: Exception) -> Response:
+    handler = _exception_handler(request, exc)
+    if handler is None:
+        raise exc
+    if inspect.iscoroutinefunction(handler):
+        return await handler(request, exc)
+    return await run_in_threadpool(handler, request, exc)
+
+
+class LibraryRoute(APIRoute):
+    """
+    Route with content negotiation, a per-request unit of work and SQL stats.
+
+    Request bodies may be sent as MessagePack (or CBOR when `cbor2` is
+    installed) and responses are encoded in whichever format the Accept
+    header prefers. Once the endpoint has returned, the request's database
+    sessions are committed in one go; an exception skips the commit. The
+    queries it issued are reported in `Server-Timing` and logged, with the
+    status the client gets: handled errors (HTTP errors, 422 validation
+    errors) are rendered here by the app's exception handlers.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            request.scope[ROUTE_SCOPE_KEY] = self.path_format
+            request = await _decode_binary_body(request)
+            token = begin_response_format(negotiate(request.headers.get("accept")))
+            try:
+                response = await handler(request)
+            finally:
+                end_response_format(token)
+            await commit_request_sessions(request)
+            _add_vary(response, "Accept")
+            return response
+
+        if not settings.SQL_INSTRUMENTATION:
+            return negotiated_handler
+
+        async def instrumented_handler(request: Request) -> Response:
+            token = begin_query_stats()
+            stats = current_query_stats()
+            status = 500
+            try:
+                try:
+                    response = await negotiated_handler(request)
+                except Exception as exc:
+                    response = await _handle_exception(request, exc)
+                status = response.status_code
+                response.headers.append("Server-Timing", stats.server_timing())
+                return response
+            finally:
+                end_query_stats(token)
+                log_query_stats(
+                    stats, method=request.method, route=self.path_format, status=status
+                )
+
+        return instrumented_handler
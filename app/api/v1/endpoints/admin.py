@@ -0,0 +1,63 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.api.compression import compressed_bodies
+from app.api.dependencies import get_current_active_superuser
+from app.api.routing import LibraryRoute
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine, replicas
+from app.models.user import User
+from app.services.book_service import catalog_cache
+from app.services.loan_service import loan_archive_stats, overdue_sweep_stats
+from app.services.user_service import principal_cache
+
+router = APIRouter(route_class=LibraryRoute)
+
+
+@router.get("/jobs/overdue-sweep")
+def read_overdue_sweep_stats(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Duration and rows changed by the periodic overdue-loan sweep.
+    """
+    return overdue_sweep_stats.snapshot()
+
+
+@router.get("/jobs/loan-archive")
+def read_loan_archive_stats(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Progress of the loan archive job: batches, rows moved and whether it has caught up.
+    """
+    return loan_archive_stats.snapshot()
+
+
+@router.get("/caches")
+def read_cache_stats(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Size, hit rate and eviction counters of the in-process caches.
+    """
+    return {
+        "principal": principal_cache.stats(),
+        "catalog": catalog_cache.stats(),
+        "compressed_bodies": compressed_bodies.stats(),
+    }
+
+
+@router.get("/db-pool")
+def read_db_pool_stats(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Connection pool gauges, checkout wait histogram and timeout counts.
+    """
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.sync_engine.pool),
+        "replicas": replicas.status() if replicas is not None else [],
+    }
@@ -6,33 +6,37 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_current_user
+from app.api.routing import LibraryRoute
 from app.core.config import settings
+from app.core.metrics import failed_logins
 from app.core.security import create_access_token
 from app.crud.user import user
 from app.db.session import get_db
 from app.schemas.user import Token, User
 
-router = APIRouter()
+router = APIRouter(route_class=LibraryRoute)
 
 
 @router.post("/login", response_model=Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    authenticated_user = user.authenticate(
+    authenticated_user = await user.authenticate_async(
         db, email=form_data.username, password=form_data.password
     )
     if not authenticated_user:
+        failed_logins.inc("bad_credentials")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     if not user.is_active(authenticated_user):
+        failed_logins.inc("inactive_user")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
@@ -1,38 +1,72 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_current_active_superuser, get_current_active_user
-from app.core.exceptions import BadRequestError, NotFoundError
+from app.api.conditional import conditional_response, latest_modified, row_modified
+from app.api.fields import loaded_fields, parse_fields, sparse_response
+from app.api.pagination import decode_cursor, set_next_cursor
+from app.api.responses import render_json
+from app.api.routing import LibraryRoute
+from app.core.exceptions import BadRequestError, ConflictError, NotFoundError
 from app.crud.book import book
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.book import BookStatus
 from app.models.user import User
-from app.schemas.book import Book, BookCreate, BookUpdate
+from app.schemas.book import Book, BookBatchUpdate, BookCreate, BookUpdate
+from app.schemas.bulk import BatchDelete, BulkResult, ImportStatus
+from app.services import import_service
 
-router = APIRouter()
+router = APIRouter(route_class=LibraryRoute)
 
 
 @router.get("/", response_model=List[Book])
-def read_books(
-    db: Session = Depends(get_db),
+async def read_books(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    q: Optional[str] = None,
     title: Optional[str] = None,
     author: Optional[str] = None,
     genre: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
 ) -> Any:
     """
     Retrieve books with optional filtering.
+
+    `q` runs a relevance-ranked full-text search, narrowed by the other
+    filters, and pages with `skip`.
+    `fields=id,title,author` returns, and loads, only those fields.
     """
-    if title or author or genre:
-        books = book.search_books(
-            db, title=title, author=author, genre=genre, skip=skip, limit=limit
-        )
+    if q and after is not None:
+        raise BadRequestError(detail="Search results page with skip, not after")
+    after_id = decode_cursor(after)
+    requested = parse_fields(fields, Book)
+    books = await book.alist_cached(
+        db,
+        q=q,
+        title=title,
+        author=author,
+        genre=genre,
+        skip=skip,
+        limit=limit,
+        after=after_id,
+        fields=loaded_fields(requested) if requested else None,
+    )
+    if not q:
+        set_next_cursor(response, books, limit)
+    if requested:
+        rendered = sparse_response(response, books, requested)
     else:
-        books = book.get_multi(db, skip=skip, limit=limit)
-    return books
+        rendered = render_json(response, books)
+    return conditional_response(request, rendered, last_modified=latest_modified(books))
 
 
 @router.post("/", response_model=Book)
@@ -56,19 +90,160 @@ def create_book(
     return book_obj
 
 
-@router.get("/{book_id}", response_model=Book)
-def read_book(
+@router.post("/batch", response_model=BulkResult)
+def create_books_batch(
+    *,
+    db: Session = Depends(get_db),
+    books_in: List[BookCreate],
+    upsert: bool = False,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Create books in bulk. With `upsert`, books whose ISBN already exists are updated.
+    """
+    try:
+        if upsert:
+            ids = book.upsert_many(
+                db,
+                objs_in=books_in,
+                index_elements=["isbn"],
+                update_columns=book.catalog_columns,
+            )
+        else:
+            ids = book.create_many(db, objs_in=books_in)
+    except IntegrityError:
+        db.rollback()
+        raise ConflictError(
+            detail="One or more books conflict with existing ISBNs"
+        )
+    return BulkResult(count=len(books_in), ids=ids or None)
+
+
+@router.patch("/batch", response_model=BulkResult)
+def update_books_batch(
+    *,
+    db: Session = Depends(get_db),
+    batch_in: BookBatchUpdate,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Apply the same changes to many books.
+    """
+    try:
+        updated = book.update_many(db, ids=batch_in.ids, obj_in=batch_in.values)
+    except IntegrityError:
+        db.rollback()
+        raise ConflictError(detail="The update conflicts with existing ISBNs")
+    return BulkResult(count=updated)
+
+
+@router.delete("/batch", response_model=BulkResult)
+def delete_books_batch(
+    *,
+    db: Session = Depends(get_db),
+    batch_in: BatchDelete,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Delete many books.
+    """
+    deleted = book.delete_many(db, ids=batch_in.ids)
+    return BulkResult(count=deleted)
+
+
+@router.post("/import", response_model=ImportStatus)
+async def import_books(
     *,
+    request: Request,
     db: Session = Depends(get_db),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    import_id: Optional[str] = Query(None, max_length=64, pattern=r"^[\w-]+$"),
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Import a catalog streamed as the raw request body (CSV with a header row, or NDJSON).
+
+    The format comes from `format` or the Content-Type. Pass an `import_id`
+    to follow progress from `GET /books/import/{import_id}` while the upload runs.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+        else:
+            raise BadRequestError(
+                detail="Send text/csv or application/x-ndjson, or set the format parameter"
+            )
+    
+    job = import_service.start_import_job(format, import_id=import_id)
+    if job is None:
+        raise ConflictError(detail="An import with this id is already running")
+    await import_service.import_books(db, job, request.stream())
+    return job.snapshot()
+
+
+@router.get("/import/{import_id}", response_model=ImportStatus)
+def read_import(
+    *,
+    import_id: str,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Get the progress of a catalog import.
+    """
+    job = import_service.get_import_job(import_id)
+    if not job:
+        raise NotFoundError(detail="Import not found")
+    return job.snapshot()
+
+
+@router.get("/import/{import_id}/errors")
+def read_import_errors(
+    *,
+    import_id: str,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Download the rejected rows of an import as NDJSON.
+    """
+    job = import_service.get_import_job(import_id)
+    if not job:
+        raise NotFoundError(detail="Import not found")
+    if not job.rows_rejected or job.status == "running":
+        raise NotFoundError(detail="No error report for this import")
+    return FileResponse(
+        job.error_file,
+        media_type="application/x-ndjson",
+        filename=f"book-import-{import_id}-errors.ndjson",
+    )
+
+
+@router.get("/{book_id}", response_model=Book)
+async def read_book(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     book_id: int,
+    fields: Optional[str] = None,
 ) -> Any:
     """
-    Get book by ID.
+    Get book by ID, optionally only the comma-separated `fields`.
     """
-    book_obj = book.get(db, id=book_id)
+    requested = parse_fields(fields, Book)
+    book_obj = await book.aget_cached(
+        db, id=book_id, fields=loaded_fields(requested) if requested else None
+    )
     if not book_obj:
         raise NotFoundError(detail="Book not found")
-    return book_obj
+    
+    if requested:
+        rendered = sparse_response(response, book_obj, requested)
+    else:
+        rendered = render_json(response, book_obj)
+    return conditional_response(request, rendered, last_modified=row_modified(book_obj))
 
 
 @router.put("/{book_id}", response_model=Book)
@@ -0,0 +1,43 @@
+import enum
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.dependencies import get_current_active_superuser
+from app.api.routing import LibraryRoute
+from app.models.user import User
+from app.services.export_service import EXPORT_FORMATS, export_rows
+
+router = APIRouter(route_class=LibraryRoute)
+
+
+class ExportResource(str, enum.Enum):
+    BOOKS = "books"
+    LOANS = "loans"
+    REVIEWS = "reviews"
+
+
+@router.get("/{resource}")
+def export_resource(
+    *,
+    resource: ExportResource,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Stream every row of a table as NDJSON or CSV, ordered by id. The loans
+    export includes loans moved to the archive.
+
+    With `since`, only rows created or updated at or after that time are
+    included, for incremental pulls.
+    """
+    return StreamingResponse(
+        export_rows(resource.value, format, since=since),
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{resource.value}.{format}"'
+        },
+    )
@@ -1,63 +1,59 @@
 from typing import Any, List, Optional
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.dependencies import get_current_active_superuser, get_current_active_user
+from app.api.dependencies import (
+    get_current_active_superuser, get_current_active_user, get_current_active_user_async
+)
+from app.api.pagination import decode_cursor, set_next_cursor
+from app.api.responses import render
+from app.api.routing import LibraryRoute
 from app.core.exceptions import BadRequestError, NotFoundError, ForbiddenError
 from app.crud.loan import loan
+from app.crud.loan_archive import loan_archive
 from app.crud.book import book
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
+from app.db.unit_of_work import run_after_commit
 from app.models.book import Book, BookStatus
 from app.models.loan import Loan, LoanStatus
 from app.models.user import User
 from app.schemas.loan import Loan as LoanSchema, LoanCreate, LoanUpdate, LoanWithDetails
+from app.services.book_service import invalidate_books
 
-router = APIRouter()
+router = APIRouter(route_class=LibraryRoute)
 
 
 @router.get("/", response_model=List[LoanWithDetails])
-def read_loans(
-    db: Session = Depends(get_db),
+async def read_loans(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     status: Optional[LoanStatus] = None,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    after: Optional[str] = None,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
-    Retrieve loans.
+    Retrieve loans. With `include_archived`, loans returned long ago are included.
     """
-    # Update loan statuses for overdue loans
-    loan.update_loan_status(db)
-    
-    # For non-admin users, only show their own loans
-    if not current_user.is_superuser:
-        if status:
-            loans = db.query(Loan)\
-                .filter(Loan.user_id == current_user.id)\
-                .filter(Loan.status == status)\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
-        else:
-            loans = db.query(Loan)\
-                .filter(Loan.user_id == current_user.id)\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
-    else:
-        # Admin users can see all loans
-        if status:
-            loans = db.query(Loan)\
-                .filter(Loan.status == status)\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
-        else:
-            loans = loan.get_multi(db, skip=skip, limit=limit)
-    
-    return loans
+    # For non-admin users, only show their own loans; admins see all loans
+    user_id = None if current_user.is_superuser else current_user.id
+    loans = await loan.aget_loans(
+        db,
+        user_id=user_id,
+        status=status,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(after),
+        load_for=LoanWithDetails,
+        include_archived=include_archived,
+    )
+    set_next_cursor(response, loans, limit)
+    return render(response, List[LoanWithDetails], loans)
 
 
 @router.post("/", response_model=LoanSchema)
@@ -70,15 +66,6 @@ def create_loan(
     """
     Create new loan. Regular users can only create loans for themselves.
     """
-    # Check if book exists
-    book_obj = book.get(db, id=loan_in.book_id)
-    if not book_obj:
-        raise NotFoundError(detail="Book not found")
-    
-    # Check if book is available
-    if book_obj.status != BookStatus.AVAILABLE:
-        raise BadRequestError(detail="Book is not available for loan")
-    
     # For regular users, ensure they can only create loans for themselves
     if not current_user.is_superuser:
         loan_in.user_id = current_user.id
@@ -86,28 +73,31 @@ def create_loan(
         # If admin doesn't specify user_id, use their own
         loan_in.user_id = current_user.id
     
-    # Create the loan
-    loan_obj = loan.create(db, obj_in=loan_in)
-    
-    # Update book status
-    book_obj.status = BookStatus.BORROWED
-    db.add(book_obj)
-    db.commit()
+    # Claim the book and create the loan atomically
+    loan_obj = loan.checkout(db, obj_in=loan_in)
+    if not loan_obj:
+        # Only the losing path pays for telling the two failures apart
+        if not book.get(db, id=loan_in.book_id):
+            raise NotFoundError(detail="Book not found")
+        raise BadRequestError(detail="Book is not available for loan")
     
     return loan_obj
 
 
 @router.get("/{loan_id}", response_model=LoanWithDetails)
-def read_loan(
+async def read_loan(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     loan_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get loan by ID.
     """
-    loan_obj = loan.get(db, id=loan_id)
+    loan_obj = await loan.aget(db, id=loan_id, load_for=LoanWithDetails)
+    if not loan_obj:
+        # Loans returned long ago live in the archive
+        loan_obj = await loan_archive.aget(db, id=loan_id, load_for=LoanWithDetails)
     if not loan_obj:
         raise NotFoundError(detail="Loan not found")
     
@@ -208,6 +198,6 @@ def delete_loan(
             db.add(book_obj)
     
     loan_obj = loan.remove(db, id=loan_id)
-    db.commit()
+    run_after_commit(db, invalidate_books, [loan_obj.book_id])
     
     return loan_obj
\ No newline at end of file
@@ -1,41 +1,68 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_current_active_superuser, get_current_active_user
-from app.core.exceptions import BadRequestError, NotFoundError, ForbiddenError
+from app.api.conditional import conditional_response, latest_modified, row_modified
+from app.api.pagination import decode_cursor, set_next_cursor
+from app.api.responses import render, render_json
+from app.api.routing import LibraryRoute
+from app.core.exceptions import BadRequestError, NotFoundError, ForbiddenError, ConflictError
 from app.crud.review import review
 from app.crud.book import book
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.user import User
 from app.schemas.review import Review as ReviewSchema, ReviewCreate, ReviewUpdate, ReviewWithDetails
 
-router = APIRouter()
+router = APIRouter(route_class=LibraryRoute)
 
 
 @router.get("/", response_model=List[ReviewWithDetails])
-def read_reviews(
-    db: Session = Depends(get_db),
+async def read_reviews(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     book_id: Optional[int] = None,
     user_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
 ) -> Any:
     """
     Retrieve reviews with optional filtering.
     """
+    after_id = decode_cursor(after)
     if book_id:
         # Get reviews for a specific book
-        reviews = review.get_reviews_by_book(db, book_id=book_id, skip=skip, limit=limit)
+        reviews = await review.aget_reviews_by_book_cached(
+            db, book_id=book_id, skip=skip, limit=limit, after=after_id
+        )
     elif user_id:
         # Get reviews by a specific user
-        reviews = review.get_reviews_by_user(db, user_id=user_id, skip=skip, limit=limit)
+        reviews = await review.aget_reviews_by_user(
+            db,
+            user_id=user_id,
+            skip=skip,
+            limit=limit,
+            after=after_id,
+            load_for=ReviewWithDetails,
+        )
     else:
         # Get all reviews
-        reviews = review.get_multi(db, skip=skip, limit=limit)
+        reviews = await review.aget_multi(
+            db, skip=skip, limit=limit, after=after_id, load_for=ReviewWithDetails
+        )
     
-    return reviews
+    set_next_cursor(response, reviews, limit)
+    if book_id:
+        # Already serialized by the catalog cache
+        rendered = render_json(response, reviews)
+    else:
+        rendered = render(response, List[ReviewWithDetails], reviews)
+    return conditional_response(request, rendered, last_modified=latest_modified(reviews))
 
 
 @router.post("/", response_model=ReviewSchema)
@@ -57,24 +84,32 @@ def create_review(
     user_id = current_user.id
     
     # Create or update the review
-    review_obj = review.create_or_update_review(db, obj_in=review_in, user_id=user_id)
+    try:
+        review_obj = review.create_or_update_review(db, obj_in=review_in, user_id=user_id)
+    except IntegrityError:
+        # A concurrent request created this user's review for the book first
+        db.rollback()
+        raise ConflictError(detail="The review was submitted concurrently, please retry")
     return review_obj
 
 
 @router.get("/{review_id}", response_model=ReviewWithDetails)
-def read_review(
+async def read_review(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     review_id: int,
 ) -> Any:
     """
     Get review by ID.
     """
-    review_obj = review.get(db, id=review_id)
+    review_obj = await review.aget(db, id=review_id, load_for=ReviewWithDetails)
     if not review_obj:
         raise NotFoundError(detail="Review not found")
     
-    return review_obj
+    rendered = render(response, ReviewWithDetails, review_obj)
+    return conditional_response(request, rendered, last_modified=row_modified(review_obj))
 
 
 @router.put("/{review_id}", response_model=ReviewSchema)
@@ -96,12 +131,8 @@ def update_review(
     if not current_user.is_superuser and review_obj.user_id != current_user.id:
         raise ForbiddenError(detail="Not enough permissions")
     
-    # Update the review
+    # Update the review together with the book's rating aggregates
     review_obj = review.update(db, db_obj=review_obj, obj_in=review_in)
-    
-    # Update book's average rating
-    book.update_book_rating(db, book_id=review_obj.book_id)
-    
     return review_obj
 
 
@@ -123,13 +154,6 @@ def delete_review(
     if not current_user.is_superuser and review_obj.user_id != current_user.id:
         raise ForbiddenError(detail="Not enough permissions")
     
-    # Save book_id before deletion for updating rating
-    book_id = review_obj.book_id
-    
-    # Delete the review
+    # Delete the review together with its share of the book's rating
     review_obj = review.remove(db, id=review_id)
-    
-    # Update book's average rating
-    book.update_book_rating(db, book_id=book_id)
-    
     return review_obj
\ No newline at end of file
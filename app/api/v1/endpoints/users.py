@@ -1,34 +1,60 @@
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.dependencies import get_current_active_superuser, get_current_active_user
-from app.core.exceptions import BadRequestError, NotFoundError
+from app.api.conditional import PRIVATE_CACHE_CONTROL, conditional_response, latest_modified, row_modified
+from app.api.pagination import decode_cursor, set_next_cursor
+from app.api.responses import render
+from app.api.routing import LibraryRoute
+from app.core.exceptions import BadRequestError, ConflictError, NotFoundError
+from app.core.security import get_password_hash_async, get_password_hashes_async
 from app.crud.user import user
 from app.db.session import get_db
-from app.schemas.user import User, UserCreate, UserUpdate
+from app.schemas.bulk import BatchDelete, BulkResult
+from app.schemas.user import User, UserBatchUpdate, UserCreate, UserUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=LibraryRoute)
+
+
+async def hash_new_password(user_in: UserUpdate) -> Dict[str, Any]:
+    """Update data with any new password already hashed on the hashing pool"""
+    update_data = user_in.dict(exclude_unset=True)
+    password = update_data.pop("password", None)
+    if password:
+        update_data["hashed_password"] = await get_password_hash_async(password)
+    return update_data
 
 
 @router.get("/", response_model=List[User])
 def read_users(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_active_superuser),
 ) -> Any:
     """
     Retrieve users.
     """
-    users = user.get_multi(db, skip=skip, limit=limit)
-    return users
+    users = user.get_multi(db, skip=skip, limit=limit, after=decode_cursor(after))
+    set_next_cursor(response, users, limit)
+    return conditional_response(
+        request,
+        render(response, List[User], users),
+        last_modified=latest_modified(users),
+        cache_control=PRIVATE_CACHE_CONTROL,
+    )
 
 
 @router.post("/", response_model=User)
-def create_user(
+async def create_user(
     *,
     db: Session = Depends(get_db),
     user_in: UserCreate,
@@ -37,34 +63,46 @@ def create_user(
     """
     Create new user.
     """
-    user_exists = user.get_by_email(db, email=user_in.email)
+    user_exists = await run_in_threadpool(user.get_by_email, db, email=user_in.email)
     if user_exists:
         raise BadRequestError(
             detail="The user with this email already exists in the system"
         )
     
-    username_exists = user.get_by_username(db, username=user_in.username)
+    username_exists = await run_in_threadpool(
+        user.get_by_username, db, username=user_in.username
+    )
     if username_exists:
         raise BadRequestError(
             detail="The user with this username already exists in the system"
         )
     
-    user_obj = user.create(db, obj_in=user_in)
+    hashed_password = await get_password_hash_async(user_in.password)
+    user_obj = await run_in_threadpool(
+        user.create, db, obj_in=user_in, hashed_password=hashed_password
+    )
     return user_obj
 
 
 @router.get("/me", response_model=User)
 def read_user_me(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get current user.
     """
-    return current_user
+    return conditional_response(
+        request,
+        render(response, User, current_user),
+        last_modified=row_modified(current_user),
+        cache_control=PRIVATE_CACHE_CONTROL,
+    )
 
 
 @router.put("/me", response_model=User)
-def update_user_me(
+async def update_user_me(
     *,
     db: Session = Depends(get_db),
     user_in: UserUpdate,
@@ -75,7 +113,7 @@ def update_user_me(
     """
     # Check if email already exists
     if user_in.email and user_in.email != current_user.email:
-        user_exists = user.get_by_email(db, email=user_in.email)
+        user_exists = await run_in_threadpool(user.get_by_email, db, email=user_in.email)
         if user_exists:
             raise BadRequestError(
                 detail="The user with this email already exists in the system"
@@ -83,18 +121,100 @@ def update_user_me(
     
     # Check if username already exists
     if user_in.username and user_in.username != current_user.username:
-        username_exists = user.get_by_username(db, username=user_in.username)
+        username_exists = await run_in_threadpool(
+            user.get_by_username, db, username=user_in.username
+        )
         if username_exists:
             raise BadRequestError(
                 detail="The user with this username already exists in the system"
             )
     
-    user_obj = user.update(db, db_obj=current_user, obj_in=user_in)
+    update_data = await hash_new_password(user_in)
+    user_obj = await run_in_threadpool(
+        user.update, db, db_obj=current_user, obj_in=update_data
+    )
     return user_obj
 
 
+@router.post("/batch", response_model=BulkResult)
+async def create_users_batch(
+    *,
+    db: Session = Depends(get_db),
+    users_in: List[UserCreate],
+    upsert: bool = False,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Create users in bulk. With `upsert`, users whose email already exists are updated.
+    """
+    hashed_passwords = await get_password_hashes_async(
+        [user_in.password for user_in in users_in]
+    )
+    rows = []
+    for user_in, hashed_password in zip(users_in, hashed_passwords):
+        row = user_in.dict(exclude={"password"})
+        row["hashed_password"] = hashed_password
+        rows.append(row)
+    try:
+        if upsert:
+            ids = await run_in_threadpool(
+                user.upsert_many,
+                db,
+                objs_in=rows,
+                index_elements=["email"],
+                update_columns=user.profile_columns,
+            )
+        else:
+            ids = await run_in_threadpool(user.create_many, db, objs_in=rows)
+    except IntegrityError:
+        await run_in_threadpool(db.rollback)
+        raise ConflictError(
+            detail="One or more users conflict with existing emails or usernames"
+        )
+    return BulkResult(count=len(rows), ids=ids or None)
+
+
+@router.patch("/batch", response_model=BulkResult)
+async def update_users_batch(
+    *,
+    db: Session = Depends(get_db),
+    batch_in: UserBatchUpdate,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Apply the same changes to many users.
+    """
+    update_data = await hash_new_password(batch_in.values)
+    try:
+        updated = await run_in_threadpool(
+            user.update_many, db, ids=batch_in.ids, obj_in=update_data
+        )
+    except IntegrityError:
+        await run_in_threadpool(db.rollback)
+        raise ConflictError(
+            detail="The update conflicts with existing emails or usernames"
+        )
+    return BulkResult(count=updated)
+
+
+@router.delete("/batch", response_model=BulkResult)
+def delete_users_batch(
+    *,
+    db: Session = Depends(get_db),
+    batch_in: BatchDelete,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Delete many users.
+    """
+    deleted = user.delete_many(db, ids=batch_in.ids)
+    return BulkResult(count=deleted)
+
+
 @router.get("/{user_id}", response_model=User)
 def read_user_by_id(
+    request: Request,
+    response: Response,
     user_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
@@ -112,11 +232,16 @@ def read_user_by_id(
             detail="Not enough permissions"
         )
     
-    return user_obj
+    return conditional_response(
+        request,
+        render(response, User, user_obj),
+        last_modified=row_modified(user_obj),
+        cache_control=PRIVATE_CACHE_CONTROL,
+    )
 
 
 @router.put("/{user_id}", response_model=User)
-def update_user(
+async def update_user(
     *,
     db: Session = Depends(get_db),
     user_id: int,
@@ -126,13 +251,13 @@ def update_user(
     """
     Update a user.
     """
-    user_obj = user.get(db, id=user_id)
+    user_obj = await run_in_threadpool(user.get, db, id=user_id)
     if not user_obj:
         raise NotFoundError(detail="User not found")
     
     # Check if email already exists
     if user_in.email and user_in.email != user_obj.email:
-        user_exists = user.get_by_email(db, email=user_in.email)
+        user_exists = await run_in_threadpool(user.get_by_email, db, email=user_in.email)
         if user_exists:
             raise BadRequestError(
                 detail="The user with this email already exists in the system"
@@ -140,13 +265,18 @@ def update_user(
     
     # Check if username already exists
     if user_in.username and user_in.username != user_obj.username:
-        username_exists = user.get_by_username(db, username=user_in.username)
+        username_exists = await run_in_threadpool(
+            user.get_by_username, db, username=user_in.username
+        )
         if username_exists:
             raise BadRequestError(
                 detail="The user with this username already exists in the system"
             )
     
-    user_obj = user.update(db, db_obj=user_obj, obj_in=user_in)
+    update_data = await hash_new_password(user_in)
+    user_obj = await run_in_threadpool(
+        user.update, db, db_obj=user_obj, obj_in=update_data
+    )
     return user_obj
 
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, books, loans, reviews
+from app.api.v1.endpoints import admin, auth, export, users, books, loans, reviews
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
@@ -8,3 +8,5 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(books.router, prefix="/books", tags=["books"])
 api_router.include_router(loans.router, prefix="/loans", tags=["loans"])
 api_router.include_router(reviews.router, prefix="/reviews", tags=["reviews"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,403 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+
+class TTLCache:
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        group: Optional[Callable[[Hashable], Hashable]] = None,
+    ):
+        """
+        Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+        **Parameters**
+
+        * `maxsize`: Number of entries kept before the least recently used is evicted
+        * `ttl`: Default lifetime of an entry in seconds
+        * `group`: Maps a key to its group; keys are indexed by group so that
+          `delete_group` touches only that group's entries
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._group = group
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        # Bumped by delete_group (per group) and clear (for every group), so
+        # a value loaded before an invalidation is not stored after it
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._unindex(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[Tuple[int, int]] = None,
+    ) -> bool:
+        """
+        Store `value` under `key`; returns whether it was stored.
+
+        Pass the `generation` of the key's group read before loading `value`
+        to drop it if the group was invalidated in the meantime.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return False
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if self._group is not None:
+                self._groups.setdefault(self._group(key), set()).add(key)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._unindex(evicted)
+                self.evictions += 1
+            return True
+
+    def generation(self, key: Hashable) -> Tuple[int, int]:
+        """The invalidation generation of `key`'s group, for `set`"""
+        with self._lock:
+            return self._generation(key)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._unindex(key)
+
+    def delete_group(self, group: Hashable) -> int:
+        """Drop every entry of `group`; returns how many"""
+        with self._lock:
+            self._generations[group] = self._generations.get(group, 0) + 1
+            keys = self._groups.pop(group, ())
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._groups.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def _generation(self, key: Hashable) -> Tuple[int, int]:
+        if self._group is None:
+            return self._epoch, 0
+        return self._epoch, self._generations.get(self._group(key), 0)
+
+    def _unindex(self, key: Hashable) -> None:
+        if self._group is None:
+            return
+        group = self._group(key)
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class LocalCacheBackend:
+    """
+    Entries and generation counters held in this process (the default).
+
+    A bump is not seen by other worker processes; their entries expire on
+    their own after `ttl` plus the cache's stale period.
+    """
+
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.entries.set(key, value, ttl=ttl)
+
+    def generations(self, scopes: Sequence[str]) -> List[int]:
+        with self._lock:
+            return [self._generations.get(scope, 0) for scope in scopes]
+
+    def bump(self, scopes: Sequence[str]) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "local", **self.entries.stats()}
+
+
+class SharedCacheBackend:
+    blocking = True
+
+    def __init__(self, client: Any, prefix: str = "library:"):
+        """
+        Entries and generation counters in a store shared by every worker process.
+
+        `client` needs the redis-py subset `get`, `set(..., ex=)`, `mget` and
+        `incr`. Values are stored as JSON, so they must be JSON-compatible.
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.set(
+            self.prefix + key, json.dumps(value), ex=max(1, math.ceil(ttl))
+        )
+
+    def generations(self, scopes: Sequence[str]) -> List[int]:
+        values = self.client.mget([self.prefix + "gen:" + scope for scope in scopes])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump(self, scopes: Sequence[str]) -> None:
+        for scope in scopes:
+            self.client.incr(self.prefix + "gen:" + scope)
+
+    def stats(self) -> Dict[str, Any]:
+        # Size and evictions are tracked by the store itself
+        return {"backend": "shared"}
+
+
+class LocalSharedStore:
+    """
+    In-process stand-in for the shared store behind `SharedCacheBackend`.
+
+    Implements the same redis-py subset, so the shared code path can be run
+    in development and tests without a server.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> None:
+        if isinstance(value, str):
+            value = value.encode()
+        expires_at = time.monotonic() + ex if ex is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._get(key) or 0) + 1
+            self._data[key] = (None, str(value).encode())
+            return value
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+
+class Uncacheable:
+    """Loader result to hand to the caller without storing it"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class ReadThroughCache:
+    def __init__(
+        self,
+        backend: Any,
+        *,
+        ttl: float,
+        stale_ttl: float,
+        session_factory: Callable[[], Any],
+    ):
+        """
+        Async read-through cache with generation-based invalidation.
+
+        Every key embeds the current generation of the scopes its value depends
+        on, so bumping a scope makes all of its entries unreachable at once.
+        An entry older than `ttl` is still served for `stale_ttl` more seconds
+        while one background refresh reloads it; concurrent misses for the
+        same key share a single load.
+
+        **Parameters**
+
+        * `backend`: A `LocalCacheBackend`, a `SharedCacheBackend`, or None to disable caching
+        * `session_factory`: Opens the async session used by background refreshes
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.session_factory = session_factory
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._tasks: Set["asyncio.Task[Any]"] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.load_errors = 0
+
+    async def get_or_load(
+        self,
+        db: Any,
+        key: str,
+        scopes: Sequence[str],
+        loader: Callable[[Any], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return the cached value for `key`, calling `loader(session)` on a miss.
+
+        None results are not cached, nor are results the loader wraps in
+        `Uncacheable`.
+        """
+        if self.backend is None:
+            return await loader(db)
+        
+        generations = await self._call(self.backend.generations, scopes)
+        full_key = f"{key}@{'.'.join(map(str, generations))}"
+        entry = await self._call(self.backend.get, full_key)
+        if entry is not None:
+            if entry["fresh_until"] > time.time():
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh(full_key, loader)
+            return entry["value"]
+        
+        self.misses += 1
+        future = self._inflight.get(full_key)
+        if future is None:
+            future = self._begin(full_key)
+            await self._fill(full_key, future, lambda: loader(db))
+        return await asyncio.shield(future)
+
+    def invalidate(self, *scopes: str) -> None:
+        """Bump `scopes`; safe to call from worker threads"""
+        if self.backend is not None and scopes:
+            self.backend.bump(scopes)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        stats = self.backend.stats() if self.backend is not None else {"backend": "off"}
+        stats.update({
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "load_errors": self.load_errors,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        })
+        return stats
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.backend.blocking:
+            return await run_in_threadpool(func, *args)
+        return func(*args)
+
+    def _begin(self, full_key: str) -> "asyncio.Future[Any]":
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        return future
+
+    async def _fill(
+        self,
+        full_key: str,
+        future: "asyncio.Future[Any]",
+        load: Callable[[], Awaitable[Any]],
+    ) -> None:
+        try:
+            value = await load()
+            store = not isinstance(value, Uncacheable)
+            if not store:
+                value = value.value
+            if store and value is not None:
+                entry = {"value": value, "fresh_until": time.time() + self.ttl}
+                await self._call(
+                    self.backend.set, full_key, entry, self.ttl + self.stale_ttl
+                )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.load_errors += 1
+            future.set_exception(e)
+        else:
+            future.set_result(value)
+        finally:
+            self._inflight.pop(full_key, None)
+
+    def _refresh(self, full_key: str, loader: Callable[[Any], Awaitable[Any]]) -> None:
+        if full_key in self._inflight:
+            return
+        
+        async def load() -> Any:
+            async with self.session_factory() as db:
+                return await loader(db)
+        
+        self.refreshes += 1
+        future = self._begin(full_key)
+        # Nobody may be waiting on a background refresh; consume its error
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        task = asyncio.ensure_future(self._fill(full_key, future, load))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
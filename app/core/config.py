@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 from functools import lru_cache
 
 
@@ -11,6 +11,47 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
     
+    # Password hashing pool (0 workers means one per CPU core)
+    HASHING_WORKERS: int = 0
+    HASHING_MAX_PENDING: int = 64
+    
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
+    # Catalog read cache: "local" (per process), "shared" (CATALOG_CACHE_URL,
+    # or an in-process stand-in when unset) or "off". Expired entries are
+    # served for CATALOG_CACHE_STALE_SECONDS more while being refreshed.
+    # With read replicas, only results read from the primary are stored.
+    # "local" invalidates only the worker process that made the write: with
+    # more than one worker, the others keep serving the old value for up to
+    # CATALOG_CACHE_TTL_SECONDS + CATALOG_CACHE_STALE_SECONDS. Run several
+    # workers with "shared" and a CATALOG_CACHE_URL.
+    CATALOG_CACHE_BACKEND: str = "local"
+    CATALOG_CACHE_URL: Optional[str] = None
+    CATALOG_CACHE_SIZE: int = 10000
+    CATALOG_CACHE_TTL_SECONDS: int = 30
+    CATALOG_CACHE_STALE_SECONDS: int = 30
+    
+    # Full SQLAlchemy URL, overrides the MySQL settings below when set
+    # (e.g. sqlite:///./test.db for local test runs)
+    DATABASE_URL: Optional[str] = None
+    
+    # Connection pool, per engine and per worker process. With a recycle
+    # interval below the server's idle timeout, pre-ping can be turned off to
+    # save a round trip on every checkout.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    # Read replicas (full SQLAlchemy URLs). After a write, a client's reads
+    # stay on the primary for DB_READ_YOUR_WRITES_SECONDS.
+    DB_REPLICA_URLS: List[str] = []
+    DB_READ_YOUR_WRITES_SECONDS: int = 10
+    DB_REPLICA_HEALTH_CHECK_SECONDS: int = 15
+    
     # MySQL connection
     MYSQL_USER: str
     MYSQL_PASSWORD: str
@@ -22,6 +63,56 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER: str
     FIRST_SUPERUSER_PASSWORD: str
     
+    # Rows per statement for bulk CRUD writes
+    BULK_CHUNK_SIZE: int = 1000
+    
+    # Catalog imports: rows validated per batch, and where rejected-row
+    # reports are written (defaults to the system temp directory)
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_ERRORS_DIR: Optional[str] = None
+    # Longest accepted line (or CSV record), in characters; longer ones are
+    # rejected without being buffered whole
+    IMPORT_MAX_LINE_LENGTH: int = 1_048_576
+    
+    # Rows fetched per server-side cursor round trip in exports
+    EXPORT_YIELD_PER: int = 1000
+    
+    # Per-request SQL stats, sent in the Server-Timing header and logged by
+    # app.db.instrumentation. A SELECT repeated with SQL_N_PLUS_ONE_THRESHOLD
+    # different parameter sets in one request is a probable N+1, reported
+    # per SQL_N_PLUS_ONE_MODE: "off", "warn" (log) or "raise" (for tests).
+    SQL_INSTRUMENTATION: bool = True
+    SQL_N_PLUS_ONE_MODE: str = "warn"
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+    
+    # Prometheus metrics at /metrics. With several worker processes, point
+    # METRICS_MULTIPROCESS_DIR at a directory they share: each worker writes
+    # its samples there every METRICS_FLUSH_SECONDS and a scrape of any
+    # worker returns the sum over all of them. The directory must be local to
+    # one host: exited workers are recognised by pid and their counters are
+    # kept in an archive file.
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROCESS_DIR: Optional[str] = None
+    METRICS_FLUSH_SECONDS: int = 10
+    
+    # Background jobs (interval in seconds, 0 disables the job)
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 300
+    
+    # Loans returned more than LOAN_ARCHIVE_AFTER_DAYS ago move to
+    # loans_archive in batches, pausing between batches to spare the primary.
+    # One run stops after LOAN_ARCHIVE_MAX_BATCHES and resumes next interval.
+    LOAN_ARCHIVE_INTERVAL_SECONDS: int = 3600
+    LOAN_ARCHIVE_AFTER_DAYS: int = 180
+    LOAN_ARCHIVE_BATCH_SIZE: int = 500
+    LOAN_ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5
+    LOAN_ARCHIVE_MAX_BATCHES: int = 100
+    
+    # Response compression: complete bodies below COMPRESSION_MIN_SIZE bytes
+    # are sent as is; compressed bodies with an ETag are cached per process
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CACHE_SIZE: int = 256
+    COMPRESSION_CACHE_TTL_SECONDS: int = 300
+    
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = []
     
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from fastapi import HTTPException, status
 
 
@@ -28,3 +30,22 @@ class ForbiddenError(HTTPException):
 class ConflictError(HTTPException):
     def __init__(self, detail: str):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class NotAcceptableError(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=detail)
+
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: str, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class NotModifiedError(HTTPException):
+    def __init__(self, headers: Dict[str, str]):
+        super().__init__(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
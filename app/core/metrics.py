@@ -0,0 +1,314 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the archive is then updated unlocked
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Thread-safe histogram with fixed upper bucket bounds.
+
+        **Parameters**
+
+        * `buckets`: Inclusive upper bounds; larger values land in an implicit +Inf bucket
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts keyed by upper bound, plus count and sum"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"buckets": cumulative, "count": running, "sum": total}
+
+
+# Prometheus exposition. A metric family is a JSON-compatible dict
+# {"name", "type", "help", "samples": [[suffix, [[label, value], ...], value]]}
+# so families from several worker processes can be written to disk and summed.
+Family = Dict[str, Any]
+
+
+def family(name: str, kind: str, documentation: str) -> Family:
+    return {"name": name, "type": kind, "help": documentation, "samples": []}
+
+
+def add_sample(
+    metric: Family, value: float, labels: Sequence[Tuple[str, str]] = (), suffix: str = ""
+) -> None:
+    metric["samples"].append([suffix, [list(pair) for pair in labels], value])
+
+
+def histogram_samples(
+    metric: Family, snapshot: Dict[str, Any], labels: Sequence[Tuple[str, str]] = ()
+) -> None:
+    """Add the samples of a `Histogram.snapshot()` to a histogram family"""
+    for bound, count in snapshot["buckets"].items():
+        add_sample(metric, count, [*labels, ("le", bound)], "_bucket")
+    add_sample(metric, snapshot["count"], labels, "_count")
+    add_sample(metric, snapshot["sum"], labels, "_sum")
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Monotonic counter with one shard per thread.
+
+        Each thread increments its own dict, so `inc` takes no lock; shards
+        are only summed when the metrics are collected.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, ...], float]] = []
+        self._shards_lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        shard[labelvalues] = shard.get(labelvalues, 0.0) + amount
+
+    def collect(self) -> Family:
+        totals: Dict[Tuple[str, ...], float] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for labelvalues, value in dict(shard).items():
+                totals[labelvalues] = totals.get(labelvalues, 0.0) + value
+        if not self.labelnames and not totals:
+            # Report zero rather than nothing before the first event
+            totals[()] = 0.0
+        metric = family(self.name, "counter", self.documentation)
+        for labelvalues, value in sorted(totals.items()):
+            add_sample(metric, value, list(zip(self.labelnames, labelvalues)))
+        return metric
+
+
+class MetricsRegistry:
+    """Counters and collector callbacks rendered at /metrics"""
+
+    def __init__(self) -> None:
+        self._counters: List[Counter] = []
+        self._collectors: List[Callable[[], List[Family]]] = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        counter = Counter(name, documentation, labelnames)
+        self._counters.append(counter)
+        return counter
+
+    def register(self, collector: Callable[[], List[Family]]) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> List[Family]:
+        families = [counter.collect() for counter in self._counters]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_text(families: Iterable[Family]) -> str:
+    """Prometheus text exposition format, version 0.0.4"""
+    lines = []
+    for metric in families:
+        lines.append(f"# HELP {metric['name']} {_escape(metric['help'])}")
+        lines.append(f"# TYPE {metric['name']} {metric['type']}")
+        for suffix, labels, value in metric["samples"]:
+            name = metric["name"] + suffix
+            if labels:
+                rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+                name = f"{name}{{{rendered}}}"
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def _merge(sources: Iterable[List[Family]]) -> List[Family]:
+    """Sum the samples with equal names and labels across lists of families"""
+    merged: Dict[str, Family] = {}
+    values: Dict[str, Dict[Tuple[Any, ...], float]] = {}
+    for families in sources:
+        for metric in families:
+            name = metric["name"]
+            if name not in merged:
+                merged[name] = family(name, metric["type"], metric["help"])
+                values[name] = {}
+            samples = values[name]
+            for suffix, labels, value in metric["samples"]:
+                key = (suffix, tuple(tuple(pair) for pair in labels))
+                samples[key] = samples.get(key, 0.0) + value
+    for name, metric in merged.items():
+        for (suffix, labels), value in values[name].items():
+            add_sample(metric, value, labels, suffix)
+    return list(merged.values())
+
+
+class MultiprocessStore:
+    # Counters and histograms of workers that exited, summed
+    ARCHIVE = "archive.json"
+
+    def __init__(self, directory: str, max_age: float):
+        """
+        Metrics of several worker processes, exchanged through a shared directory.
+
+        Every worker writes its families to `<pid>.json`; reading merges the
+        files not older than `max_age` seconds by summing samples with equal
+        names and labels. Counters, histograms and the gauges exported here
+        (in-flight requests, busy threads, pool connections) all add up
+        across workers.
+
+        When a worker has exited, its counters and histograms are folded
+        into `archive.json` and its file is removed, so totals never drop
+        when workers are recycled; its gauges are dropped. Workers are told
+        apart by pid, so the directory must not be shared across hosts or
+        containers.
+        """
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, families: List[Family]) -> None:
+        self._write(os.path.join(self.directory, f"{os.getpid()}.json"), families)
+
+    def read(self) -> List[Family]:
+        # Under the lock, so a file is never read both on its own and
+        # through the archive it is being folded into
+        with self._locked():
+            self._archive_exited_workers()
+            sources = []
+            now = time.time()
+            for entry in os.scandir(self.directory):
+                if entry.name == self.ARCHIVE:
+                    families = self._load(entry.path)
+                elif self._worker_pid(entry.name) is not None:
+                    try:
+                        # A live worker that stopped flushing is left out
+                        if now - entry.stat().st_mtime > self.max_age:
+                            continue
+                    except OSError:
+                        continue
+                    families = self._load(entry.path)
+                else:
+                    continue
+                if families is not None:
+                    sources.append(families)
+        return _merge(sources)
+
+    def _archive_exited_workers(self) -> None:
+        exited = []
+        for entry in os.scandir(self.directory):
+            pid = self._worker_pid(entry.name)
+            if pid is not None and not _pid_alive(pid):
+                exited.append(entry.path)
+        if not exited:
+            return
+        archive_path = os.path.join(self.directory, self.ARCHIVE)
+        sources = [self._load(archive_path) or []]
+        for path in exited:
+            families = self._load(path) or []
+            sources.append([metric for metric in families if metric["type"] != "gauge"])
+        self._write(archive_path, _merge(sources))
+        for path in exited:
+            os.remove(path)
+        # Left behind by a worker that died while writing
+        for entry in os.scandir(self.directory):
+            pid = self._worker_pid(entry.name, suffix=".json.tmp")
+            if pid is not None and not _pid_alive(pid):
+                os.remove(entry.path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # Serializes reads and the archive's read-modify-write across workers
+        with open(os.path.join(self.directory, "archive.lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _worker_pid(name: str, suffix: str = ".json") -> Optional[int]:
+        pid = name[:-len(suffix)] if name.endswith(suffix) else ""
+        return int(pid) if pid.isdigit() else None
+
+    @staticmethod
+    def _load(path: str) -> Optional[List[Family]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path: str, families: List[Family]) -> None:
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(families, f)
+        # Readers never see a half-written file
+        os.replace(temporary, path)
+
+
+registry = MetricsRegistry()
+
+# Domain events, counted once the transaction recording them has committed
+loan_checkouts = registry.counter(
+    "library_loan_checkouts_total", "Books checked out"
+)
+loan_returns = registry.counter(
+    "library_loan_returns_total", "Books returned"
+)
+reviews_submitted = registry.counter(
+    "library_reviews_submitted_total", "Reviews created or updated"
+)
+failed_logins = registry.counter(
+    "library_failed_logins_total", "Rejected login attempts", ("reason",)
+)
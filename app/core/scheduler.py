@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval: float, func: Callable[[], object]):
+        """
+        Blocking `func` run in the threadpool every `interval` seconds.
+
+        The first run happens right after the scheduler starts.
+        """
+        self.name = name
+        self.interval = interval
+        self.func = func
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.func)
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+            await asyncio.sleep(self.interval)
+
+
+class Scheduler:
+    """In-process scheduler for background jobs, driven by the app lifespan"""
+
+    def __init__(self) -> None:
+        self._tasks: List[PeriodicTask] = []
+        self._running: List[asyncio.Task] = []
+
+    def add(
+        self, name: str, interval: Optional[float], func: Callable[[], object]
+    ) -> None:
+        """Register a job; a missing or non-positive interval disables it"""
+        if interval and interval > 0:
+            self._tasks.append(PeriodicTask(name, interval, func))
+
+    def start(self) -> None:
+        for task in self._tasks:
+            self._running.append(
+                asyncio.create_task(task.run_forever(), name=task.name)
+            )
+
+    async def stop(self) -> None:
+        """Cancel the jobs and forget them; the next lifespan registers its own"""
+        for running in self._running:
+            running.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._running.clear()
+        self._tasks.clear()
+
+
+scheduler = Scheduler()
@@ -1,9 +1,14 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Callable, List, Sequence, Union, Optional, Tuple
 
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -30,3 +35,76 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a new hash if the stored one is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class HashingExecutor:
+    def __init__(self, max_workers: int, max_pending: int):
+        """
+        Process pool for bcrypt work, kept off the event loop and threadpool.
+
+        At most `max_pending` calls may be queued or running; beyond that
+        callers fail fast with a 503 instead of piling up behind the pool.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ServiceUnavailableError(
+                    detail="Too many authentication requests, please retry"
+                )
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_executor = HashingExecutor(
+    max_workers=settings.HASHING_WORKERS, max_pending=settings.HASHING_MAX_PENDING
+)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return await hashing_executor.run(
+        verify_and_update_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hashing_executor.run(get_password_hash, password)
+
+
+async def get_password_hashes_async(passwords: Sequence[str]) -> List[str]:
+    """Hash many passwords, keeping at most one call per pool worker in flight"""
+    hashes: List[str] = []
+    step = hashing_executor.max_workers
+    for start in range(0, len(passwords), step):
+        hashes.extend(await asyncio.gather(
+            *[get_password_hash_async(p) for p in passwords[start:start + step]]
+        ))
+    return hashes
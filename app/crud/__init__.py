@@ -2,4 +2,5 @@ from app.crud.base import CRUDBase
 from app.crud.user import user
 from app.crud.book import book
 from app.crud.loan import loan
+from app.crud.loan_archive import loan_archive
 from app.crud.review import review
\ No newline at end of file
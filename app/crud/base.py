@@ -1,10 +1,16 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterator, List, Optional, Sequence, Type, TypeVar, Union
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, bindparam, delete, insert, inspect, select, tuple_, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, joinedload, load_only, selectinload
 
+from app.core.config import settings
 from app.db.base import Base
+from app.db.unit_of_work import run_after_commit
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -12,6 +18,9 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Schema fields computed from columns of another name, mapped to those columns
+    derived_columns: Dict[str, Sequence[str]] = {}
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -22,20 +31,107 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        self._loader_options: Dict[Type[BaseModel], List[Any]] = {}
+
+    def loader_options(self, schema: Optional[Type[BaseModel]]) -> List[Any]:
+        """
+        Eager-loading options for the relationships that `schema` serializes.
+
+        Many-to-one relationships are joined into the main query and
+        collections are fetched with one extra SELECT ... IN, so serializing
+        a page costs a fixed number of queries instead of one per row.
+        """
+        if schema is None:
+            return []
+        options = self._loader_options.get(schema)
+        if options is None:
+            relationships = inspect(self.model).relationships
+            options = []
+            for name in schema.model_fields:
+                relationship = relationships.get(name)
+                if relationship is None:
+                    continue
+                attribute = getattr(self.model, name)
+                if relationship.uselist:
+                    options.append(selectinload(attribute))
+                else:
+                    options.append(joinedload(attribute))
+            self._loader_options[schema] = options
+        return options
+
+    def column_options(self, fields: Optional[Sequence[str]]) -> List[Any]:
+        """
+        Restrict loading to the columns behind the schema `fields`; None loads every column.
+
+        Any other column raises on access instead of issuing a lazy load.
+        """
+        if fields is None:
+            return []
+        columns = inspect(self.model).column_attrs
+        keys = ["id"]
+        for name in fields:
+            if name in columns:
+                keys.append(name)
+            keys.extend(self.derived_columns.get(name, ()))
+        attributes = [getattr(self.model, key) for key in dict.fromkeys(keys)]
+        return [load_only(*attributes, raiseload=True)]
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    def get(
+        self, db: Session, id: Any, *, load_for: Optional[Type[BaseModel]] = None
+    ) -> Optional[ModelType]:
+        return db.query(self.model)\
+            .options(*self.loader_options(load_for))\
+            .filter(self.model.id == id)\
+            .first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return self.paginate(
+            db.query(self.model),
+            skip=skip,
+            limit=limit,
+            after=after,
+            load_for=load_for,
+        )
+
+    def paginate(
+        self,
+        query: Query,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
+    ) -> List[ModelType]:
+        """
+        Return one page of `query` ordered by primary key.
+
+        With `after` (the last id of the previous page) the page is located
+        through the primary key index instead of scanning `skip` rows.
+        `load_for` eager-loads the relationships of that response schema.
+        """
+        query = query.options(*self.loader_options(load_for)).order_by(self.model.id)
+        if after is not None:
+            query = query.filter(self.model.id > after)
+        elif skip:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
+        # Enum members stay members; JSON-encoding them stored their values
+        obj_in_data = obj_in.dict()
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
-        db.commit()
+        # Flush for the id; the request's unit of work commits. The refresh
+        # loads server defaults such as `created_at`
+        db.flush()
         db.refresh(db_obj)
         return db_obj
 
@@ -46,21 +142,309 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
+        for field in inspect(self.model).column_attrs.keys():
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
-        db.commit()
-        return obj
\ No newline at end of file
+        db.flush()
+        return obj
+
+    # Bulk variants: one set-based statement per chunk. Like the single-row
+    # methods they leave the commit to the caller's unit of work
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        chunk_size: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Insert many rows with executemany INSERTs.
+
+        Returns the new primary keys when the database supports RETURNING
+        for executemany (SQLite, MariaDB) and an empty list otherwise.
+        """
+        table = self.model.__table__
+        returning = self._supports_returning(db)
+        ids: List[Any] = []
+        for chunk in self._chunks(self._rows(objs_in), chunk_size):
+            if returning:
+                ids.extend(db.scalars(insert(table).returning(table.c.id), chunk))
+            else:
+                db.execute(insert(table), chunk)
+        run_after_commit(db, self.after_bulk_write, ids or None)
+        return ids
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str],
+        update_columns: Sequence[str],
+        chunk_size: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Insert rows, updating the existing row when `index_elements` collide.
+
+        Only `update_columns` are overwritten on a collision, so columns the
+        application maintains itself (status, aggregates, timestamps) are
+        never reset by a re-import. Uses INSERT ... ON DUPLICATE KEY UPDATE
+        on MySQL, INSERT ... ON CONFLICT DO UPDATE on SQLite and PostgreSQL,
+        and a lookup of the existing keys elsewhere.
+        """
+        table = self.model.__table__
+        dialect = db.get_bind().dialect.name
+        if dialect not in ("mysql", "sqlite", "postgresql"):
+            return self._upsert_by_lookup(
+                db,
+                objs_in=objs_in,
+                index_elements=index_elements,
+                update_columns=update_columns,
+                chunk_size=chunk_size,
+            )
+        returning = self._supports_returning(db)
+        ids: List[Any] = []
+        for chunk in self._chunks(self._rows(objs_in), chunk_size):
+            columns = [
+                c for c in update_columns
+                if c in chunk[0] and c not in index_elements and c != "id"
+            ]
+            if dialect == "mysql":
+                statement = mysql_insert(table)
+                # With nothing to update, assigning the key to itself is a no-op
+                assignments = {c: statement.inserted[c] for c in columns} or {
+                    index_elements[0]: table.c[index_elements[0]]
+                }
+                statement = statement.on_duplicate_key_update(assignments)
+            else:
+                statement = sqlite_insert(table) if dialect == "sqlite" else pg_insert(table)
+                if columns:
+                    statement = statement.on_conflict_do_update(
+                        index_elements=list(index_elements),
+                        set_={c: statement.excluded[c] for c in columns},
+                    )
+                else:
+                    statement = statement.on_conflict_do_nothing(
+                        index_elements=list(index_elements)
+                    )
+            if returning:
+                ids.extend(db.scalars(statement.returning(table.c.id), chunk))
+            else:
+                db.execute(statement, chunk)
+        run_after_commit(db, self.after_bulk_write, ids or None)
+        return ids
+
+    def _upsert_by_lookup(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str],
+        update_columns: Sequence[str],
+        chunk_size: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Upsert for databases without an upsert statement.
+
+        Each chunk costs one SELECT for the existing keys, one executemany
+        INSERT for the new rows and one executemany UPDATE for the others.
+        Not atomic against concurrent inserts of the same key; those fail
+        with IntegrityError like a plain insert.
+        """
+        table = self.model.__table__
+        key_columns = [table.c[name] for name in index_elements]
+        ids: List[Any] = []
+        for chunk in self._chunks(self._rows(objs_in), chunk_size):
+            keys = [tuple(row[name] for name in index_elements) for row in chunk]
+            if len(key_columns) == 1:
+                condition = key_columns[0].in_([key[0] for key in keys])
+            else:
+                condition = tuple_(*key_columns).in_(keys)
+            existing = {
+                tuple(row[1:]): row[0]
+                for row in db.execute(select(table.c.id, *key_columns).where(condition))
+            }
+            new_rows = [row for row, key in zip(chunk, keys) if key not in existing]
+            if new_rows:
+                ids.extend(self.create_many(db, objs_in=new_rows))
+            columns = [
+                c for c in update_columns
+                if c in chunk[0] and c not in index_elements and c != "id"
+            ]
+            updates = [
+                {"_id": existing[key], **{c: row[c] for c in columns}}
+                for row, key in zip(chunk, keys) if key in existing
+            ]
+            if updates and columns:
+                # The SET clause comes from the parameter keys
+                db.execute(update(table).where(table.c.id == bindparam("_id")), updates)
+            ids.extend(update["_id"] for update in updates)
+        run_after_commit(db, self.after_bulk_write, ids or None)
+        return ids
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        ids: Sequence[Any],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        chunk_size: Optional[int] = None
+    ) -> int:
+        """Apply the same changes to every row in `ids` with UPDATE ... WHERE id IN"""
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        table = self.model.__table__
+        values = {k: v for k, v in update_data.items() if k in table.c and k != "id"}
+        updated = 0
+        if values:
+            for chunk in self._chunks(list(ids), chunk_size):
+                result = db.execute(
+                    update(table).where(table.c.id.in_(chunk)).values(values)
+                )
+                updated += result.rowcount
+        run_after_commit(db, self.after_bulk_write, ids)
+        return updated
+
+    def delete_many(
+        self, db: Session, *, ids: Sequence[Any], chunk_size: Optional[int] = None
+    ) -> int:
+        """Delete every row in `ids` with DELETE ... WHERE id IN"""
+        table = self.model.__table__
+        deleted = 0
+        for chunk in self._chunks(list(ids), chunk_size):
+            result = db.execute(delete(table).where(table.c.id.in_(chunk)))
+            deleted += result.rowcount
+        run_after_commit(db, self.after_bulk_write, ids)
+        return deleted
+
+    def after_bulk_write(self, ids: Optional[Sequence[Any]]) -> None:
+        """
+        Hook for keeping derived state in step with bulk writes.
+
+        Runs once the bulk write is committed. `ids` lists the affected rows,
+        or is None when they are unknown.
+        """
+
+    def _rows(
+        self, objs_in: Sequence[Union[BaseModel, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        return [obj if isinstance(obj, dict) else obj.dict() for obj in objs_in]
+
+    def _chunks(self, items: List[Any], chunk_size: Optional[int]) -> Iterator[List[Any]]:
+        size = chunk_size or settings.BULK_CHUNK_SIZE
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    def _supports_returning(self, db: Session) -> bool:
+        dialect = db.get_bind().dialect
+        return dialect.insert_returning and dialect.insert_executemany_returning
+
+    # Async variants, for endpoints running on `get_async_db`
+
+    async def aget(
+        self,
+        db: AsyncSession,
+        id: Any,
+        *,
+        load_for: Optional[Type[BaseModel]] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[ModelType]:
+        result = await db.execute(
+            select(self.model)
+            .options(*self.loader_options(load_for), *self.column_options(fields))
+            .where(self.model.id == id)
+        )
+        return result.scalars().first()
+
+    async def aget_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[ModelType]:
+        return await self.apaginate(
+            db,
+            select(self.model),
+            skip=skip,
+            limit=limit,
+            after=after,
+            load_for=load_for,
+            fields=fields,
+        )
+
+    async def apaginate(
+        self,
+        db: AsyncSession,
+        statement: Select,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[ModelType]:
+        """Async counterpart of `paginate` for a `select()` statement"""
+        statement = statement.options(
+            *self.loader_options(load_for), *self.column_options(fields)
+        )
+        if after is not None:
+            statement = statement.where(self.model.id > after)
+        elif skip:
+            statement = statement.offset(skip)
+        result = await db.execute(statement.order_by(self.model.id).limit(limit))
+        return list(result.scalars().all())
+
+    async def acreate(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType
+    ) -> ModelType:
+        # Enum members stay members; JSON-encoding them stored their values
+        obj_in_data = obj_in.dict()
+        db_obj = self.model(**obj_in_data)  # type: ignore
+        db.add(db_obj)
+        await db.flush()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def aupdate(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        for field in inspect(self.model).column_attrs.keys():
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+        await db.flush()
+        # `updated_at` is set by the database and cannot be lazy-loaded here
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def aremove(self, db: AsyncSession, *, id: int) -> ModelType:
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.flush()
+        return obj
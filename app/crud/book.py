@@ -1,16 +1,239 @@
-from typing import List, Optional
+import json
+from typing import Any, Dict, List, Optional, Sequence, Set, Type, Union
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.mysql import match
+from starlette.concurrency import run_in_threadpool
 
 from app.crud.base import CRUDBase
-from app.models.book import Book
-from app.schemas.book import BookCreate, BookUpdate
+from app.db.session import SessionLocal
+from app.db.unit_of_work import run_after_commit
+from app.models.book import Book, rating_bucket
+from app.schemas.book import Book as BookSchema, BookCreate, BookUpdate
+from app.schemas.sparse import sparse_model
+from app.services.book_service import (
+    BOOK_LISTS, CATALOG, book_scope, catalog_cache, invalidate_books, primary_fills
+)
+from app.services.search_service import FIELD_WEIGHTS, book_search_index
+
+# Ranked in-process search matches checked against the filters per query
+SEARCH_FILTER_CHUNK = 1000
 
 
 class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
+    derived_columns = {
+        "rating_histogram": tuple(f"ratings_{bucket}" for bucket in range(1, 6)),
+    }
+    # Columns a catalog upsert may overwrite; status, ratings and timestamps
+    # are maintained by the application and survive a re-import
+    catalog_columns = (
+        "title",
+        "author",
+        "publication_year",
+        "publisher",
+        "genre",
+        "description",
+        "cover_image_url",
+    )
+
     def get_by_isbn(self, db: Session, *, isbn: str) -> Optional[Book]:
         return db.query(Book).filter(Book.isbn == isbn).first()
 
+    def get_existing_isbns(self, db: Session, *, isbns: Sequence[str]) -> Set[str]:
+        """Return which of `isbns` are already in the catalog, in one query"""
+        if not isbns:
+            return set()
+        rows = db.query(Book.isbn).filter(Book.isbn.in_(isbns))
+        return {row.isbn for row in rows}
+
+    def create(self, db: Session, *, obj_in: BookCreate) -> Book:
+        db_obj = super().create(db, obj_in=obj_in)
+        self._after_commit_index(db, db_obj)
+        return db_obj
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Book,
+        obj_in: Union[BookUpdate, Dict[str, Any]]
+    ) -> Book:
+        db_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        self._after_commit_index(db, db_obj)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Book:
+        db_obj = super().remove(db, id=id)
+        run_after_commit(db, book_search_index.remove, id)
+        run_after_commit(db, invalidate_books, [id])
+        return db_obj
+
+    def _after_commit_index(self, db: Session, db_obj: Book) -> None:
+        # Snapshot the searchable fields now: the commit expires the object
+        fields = {field: getattr(db_obj, field) for field in FIELD_WEIGHTS}
+        run_after_commit(db, book_search_index.add, db_obj.id, fields)
+        run_after_commit(db, invalidate_books, [db_obj.id])
+
+    def after_bulk_write(self, ids: Optional[Sequence[Any]]) -> None:
+        # Bulk statements bypass the ORM; rebuild the fallback index lazily
+        book_search_index.invalidate()
+        invalidate_books(ids)
+
+    async def aget_cached(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        `aget` through the catalog cache, serialized as `schemas.Book`.
+
+        With `fields`, only those columns are loaded and serialized.
+        """
+        schema = self._schema_for(fields)
+        
+        async def load(session: AsyncSession) -> Optional[Dict[str, Any]]:
+            db_obj = await self.aget(session, id=id, fields=fields)
+            if db_obj is None:
+                return None
+            return schema.model_validate(db_obj).model_dump(mode="json")
+        
+        key = f"book:{id}:" + json.dumps(fields)
+        return await catalog_cache.get_or_load(
+            db, key, (CATALOG, book_scope(id)), primary_fills(load)
+        )
+
+    async def alist_cached(
+        self,
+        db: AsyncSession,
+        *,
+        q: Optional[str] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        genre: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Full-text search, filtered search or plain listing through the catalog cache.
+
+        `q` ranks by relevance, narrowed by the filters, and pages with `skip`
+        only; `after` is ignored with it.
+        """
+        schema = self._schema_for(fields)
+        
+        async def load(session: AsyncSession) -> List[Dict[str, Any]]:
+            if q:
+                books = await self.asearch(
+                    session,
+                    q=q,
+                    title=title,
+                    author=author,
+                    genre=genre,
+                    skip=skip,
+                    limit=limit,
+                    fields=fields,
+                )
+            elif title or author or genre:
+                books = await self.asearch_books(
+                    session,
+                    title=title,
+                    author=author,
+                    genre=genre,
+                    skip=skip,
+                    limit=limit,
+                    after=after,
+                    fields=fields,
+                )
+            else:
+                books = await self.aget_multi(
+                    session, skip=skip, limit=limit, after=after, fields=fields
+                )
+            return [schema.model_validate(b).model_dump(mode="json") for b in books]
+        
+        key = "books:" + json.dumps([q, title, author, genre, skip, limit, after, fields])
+        return await catalog_cache.get_or_load(
+            db, key, (CATALOG, BOOK_LISTS), primary_fills(load)
+        )
+
+    def search(
+        self,
+        db: Session,
+        *,
+        q: str,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        genre: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Book]:
+        """
+        Full-text search over title, author, genre and description, best match first.
+
+        `title`, `author` and `genre` narrow the matches like `search_books`.
+        """
+        options = self.column_options(fields)
+        filters = self._search_filters(title=title, author=author, genre=genre)
+        if db.get_bind().dialect.name == "mysql":
+            relevance = match(
+                Book.title, Book.author, Book.genre, Book.description, against=q
+            ).in_natural_language_mode()
+            return db.query(Book)\
+                .options(*options)\
+                .filter(relevance, *filters)\
+                .order_by(relevance.desc(), Book.id)\
+                .offset(skip)\
+                .limit(limit)\
+                .all()
+        
+        book_ids = self._indexed_search_ids(
+            db, q=q, filters=filters, skip=skip, limit=limit
+        )
+        if not book_ids:
+            return []
+        books = {
+            b.id: b for b in db.query(Book).options(*options).filter(Book.id.in_(book_ids))
+        }
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    def _indexed_search_ids(
+        self,
+        db: Session,
+        *,
+        q: str,
+        filters: Sequence[Any],
+        skip: int,
+        limit: int
+    ) -> List[int]:
+        """One page of ids from the in-process index, narrowed by `filters`"""
+        book_search_index.ensure_built(db)
+        if not filters:
+            return book_search_index.rank(q, top=skip + limit)[skip:]
+        # Check the ranked matches against the filters a chunk at a time,
+        # stopping once the page is full
+        ranked = book_search_index.rank(q)
+        page: List[int] = []
+        for start in range(0, len(ranked), SEARCH_FILTER_CHUNK):
+            chunk = ranked[start:start + SEARCH_FILTER_CHUNK]
+            matching = set(db.scalars(select(Book.id).where(Book.id.in_(chunk), *filters)))
+            page.extend(book_id for book_id in chunk if book_id in matching)
+            if len(page) >= skip + limit:
+                break
+        return page[skip:skip + limit]
+
+    def _indexed_search_ids_in_thread(self, **kwargs: Any) -> List[int]:
+        db = SessionLocal()
+        try:
+            return self._indexed_search_ids(db, **kwargs)
+        finally:
+            db.close()
+
     def search_books(
         self,
         db: Session,
@@ -19,31 +242,141 @@ class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
         author: Optional[str] = None,
         genre: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[int] = None
+    ) -> List[Book]:
+        query = db.query(Book).filter(
+            *self._search_filters(title=title, author=author, genre=genre)
+        )
+        return self.paginate(query, skip=skip, limit=limit, after=after)
+
+    async def asearch_books(
+        self,
+        db: AsyncSession,
+        *,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        genre: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[Book]:
-        query = db.query(Book)
+        statement = select(Book).where(
+            *self._search_filters(title=title, author=author, genre=genre)
+        )
+        return await self.apaginate(
+            db, statement, skip=skip, limit=limit, after=after, fields=fields
+        )
+
+    async def asearch(
+        self,
+        db: AsyncSession,
+        *,
+        q: str,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        genre: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Book]:
+        """Async counterpart of `search`"""
+        if db.get_bind().dialect.name == "mysql":
+            return await db.run_sync(
+                lambda session: self.search(
+                    session,
+                    q=q,
+                    title=title,
+                    author=author,
+                    genre=genre,
+                    skip=skip,
+                    limit=limit,
+                    fields=fields,
+                )
+            )
+        
+        # Building the in-process index scans the catalog and ranking is CPU
+        # bound: both run in a worker thread, on a sync session of its own
+        book_ids = await run_in_threadpool(
+            self._indexed_search_ids_in_thread,
+            q=q,
+            filters=self._search_filters(title=title, author=author, genre=genre),
+            skip=skip,
+            limit=limit,
+        )
+        if not book_ids:
+            return []
+        result = await db.execute(
+            select(Book).options(*self.column_options(fields)).where(Book.id.in_(book_ids))
+        )
+        books = {b.id: b for b in result.scalars()}
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    def _schema_for(self, fields: Optional[Sequence[str]]) -> Type[BaseModel]:
+        if fields is None:
+            return BookSchema
+        return sparse_model(BookSchema, tuple(fields))
+
+    def _search_filters(
+        self,
+        *,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        genre: Optional[str] = None
+    ) -> List[Any]:
+        filters = []
         if title:
-            query = query.filter(Book.title.ilike(f"%{title}%"))
+            filters.append(Book.title.ilike(f"%{title}%"))
         if author:
-            query = query.filter(Book.author.ilike(f"%{author}%"))
+            filters.append(Book.author.ilike(f"%{author}%"))
         if genre:
-            query = query.filter(Book.genre.ilike(f"%{genre}%"))
-        return query.offset(skip).limit(limit).all()
+            filters.append(Book.genre.ilike(f"%{genre}%"))
+        return filters
+
+    def apply_rating_change(
+        self,
+        db: Session,
+        *,
+        book_id: int,
+        old_rating: Optional[float] = None,
+        new_rating: Optional[float] = None
+    ) -> None:
+        """
+        Fold one review change into the book's rating aggregates.
 
-    def update_book_rating(self, db: Session, *, book_id: int) -> None:
-        """Update book's average rating based on its reviews"""
-        from app.models.review import Review
+        Pass only `new_rating` for a new review, only `old_rating` for a
+        deleted one and both for an edit. The statement is not committed so
+        it lands in the same transaction as the review change.
+        """
+        sum_delta = (new_rating or 0.0) - (old_rating or 0.0)
+        count_delta = (new_rating is not None) - (old_rating is not None)
+        bucket_deltas: Dict[int, int] = {}
+        if old_rating is not None:
+            bucket = rating_bucket(old_rating)
+            bucket_deltas[bucket] = bucket_deltas.get(bucket, 0) - 1
+        if new_rating is not None:
+            bucket = rating_bucket(new_rating)
+            bucket_deltas[bucket] = bucket_deltas.get(bucket, 0) + 1
         
-        avg_rating = db.query(func.avg(Review.rating))\
-            .filter(Review.book_id == book_id)\
-            .scalar()
+        books = Book.__table__
+        rating_sum = books.c.rating_sum + sum_delta
+        rating_count = books.c.rating_count + count_delta
+        values = [
+            # Must come first: MySQL evaluates SET assignments left to right
+            # against already updated values
+            (books.c.rating, case((rating_count > 0, rating_sum / rating_count), else_=0.0)),
+            (books.c.rating_sum, rating_sum),
+            (books.c.rating_count, rating_count),
+        ]
+        for bucket, delta in bucket_deltas.items():
+            if delta:
+                column = books.c[f"ratings_{bucket}"]
+                values.append((column, column + delta))
         
-        book = self.get(db, id=book_id)
-        if book and avg_rating is not None:
-            book.rating = avg_rating
-            db.add(book)
-            db.commit()
-            db.refresh(book)
+        db.execute(
+            update(books).where(books.c.id == book_id).ordered_values(*values)
+        )
 
 
-book = CRUDBook(Book)
\ No newline at end of file
+book = CRUDBook(Book)
@@ -1,14 +1,107 @@
-from typing import List, Optional
+import heapq
+from itertools import islice
+from typing import Any, List, Optional, Type, Union
 from datetime import datetime
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import loan_checkouts, loan_returns
 from app.crud.base import CRUDBase
-from app.models.loan import Loan, LoanStatus
+from app.crud.loan_archive import loan_archive
+from app.db.unit_of_work import run_after_commit
+from app.models.book import Book, BookStatus
+from app.models.loan import Loan, LoanArchive, LoanStatus
 from app.schemas.loan import LoanCreate, LoanUpdate
+from app.services.book_service import invalidate_books
 
 
 class CRUDLoan(CRUDBase[Loan, LoanCreate, LoanUpdate]):
+    def get_loans(
+        self,
+        db: Session,
+        *,
+        user_id: Optional[int] = None,
+        status: Optional[LoanStatus] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
+    ) -> List[Loan]:
+        query = db.query(Loan).filter(
+            *self._loan_filters(user_id=user_id, status=status)
+        )
+        return self.paginate(
+            query, skip=skip, limit=limit, after=after, load_for=load_for
+        )
+
+    async def aget_loans(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: Optional[int] = None,
+        status: Optional[LoanStatus] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None,
+        include_archived: bool = False
+    ) -> List[Union[Loan, LoanArchive]]:
+        """
+        One page of loans in id order.
+
+        With `include_archived`, loans moved to `loans_archive` are merged
+        in. Archived ids never overlap live ones, so each table is read up
+        to the end of the page and the two sorted runs are merged.
+        """
+        statement = select(Loan).where(
+            *self._loan_filters(user_id=user_id, status=status)
+        )
+        # Archived loans are all returned
+        if not include_archived or status not in (None, LoanStatus.RETURNED):
+            return await self.apaginate(
+                db, statement, skip=skip, limit=limit, after=after, load_for=load_for
+            )
+        
+        offset = skip if after is None else 0
+        window = offset + limit
+        hot = await self.apaginate(
+            db, statement, limit=window, after=after, load_for=load_for
+        )
+        cold = await loan_archive.aget_loans(
+            db, user_id=user_id, limit=window, after=after, load_for=load_for
+        )
+        merged = heapq.merge(hot, cold, key=lambda row: row.id)
+        return list(islice(merged, offset, window))
+
+    def _loan_filters(
+        self, *, user_id: Optional[int] = None, status: Optional[LoanStatus] = None
+    ) -> List[Any]:
+        filters = []
+        if user_id is not None:
+            filters.append(Loan.user_id == user_id)
+        if status:
+            filters.append(self.status_filter(status))
+        return filters
+
+    def status_filter(self, status: LoanStatus) -> Any:
+        """
+        Filter on the loan status as it reads right now.
+
+        Active loans past their due date count as overdue even before the
+        periodic sweep has flagged them.
+        """
+        past_due = Loan.due_date < func.now()
+        if status == LoanStatus.OVERDUE:
+            return or_(
+                Loan.status == LoanStatus.OVERDUE,
+                and_(Loan.status == LoanStatus.ACTIVE, past_due),
+            )
+        if status == LoanStatus.ACTIVE:
+            return and_(Loan.status == LoanStatus.ACTIVE, ~past_due)
+        return Loan.status == status
+
     def get_active_loans_by_user(self, db: Session, *, user_id: int) -> List[Loan]:
         return db.query(Loan)\
             .filter(Loan.user_id == user_id)\
@@ -27,18 +120,68 @@ class CRUDLoan(CRUDBase[Loan, LoanCreate, LoanUpdate]):
             .filter(Loan.due_date < func.now())\
             .all()
 
-    def update_loan_status(self, db: Session) -> None:
-        """Update loan status for overdue loans"""
-        overdue_loans = db.query(Loan)\
+    def update_loan_status(self, db: Session) -> int:
+        """Mark all active loans past their due date as overdue in one UPDATE"""
+        rows_changed = db.query(Loan)\
             .filter(Loan.status == LoanStatus.ACTIVE)\
             .filter(Loan.due_date < func.now())\
-            .all()
+            .update({Loan.status: LoanStatus.OVERDUE}, synchronize_session=False)
+        return rows_changed
+
+    def archive_returned(self, db: Session, *, before: datetime, limit: int) -> int:
+        """
+        Move up to `limit` loans returned before `before` into `loans_archive`.
+
+        The longest-returned loans go first, read in order off the
+        (status, return_date) index. The copy and the delete run in the
+        caller's transaction, so a batch is archived entirely or not at all.
+        Rows another worker is already archiving are skipped.
+        """
+        ids = [
+            row.id
+            for row in db.query(Loan.id)\
+                .filter(Loan.status == LoanStatus.RETURNED)\
+                .filter(Loan.return_date < before)\
+                .order_by(Loan.return_date, Loan.id)\
+                .limit(limit)\
+                .with_for_update(skip_locked=True)
+        ]
+        if not ids:
+            return 0
         
-        for loan in overdue_loans:
-            loan.status = LoanStatus.OVERDUE
-            db.add(loan)
+        loans, archive = Loan.__table__, LoanArchive.__table__
+        columns = [c.name for c in loans.c]
+        db.execute(
+            insert(archive).from_select(
+                columns, select(*loans.c).where(loans.c.id.in_(ids))
+            )
+        )
+        db.execute(delete(loans).where(loans.c.id.in_(ids)))
+        return len(ids)
+
+    def checkout(self, db: Session, *, obj_in: LoanCreate) -> Optional[Loan]:
+        """
+        Claim the book and create the loan in a single transaction.
+
+        The book is claimed with a conditional UPDATE, so out of any number
+        of concurrent checkouts of the same copy exactly one succeeds. The
+        others get None back and their request fails without committing.
+        """
+        claimed = db.query(Book)\
+            .filter(Book.id == obj_in.book_id)\
+            .filter(Book.status == BookStatus.AVAILABLE)\
+            .update({Book.status: BookStatus.BORROWED}, synchronize_session=False)
+        if not claimed:
+            return None
         
-        db.commit()
+        db_obj = Loan(**obj_in.dict())
+        db.add(db_obj)
+        db.flush()
+        # `loan_date` and `created_at` are server defaults
+        db.refresh(db_obj)
+        run_after_commit(db, invalidate_books, [obj_in.book_id])
+        run_after_commit(db, loan_checkouts.inc)
+        return db_obj
 
     def return_book(self, db: Session, *, loan_id: int) -> Optional[Loan]:
         loan = self.get(db, id=loan_id)
@@ -51,13 +194,13 @@ class CRUDLoan(CRUDBase[Loan, LoanCreate, LoanUpdate]):
         db.add(loan)
         
         # Update book status
-        from app.models.book import BookStatus
         book = loan.book
         book.status = BookStatus.AVAILABLE
         db.add(book)
         
-        db.commit()
-        db.refresh(loan)
+        db.flush()
+        run_after_commit(db, invalidate_books, [loan.book_id])
+        run_after_commit(db, loan_returns.inc)
         return loan
 
 
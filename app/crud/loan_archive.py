@@ -0,0 +1,31 @@
+from typing import List, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.loan import LoanArchive
+from app.schemas.loan import LoanCreate, LoanUpdate
+
+
+class CRUDLoanArchive(CRUDBase[LoanArchive, LoanCreate, LoanUpdate]):
+    async def aget_loans(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
+    ) -> List[LoanArchive]:
+        statement = select(LoanArchive)
+        if user_id is not None:
+            statement = statement.where(LoanArchive.user_id == user_id)
+        return await self.apaginate(
+            db, statement, skip=skip, limit=limit, after=after, load_for=load_for
+        )
+
+
+loan_archive = CRUDLoanArchive(LoanArchive)
@@ -1,29 +1,117 @@
-from typing import List, Optional
+import json
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.exceptions import NotFoundError
+from app.core.metrics import reviews_submitted
 from app.crud.base import CRUDBase
+from app.crud.book import book
+from app.db.unit_of_work import run_after_commit
 from app.models.review import Review
-from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.schemas.review import ReviewCreate, ReviewUpdate, ReviewWithDetails
+from app.services.book_service import (
+    CATALOG,
+    USERS,
+    book_reviews_scope,
+    catalog_cache,
+    invalidate_book_reviews,
+    invalidate_books,
+    primary_fills,
+)
 
 
 class CRUDReview(CRUDBase[Review, ReviewCreate, ReviewUpdate]):
     def get_reviews_by_book(
-        self, db: Session, *, book_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        book_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
     ) -> List[Review]:
-        return db.query(Review)\
-            .filter(Review.book_id == book_id)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        query = db.query(Review).filter(Review.book_id == book_id)
+        return self.paginate(
+            query, skip=skip, limit=limit, after=after, load_for=load_for
+        )
+
+    async def aget_reviews_by_book(
+        self,
+        db: AsyncSession,
+        *,
+        book_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
+    ) -> List[Review]:
+        statement = select(Review).where(Review.book_id == book_id)
+        return await self.apaginate(
+            db, statement, skip=skip, limit=limit, after=after, load_for=load_for
+        )
+
+    async def aget_reviews_by_book_cached(
+        self,
+        db: AsyncSession,
+        *,
+        book_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """A book's reviews through the catalog cache, serialized as `ReviewWithDetails`"""
+        async def load(session: AsyncSession) -> List[Dict[str, Any]]:
+            reviews = await self.aget_reviews_by_book(
+                session,
+                book_id=book_id,
+                skip=skip,
+                limit=limit,
+                after=after,
+                load_for=ReviewWithDetails,
+            )
+            return [
+                ReviewWithDetails.model_validate(r).model_dump(mode="json")
+                for r in reviews
+            ]
+        
+        key = f"reviews:book:{book_id}:" + json.dumps([skip, limit, after])
+        return await catalog_cache.get_or_load(
+            db, key, (CATALOG, USERS, book_reviews_scope(book_id)), primary_fills(load)
+        )
 
     def get_reviews_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
     ) -> List[Review]:
-        return db.query(Review)\
-            .filter(Review.user_id == user_id)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        query = db.query(Review).filter(Review.user_id == user_id)
+        return self.paginate(
+            query, skip=skip, limit=limit, after=after, load_for=load_for
+        )
+
+    async def aget_reviews_by_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        load_for: Optional[Type[BaseModel]] = None
+    ) -> List[Review]:
+        statement = select(Review).where(Review.user_id == user_id)
+        return await self.apaginate(
+            db, statement, skip=skip, limit=limit, after=after, load_for=load_for
+        )
 
     def get_user_review_for_book(
         self, db: Session, *, user_id: int, book_id: int
@@ -46,27 +134,67 @@ class CRUDReview(CRUDBase[Review, ReviewCreate, ReviewUpdate]):
                 "rating": obj_in.rating,
                 "comment": obj_in.comment
             }
-            updated_review = super().update(db, db_obj=existing_review, obj_in=update_data)
-            
-            # Update book's average rating
-            from app.crud.book import book
-            book.update_book_rating(db, book_id=obj_in.book_id)
-            
-            return updated_review
-        else:
-            # Create new review
-            review_in_data = obj_in.dict()
-            review_in_data["user_id"] = user_id
-            db_obj = Review(**review_in_data)
-            db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
-            
-            # Update book's average rating
-            from app.crud.book import book
-            book.update_book_rating(db, book_id=obj_in.book_id)
-            
+            db_obj = self.update(db, db_obj=existing_review, obj_in=update_data)
+            run_after_commit(db, reviews_submitted.inc)
             return db_obj
+        
+        # Create new review
+        review_in_data = obj_in.dict()
+        review_in_data["user_id"] = user_id
+        db_obj = Review(**review_in_data)
+        db.add(db_obj)
+        
+        # Update book's rating aggregates in the same transaction
+        book.apply_rating_change(db, book_id=obj_in.book_id, new_rating=db_obj.rating)
+        
+        db.flush()
+        db.refresh(db_obj)
+        run_after_commit(db, invalidate_book_reviews, obj_in.book_id)
+        run_after_commit(db, reviews_submitted.inc)
+        return db_obj
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Review,
+        obj_in: Union[ReviewUpdate, Dict[str, Any]]
+    ) -> Review:
+        old_rating = db_obj.rating
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        for field in ("rating", "comment"):
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+        
+        if db_obj.rating != old_rating:
+            book.apply_rating_change(
+                db,
+                book_id=db_obj.book_id,
+                old_rating=old_rating,
+                new_rating=db_obj.rating,
+            )
+        
+        db.flush()
+        run_after_commit(db, invalidate_book_reviews, db_obj.book_id)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Review:
+        obj = db.query(Review).get(id)
+        if obj is None:
+            raise NotFoundError(detail="Review not found")
+        book.apply_rating_change(db, book_id=obj.book_id, old_rating=obj.rating)
+        db.delete(obj)
+        db.flush()
+        run_after_commit(db, invalidate_book_reviews, obj.book_id)
+        return obj
+
+    def after_bulk_write(self, ids: Optional[Sequence[Any]]) -> None:
+        # The affected books are unknown here
+        invalidate_books(None)
 
 
-review = CRUDReview(Review)
\ No newline at end of file
+review = CRUDReview(Review)
@@ -1,30 +1,40 @@
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Sequence, Union
 
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_password, verify_password_async
 from app.crud.base import CRUDBase
+from app.db.unit_of_work import run_after_commit
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.book_service import invalidate_users
+from app.services.user_service import invalidate_principal, invalidate_principals
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    # Columns a bulk upsert may overwrite; `is_superuser` is never granted this way
+    profile_columns = ("username", "full_name", "is_active", "hashed_password")
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
     def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
         return db.query(User).filter(User.username == username).first()
 
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
+    def create(
+        self, db: Session, *, obj_in: UserCreate, hashed_password: Optional[str] = None
+    ) -> User:
+        """Create a user; pass `hashed_password` when it was already hashed off-thread"""
         db_obj = User(
             email=obj_in.email,
             username=obj_in.username,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=hashed_password or get_password_hash(obj_in.password),
             full_name=obj_in.full_name,
             is_active=obj_in.is_active,
         )
         db.add(db_obj)
-        db.commit()
+        db.flush()
         db.refresh(db_obj)
         return db_obj
 
@@ -39,7 +49,20 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data)
+        run_after_commit(db, invalidate_principal, db_obj.id)
+        run_after_commit(db, invalidate_users)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> User:
+        db_obj = super().remove(db, id=id)
+        run_after_commit(db, invalidate_principal, id)
+        run_after_commit(db, invalidate_users)
+        return db_obj
+
+    def after_bulk_write(self, ids: Optional[Sequence[Any]]) -> None:
+        invalidate_principals(ids)
+        invalidate_users()
 
     def authenticate(
         self, db: Session, *, email: str, password: str
@@ -51,6 +74,27 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             return None
         return user
 
+    async def authenticate_async(
+        self, db: Session, *, email: str, password: str
+    ) -> Optional[User]:
+        """
+        Like `authenticate`, but verifies the password on the hashing pool.
+
+        A hash made with outdated `pwd_context` parameters is transparently
+        replaced after a successful login.
+        """
+        user = await run_in_threadpool(self.get_by_email, db, email=email)
+        if not user:
+            return None
+        verified, new_hash = await verify_password_async(password, user.hashed_password)
+        if not verified:
+            return None
+        if new_hash:
+            user = await run_in_threadpool(
+                self.update, db, db_obj=user, obj_in={"hashed_password": new_hash}
+            )
+        return user
+
     def is_active(self, user: User) -> bool:
         return user.is_active
 
@@ -0,0 +1,156 @@
+import logging
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text kept for logs
+STATEMENT_PREVIEW_CHARS = 300
+
+
+class NPlusOneQueryError(RuntimeError):
+    """Raised in "raise" mode when a request repeats a SELECT per row"""
+
+
+class QueryStats:
+    """SQL issued while serving one request"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.commits = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.n_plus_one: List[str] = []
+        self.detect_n_plus_one = settings.SQL_N_PLUS_ONE_MODE != "off"
+        self._parameters: Dict[str, Set[str]] = {}
+
+    def record(self, statement: str, parameters: Any, duration: float) -> None:
+        self.count += 1
+        self.total_seconds += duration
+        if duration > self.slowest_seconds:
+            self.slowest_seconds = duration
+            self.slowest_statement = statement
+        if self.detect_n_plus_one:
+            self._check_repeated(statement, parameters)
+
+    def _check_repeated(self, statement: str, parameters: Any) -> None:
+        # The same SELECT with a different parameter set every time is the
+        # signature of a lazy load per row
+        if statement.lstrip()[:6].upper() != "SELECT":
+            return
+        seen = self._parameters.setdefault(statement, set())
+        if len(seen) >= settings.SQL_N_PLUS_ONE_THRESHOLD:
+            return
+        seen.add(repr(parameters))
+        if len(seen) < settings.SQL_N_PLUS_ONE_THRESHOLD:
+            return
+        self.n_plus_one.append(statement)
+        message = (
+            f"Probable N+1: the same SELECT ran with {len(seen)} different "
+            f"parameter sets in one request: {_preview(statement)}"
+        )
+        if settings.SQL_N_PLUS_ONE_MODE == "raise":
+            raise NPlusOneQueryError(message)
+        logger.warning(message)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "queries": self.count,
+            "commits": self.commits,
+            "db_ms": round(self.total_seconds * 1000, 2),
+            "slowest_ms": round(self.slowest_seconds * 1000, 2),
+            "slowest_statement": _preview(self.slowest_statement),
+            "n_plus_one": [_preview(statement) for statement in self.n_plus_one],
+        }
+
+    def server_timing(self) -> str:
+        """Value for the `Server-Timing` response header"""
+        return (
+            f'db;dur={self.total_seconds * 1000:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_seconds * 1000:.2f}"
+        )
+
+
+def _preview(statement: Optional[str]) -> Optional[str]:
+    if statement is None:
+        return None
+    statement = " ".join(statement.split())
+    if len(statement) > STATEMENT_PREVIEW_CHARS:
+        return statement[:STATEMENT_PREVIEW_CHARS] + "..."
+    return statement
+
+
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def begin_query_stats() -> Token:
+    return _request_queries.set(QueryStats())
+
+
+def end_query_stats(token: Token) -> None:
+    _request_queries.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _request_queries.get()
+
+
+def expect_repeated_queries() -> None:
+    """Turn off N+1 detection for the current request, which repeats queries by design"""
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.detect_n_plus_one = False
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    # Sessions used outside a request (background jobs) are not tracked;
+    # the stats object is shared with threadpool workers via the context
+    stats = _request_queries.get()
+    started = getattr(context, "_query_started", None)
+    if stats is None or started is None:
+        return
+    stats.record(statement, parameters, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "commit")
+def _record_commit(conn: Any) -> None:
+    # COMMIT goes through the DBAPI connection, not a cursor
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+def log_query_stats(stats: QueryStats, *, method: str, route: str, status: int) -> None:
+    """One structured log line per request; the fields are also passed as `extra`"""
+    summary = stats.summary()
+    logger.info(
+        "sql method=%s route=%s status=%s queries=%d commits=%d db_ms=%.2f slowest_ms=%.2f",
+        method,
+        route,
+        status,
+        summary["queries"],
+        summary["commits"],
+        summary["db_ms"],
+        summary["slowest_ms"],
+        extra={"sql": summary, "method": method, "route": route, "status": status},
+    )
@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.metrics import Histogram
+
+# Checkout waits are normally sub-millisecond; the tail shows pool starvation
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.wait_seconds = Histogram(WAIT_BUCKETS)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def record_checkout(self, wait: float) -> None:
+        self.wait_seconds.observe(wait)
+        with self._lock:
+            self.checkouts += 1
+
+    def record_timeout(self, wait: float) -> None:
+        self.wait_seconds.observe(wait)
+        with self._lock:
+            self.timeouts += 1
+
+
+class InstrumentedPoolMixin:
+    """Time how long each checkout waits for a connection and count timeouts"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> Pool:
+        # Keep the counters when the engine is disposed and the pool rebuilt
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool: Pool) -> Dict[str, Any]:
+    """Live gauges and checkout statistics of an engine's pool"""
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update({
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_seconds": metrics.wait_seconds.snapshot(),
+        })
+    return status
@@ -0,0 +1,189 @@
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import TextClause, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+
+class RequestRouting:
+    """Routing state of one HTTP request, shared by every session it opens"""
+
+    def __init__(self, force_primary: bool = False):
+        self.force_primary = force_primary
+        self.wrote = False
+
+
+_request_routing: ContextVar[Optional[RequestRouting]] = ContextVar(
+    "request_routing", default=None
+)
+
+
+def begin_request_routing(force_primary: bool) -> Token:
+    return _request_routing.set(RequestRouting(force_primary=force_primary))
+
+
+def end_request_routing(token: Token) -> None:
+    _request_routing.reset(token)
+
+
+def current_request_routing() -> Optional[RequestRouting]:
+    return _request_routing.get()
+
+
+class ReplicaReads:
+    """Whether a replica served any statement inside `track_replica_reads`"""
+
+    def __init__(self) -> None:
+        self.used = False
+
+
+_replica_reads: ContextVar[Optional[ReplicaReads]] = ContextVar(
+    "replica_reads", default=None
+)
+
+
+@contextmanager
+def track_replica_reads() -> Iterator[ReplicaReads]:
+    reads = ReplicaReads()
+    token = _replica_reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaSet:
+    def __init__(self, engines: List[Engine], async_engines: List[AsyncEngine]):
+        """
+        Read replicas with health tracking and round-robin selection.
+
+        `engines[i]` and `async_engines[i]` point at the same replica. A
+        replica is taken out of rotation when a connection to it fails and
+        put back by the next successful health check.
+        """
+        self.engines = engines
+        self.async_engines = async_engines
+        self._healthy = set(range(len(engines)))
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        for index, replica in enumerate(engines):
+            self._watch(replica, index)
+        for index, replica in enumerate(async_engines):
+            self._watch(replica.sync_engine, index)
+
+    def choose(self, *, is_async: bool = False) -> Optional[Engine]:
+        """Next healthy replica, or None when all of them are down"""
+        with self._lock:
+            healthy = sorted(self._healthy)
+        if not healthy:
+            return None
+        index = healthy[next(self._counter) % len(healthy)]
+        if is_async:
+            return self.async_engines[index].sync_engine
+        return self.engines[index]
+
+    def mark_down(self, index: int) -> None:
+        with self._lock:
+            self._healthy.discard(index)
+
+    def check_health(self) -> None:
+        for index, replica in enumerate(self.engines):
+            try:
+                with replica.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+            except Exception:
+                self.mark_down(index)
+            else:
+                with self._lock:
+                    self._healthy.add(index)
+
+    def status(self) -> List[dict]:
+        with self._lock:
+            healthy = set(self._healthy)
+        return [
+            {"url": replica.url.render_as_string(hide_password=True), "healthy": index in healthy}
+            for index, replica in enumerate(self.engines)
+        ]
+
+    def _watch(self, replica: Engine, index: int) -> None:
+        @event.listens_for(replica, "handle_error")
+        def on_error(context: Any) -> None:
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index)
+
+
+# Text statements that read, and the locking clauses that keep them on the primary
+_TEXT_READ_PREFIXES = ("SELECT",)
+_TEXT_LOCKING_CLAUSES = ("FOR UPDATE", "FOR SHARE", "LOCK IN SHARE MODE")
+
+
+def _is_read(clause: Any) -> bool:
+    """Whether `clause` only reads: SELECT, UNION and friends, or SELECT text"""
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith(_TEXT_READ_PREFIXES)
+    return clause.is_select
+
+
+def _is_locking_read(clause: Any) -> bool:
+    if isinstance(clause, TextClause):
+        statement = " ".join(clause.text.upper().split())
+        return any(locking in statement for locking in _TEXT_LOCKING_CLAUSES)
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+    def __init__(
+        self,
+        *args: Any,
+        primary: Engine,
+        replicas: ReplicaSet,
+        is_async: bool = False,
+        **kwargs: Any
+    ):
+        """
+        Session that sends plain reads to a replica and everything else to the primary.
+
+        Once the session has written, or the current request is pinned to
+        the primary, every further statement goes to the primary so the
+        caller always reads its own writes.
+        """
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self.is_async = is_async
+        self.use_primary = False
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Engine:
+        routing = current_request_routing()
+        is_write = self._flushing or (clause is not None and not _is_read(clause))
+        if is_write:
+            self.use_primary = True
+            if routing is not None:
+                routing.wrote = True
+        if (
+            self.use_primary
+            or (routing is not None and routing.force_primary)
+            # Unknown statements and locking reads stay on the primary
+            or clause is None
+            or _is_locking_read(clause)
+        ):
+            return self.primary
+        replica = self.replicas.choose(is_async=self.is_async)
+        if replica is None:
+            return self.primary
+        reads = _replica_reads.get()
+        if reads is not None:
+            reads.used = True
+        return replica
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pass_statement_to_get_bind(orm_execute_state: Any) -> None:
+    # The ORM only hands get_bind statements with a mapped subject; UNIONs of
+    # ORM selects would otherwise arrive as clause=None and go to the primary
+    orm_execute_state.bind_arguments.setdefault("clause", orm_execute_state.statement)
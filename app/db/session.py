@@ -1,17 +1,104 @@
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from app.db.routing import ReplicaSet, RoutingSession
+from app.db.unit_of_work import register_request_session
+
+DATABASE_URL = settings.DATABASE_URL or f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_SERVER}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+
+# Async driver used for each backend by the async engine
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
 
-DATABASE_URL = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_SERVER}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+def engine_options(url: str, *, is_async: bool = False) -> Dict[str, Any]:
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # Sessions move between threadpool workers during a request
+        return {"connect_args": {"check_same_thread": False}}
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "mysql":
+        # DATETIME columns hold naive UTC: NOW() and the values read back
+        # must not depend on the server's time zone
+        options["connect_args"] = {"init_command": "SET time_zone = '+00:00'"}
+    return options
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
 
-def get_db():
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(DATABASE_URL, is_async=True)
+)
+
+replicas: Optional[ReplicaSet] = None
+if settings.DB_REPLICA_URLS:
+    replicas = ReplicaSet(
+        [create_engine(url, **engine_options(url)) for url in settings.DB_REPLICA_URLS],
+        [
+            create_async_engine(async_database_url(url), **engine_options(url, is_async=True))
+            for url in settings.DB_REPLICA_URLS
+        ],
+    )
+    SessionLocal = sessionmaker(
+        class_=RoutingSession,
+        autocommit=False,
+        autoflush=False,
+        primary=engine,
+        replicas=replicas,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        primary=async_engine.sync_engine,
+        replicas=replicas,
+        is_async=True,
+    )
+else:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+    )
+
+
+def get_db(request: Request):
+    """
+    Session for one request. CRUD calls only flush; the route commits once
+    after the endpoint returns, and closing the session rolls back otherwise.
+    """
     db = SessionLocal()
+    register_request_session(request, db)
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        register_request_session(request, db)
+        yield db
@@ -0,0 +1,91 @@
+import logging
+from typing import Any, Callable, Union
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Keys in `Session.info`
+AFTER_COMMIT = "after_commit"
+WROTE = "wrote"
+
+REQUEST_SESSIONS = "db_sessions"
+
+
+def _sync_session(db: Union[Session, AsyncSession]) -> Session:
+    return db.sync_session if isinstance(db, AsyncSession) else db
+
+
+def run_after_commit(
+    db: Union[Session, AsyncSession], func: Callable[..., Any], *args: Any
+) -> None:
+    """
+    Defer `func(*args)` until the session's transaction commits.
+
+    Used for side effects outside the database (cache invalidation, the
+    in-process search index), so they never reflect a write that is rolled
+    back. Callbacks of a rolled back transaction are dropped.
+    """
+    _sync_session(db).info.setdefault(AFTER_COMMIT, []).append((func, args))
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session: Session, flush_context: Any) -> None:
+    session.info[WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(orm_execute_state: Any) -> None:
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+    if getattr(orm_execute_state.statement, "is_dml", False):
+        orm_execute_state.session.info[WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    session.info.pop(WROTE, None)
+    for func, args in session.info.pop(AFTER_COMMIT, []):
+        try:
+            func(*args)
+        except Exception:
+            # The data is committed; a failed side effect must not turn the
+            # request into an error
+            logger.exception("After-commit callback %r failed", func)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_rollback(session: Session, transaction: Any) -> None:
+    if transaction.parent is None:
+        session.info.pop(WROTE, None)
+        session.info.pop(AFTER_COMMIT, None)
+
+
+def register_request_session(
+    request: Request, db: Union[Session, AsyncSession]
+) -> None:
+    """Enrol a session opened for `request` in its unit of work"""
+    sessions = getattr(request.state, REQUEST_SESSIONS, None)
+    if sessions is None:
+        sessions = []
+        setattr(request.state, REQUEST_SESSIONS, sessions)
+    sessions.append(db)
+
+
+async def commit_request_sessions(request: Request) -> None:
+    """
+    Commit, once, every session of `request` that has written.
+
+    Called after the endpoint returned successfully. Read-only sessions are
+    left alone and simply rolled back when they are closed.
+    """
+    for db in getattr(request.state, REQUEST_SESSIONS, ()):
+        if not _sync_session(db).info.get(WROTE):
+            continue
+        if isinstance(db, AsyncSession):
+            await db.commit()
+        else:
+            await run_in_threadpool(db.commit)
@@ -1,16 +1,56 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.api.compression import CompressionMiddleware
+from app.api.metrics import MetricsMiddleware, flush_metrics, multiprocess_store, router as metrics_router
+from app.api.negotiation import NegotiatedResponse
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.v1.router import api_router
 from app.core.config import settings
-from app.core.exceptions import BadRequestError, NotFoundError, UnauthorizedError, ForbiddenError, ConflictError
+from app.core.exceptions import BadRequestError, NotFoundError, UnauthorizedError, ForbiddenError, ConflictError, NotAcceptableError, NotModifiedError, ServiceUnavailableError
+from app.core.scheduler import scheduler
+from app.core.security import hashing_executor
+from app.db.routing import begin_request_routing, current_request_routing, end_request_routing
+from app.db.session import replicas
+from app.services.loan_service import archive_returned_loans, sweep_overdue_loans
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler.add(
+        "overdue-loan-sweep",
+        settings.OVERDUE_SWEEP_INTERVAL_SECONDS,
+        sweep_overdue_loans,
+    )
+    scheduler.add(
+        "loan-archive",
+        settings.LOAN_ARCHIVE_INTERVAL_SECONDS,
+        archive_returned_loans,
+    )
+    if settings.METRICS_ENABLED and multiprocess_store is not None:
+        scheduler.add("metrics-flush", settings.METRICS_FLUSH_SECONDS, flush_metrics)
+    if replicas is not None:
+        scheduler.add(
+            "replica-health-check",
+            settings.DB_REPLICA_HEALTH_CHECK_SECONDS,
+            replicas.check_health,
+        )
+    scheduler.start()
+    yield
+    await scheduler.stop()
+    hashing_executor.shutdown()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=NegotiatedResponse,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -21,11 +61,51 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
     )
 
+# Cookie pinning a client's reads to the primary right after it wrote
+PRIMARY_UNTIL_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+if replicas is not None:
+    @app.middleware("http")
+    async def route_database_reads(request: Request, call_next):
+        try:
+            primary_until = float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0))
+        except ValueError:
+            primary_until = 0
+        force_primary = (
+            request.method not in SAFE_METHODS or primary_until > time.time()
+        )
+        token = begin_request_routing(force_primary)
+        routing = current_request_routing()
+        try:
+            response = await call_next(request)
+        finally:
+            end_request_routing(token)
+        if routing.wrote:
+            window = settings.DB_READ_YOUR_WRITES_SECONDS
+            response.set_cookie(
+                PRIMARY_UNTIL_COOKIE,
+                str(int(time.time()) + window),
+                max_age=window,
+                httponly=True,
+                samesite="lax",
+            )
+        return response
+
+# Outermost, so every response (including errors) can be compressed
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Around everything else, so latency includes compression and error handling
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+
 
 # Exception handlers
 @app.exception_handler(BadRequestError)
@@ -69,6 +149,29 @@ async def conflict_exception_handler(request, exc):
     )
 
 
+@app.exception_handler(NotAcceptableError)
+async def not_acceptable_exception_handler(request, exc):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+    )
+
+
+@app.exception_handler(ServiceUnavailableError)
+async def service_unavailable_exception_handler(request, exc):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=exc.headers,
+    )
+
+
+@app.exception_handler(NotModifiedError)
+async def not_modified_exception_handler(request, exc):
+    # A 304 carries the validators but never a body
+    return Response(status_code=exc.status_code, headers=exc.headers)
+
+
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request, exc):
     return JSONResponse(
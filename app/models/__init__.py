@@ -1,5 +1,5 @@
 from app.db.base import Base
 from app.models.user import User
 from app.models.book import Book, BookStatus
-from app.models.loan import Loan, LoanStatus
+from app.models.loan import Loan, LoanArchive, LoanStatus
 from app.models.review import Review
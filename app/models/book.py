@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
 import enum
+from typing import List
 
 
 class BookStatus(enum.Enum):
@@ -13,8 +14,30 @@ class BookStatus(enum.Enum):
     LOST = "lost"
 
 
+# Reviews are bucketed into the 1-5 star histogram by rounding half up
+RATING_BUCKET_BOUNDS = (1.5, 2.5, 3.5, 4.5)
+
+
+def rating_bucket(rating: float) -> int:
+    return 1 + sum(1 for bound in RATING_BUCKET_BOUNDS if rating >= bound)
+
+
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Backs MATCH ... AGAINST catalog search; other dialects use the
+        # in-process index in app.services.search_service instead
+        Index(
+            "ix_books_fulltext",
+            "title",
+            "author",
+            "genre",
+            "description",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+        # Incremental exports select rows changed or created since a time
+        Index("ix_books_updated_at_created_at", "updated_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), index=True, nullable=False)
@@ -27,9 +50,27 @@ class Book(Base):
     cover_image_url = Column(String(255))
     status = Column(Enum(BookStatus), default=BookStatus.AVAILABLE)
     rating = Column(Float, default=0.0)
+    rating_sum = Column(Float, default=0.0, server_default="0", nullable=False)
+    rating_count = Column(Integer, default=0, server_default="0", nullable=False)
+    ratings_1 = Column(Integer, default=0, server_default="0", nullable=False)
+    ratings_2 = Column(Integer, default=0, server_default="0", nullable=False)
+    ratings_3 = Column(Integer, default=0, server_default="0", nullable=False)
+    ratings_4 = Column(Integer, default=0, server_default="0", nullable=False)
+    ratings_5 = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     loans = relationship("Loan", back_populates="book")
     reviews = relationship("Review", back_populates="book")
+
+    @property
+    def rating_histogram(self) -> List[int]:
+        """Number of reviews per star, from 1 to 5"""
+        return [
+            self.ratings_1 or 0,
+            self.ratings_2 or 0,
+            self.ratings_3 or 0,
+            self.ratings_4 or 0,
+            self.ratings_5 or 0,
+        ]
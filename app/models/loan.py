@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Index, String
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -16,6 +16,17 @@ class LoanStatus(enum.Enum):
 
 class Loan(Base):
     __tablename__ = "loans"
+    __table_args__ = (
+        # Loan lists filter a user's or a book's loans by status; the overdue
+        # sweep and status filter look up active loans by due date
+        Index("ix_loans_user_id_status", "user_id", "status"),
+        Index("ix_loans_book_id_status", "book_id", "status"),
+        Index("ix_loans_status_due_date", "status", "due_date"),
+        # The archive job takes the longest-returned loans first
+        Index("ix_loans_status_return_date", "status", "return_date"),
+        # Incremental exports select rows changed or created since a time
+        Index("ix_loans_updated_at_created_at", "updated_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -31,3 +42,33 @@ class Loan(Base):
     # Relationships
     user = relationship("User", back_populates="loans")
     book = relationship("Book", back_populates="loans")
+
+
+class LoanArchive(Base):
+    """
+    Cold storage for loans returned long ago, moved out of `loans` by the
+    archive job. Rows keep their original id, so hot and archived loans
+    merge into one id-ordered history.
+    """
+    __tablename__ = "loans_archive"
+    __table_args__ = (
+        # Loan history is read per user or per book, in id order
+        Index("ix_loans_archive_user_id_id", "user_id", "id"),
+        Index("ix_loans_archive_book_id_id", "book_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
+    loan_date = Column(DateTime(timezone=True))
+    due_date = Column(DateTime(timezone=True), nullable=False)
+    return_date = Column(DateTime(timezone=True), nullable=True)
+    status = Column(Enum(LoanStatus), default=LoanStatus.RETURNED)
+    notes = Column(String(255))
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    user = relationship("User")
+    book = relationship("Book")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, Float, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Text, Float, DateTime, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -7,6 +7,14 @@ from app.db.base import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # One review per user and book; also serves the per-user lookups
+        UniqueConstraint("user_id", "book_id", name="uq_reviews_user_id_book_id"),
+        # A book's reviews are paged in id order
+        Index("ix_reviews_book_id_id", "book_id", "id"),
+        # Incremental exports select rows changed or created since a time
+        Index("ix_reviews_updated_at_created_at", "updated_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,5 @@
-from app.schemas.user import User, UserCreate, UserUpdate, Token, TokenPayload
-from app.schemas.book import Book, BookCreate, BookUpdate
+from app.schemas.user import User, UserCreate, UserUpdate, UserBatchUpdate, Token, TokenPayload
+from app.schemas.book import Book, BookCreate, BookUpdate, BookBatchUpdate
 from app.schemas.loan import Loan, LoanCreate, LoanUpdate, LoanWithDetails
-from app.schemas.review import Review, ReviewCreate, ReviewUpdate, ReviewWithDetails
\ No newline at end of file
+from app.schemas.review import Review, ReviewCreate, ReviewUpdate, ReviewWithDetails
+from app.schemas.bulk import BatchDelete, BulkResult, ImportStatus
@@ -1,5 +1,5 @@
 from typing import Optional, List
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 from datetime import datetime
 from app.models.book import BookStatus
 
@@ -32,14 +32,20 @@ class BookUpdate(BaseModel):
     status: Optional[BookStatus] = None
 
 
+class BookBatchUpdate(BaseModel):
+    ids: List[int]
+    values: BookUpdate
+
+
 class BookInDBBase(BookBase):
     id: int
     rating: float
+    rating_count: int = 0
+    rating_histogram: List[int] = []
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Book(BookInDBBase):
@@ -0,0 +1,24 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class BatchDelete(BaseModel):
+    ids: List[int]
+
+
+class BulkResult(BaseModel):
+    count: int
+    ids: Optional[List[int]] = None
+
+
+class ImportStatus(BaseModel):
+    id: str
+    format: str
+    status: str
+    rows_read: int
+    rows_inserted: int
+    rows_rejected: int
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    has_errors: bool
@@ -1,7 +1,9 @@
 from typing import Optional
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, model_validator
+from datetime import datetime, timezone
 from app.models.loan import LoanStatus
+from app.schemas.book import Book
+from app.schemas.user import User
 
 
 class LoanBase(BaseModel):
@@ -30,8 +32,19 @@ class LoanInDBBase(LoanBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="after")
+    def report_overdue(self) -> "LoanInDBBase":
+        """Active loans past their due date read as overdue between sweeps"""
+        if self.status == LoanStatus.ACTIVE:
+            # Naive due dates are UTC, as the database's now() the sweep uses
+            due_date = self.due_date
+            if due_date.tzinfo is None:
+                due_date = due_date.replace(tzinfo=timezone.utc)
+            if due_date < datetime.now(timezone.utc):
+                self.status = LoanStatus.OVERDUE
+        return self
 
 
 class Loan(LoanInDBBase):
@@ -39,8 +52,5 @@ class Loan(LoanInDBBase):
 
 
 class LoanWithDetails(Loan):
-    from app.schemas.book import Book
-    from app.schemas.user import User
-    
     book: Book
     user: User
\ No newline at end of file
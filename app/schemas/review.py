@@ -1,6 +1,8 @@
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from app.schemas.book import Book
+from app.schemas.user import User
 
 
 class ReviewBase(BaseModel):
@@ -24,8 +26,7 @@ class ReviewInDBBase(ReviewBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Review(ReviewInDBBase):
@@ -33,8 +34,5 @@ class Review(ReviewInDBBase):
 
 
 class ReviewWithDetails(Review):
-    from app.schemas.book import Book
-    from app.schemas.user import User
-    
     book: Book
     user: User
\ No newline at end of file
@@ -0,0 +1,22 @@
+from functools import lru_cache
+from typing import Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+@lru_cache(maxsize=256)
+def sparse_model(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Subset of `schema` with only `fields`, keeping their types and defaults.
+
+    Models are cached per field list, so each combination is built once.
+    """
+    definitions = {
+        name: (schema.model_fields[name].annotation, schema.model_fields[name])
+        for name in fields
+    }
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
@@ -1,7 +1,12 @@
 from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, WithJsonSchema, validator
+from typing_extensions import Annotated
 from datetime import datetime
 
+# Emails are validated on the way in; reading stored ones back as plain
+# strings keeps email-validator off every serialized user (same schema)
+StoredEmail = Annotated[str, WithJsonSchema({"type": "string", "format": "email"})]
+
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -22,13 +27,18 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class UserBatchUpdate(BaseModel):
+    ids: List[int]
+    values: UserUpdate
+
+
 class UserInDBBase(UserBase):
     id: int
+    email: StoredEmail
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class User(UserInDBBase):
@@ -0,0 +1,90 @@
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from app.core.cache import (
+    LocalCacheBackend, LocalSharedStore, ReadThroughCache, SharedCacheBackend, Uncacheable
+)
+from app.core.config import settings
+from app.db.routing import track_replica_reads
+from app.db.session import AsyncSessionLocal
+
+# Generation scopes. Every catalog key includes CATALOG, which is bumped when
+# a bulk write touches rows we cannot name.
+CATALOG = "catalog"
+BOOK_LISTS = "books"
+USERS = "users"
+
+
+def book_scope(book_id: int) -> str:
+    return f"book:{book_id}"
+
+
+def book_reviews_scope(book_id: int) -> str:
+    return f"reviews:book:{book_id}"
+
+
+def _build_backend() -> Any:
+    if settings.CATALOG_CACHE_BACKEND == "off":
+        return None
+    if settings.CATALOG_CACHE_BACKEND != "shared":
+        return LocalCacheBackend(
+            maxsize=settings.CATALOG_CACHE_SIZE,
+            ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+        )
+    if not settings.CATALOG_CACHE_URL:
+        return SharedCacheBackend(LocalSharedStore())
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError("CATALOG_CACHE_URL requires the redis package")
+    return SharedCacheBackend(redis.Redis.from_url(settings.CATALOG_CACHE_URL))
+
+
+catalog_cache = ReadThroughCache(
+    _build_backend(),
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+    stale_ttl=settings.CATALOG_CACHE_STALE_SECONDS,
+    session_factory=AsyncSessionLocal,
+)
+
+
+def primary_fills(
+    loader: Callable[[Any], Awaitable[Any]]
+) -> Callable[[Any], Awaitable[Any]]:
+    """
+    Wrap a catalog cache loader so a result read from a replica is returned
+    but not stored.
+
+    A lagging replica can still miss a write whose generation bump already
+    happened; stored under the new generation, its answer would be served to
+    the writer once its reads are no longer pinned to the primary.
+    """
+    async def load(session: Any) -> Any:
+        with track_replica_reads() as reads:
+            value = await loader(session)
+        return Uncacheable(value) if reads.used else value
+    
+    return load
+
+
+def invalidate_books(ids: Optional[Sequence[Any]]) -> None:
+    """Forget cached books `ids` (all books when None) and the lists showing them"""
+    if ids is None:
+        catalog_cache.invalidate(CATALOG)
+        return
+    scopes = [BOOK_LISTS]
+    for book_id in ids:
+        # Review listings embed the reviewed book
+        scopes += [book_scope(book_id), book_reviews_scope(book_id)]
+    catalog_cache.invalidate(*scopes)
+
+
+def invalidate_book_reviews(book_id: int) -> None:
+    """A review of `book_id` changed, and with it the book's rating"""
+    catalog_cache.invalidate(
+        BOOK_LISTS, book_scope(book_id), book_reviews_scope(book_id)
+    )
+
+
+def invalidate_users() -> None:
+    """Review listings embed their authors"""
+    catalog_cache.invalidate(USERS)
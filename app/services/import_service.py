@@ -0,0 +1,271 @@
+import codecs
+import csv
+import json
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, IO, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud.book import book
+from app.db.instrumentation import expect_repeated_queries
+from app.schemas.book import BookCreate
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Finished jobs kept around for progress and error-file lookups
+MAX_TRACKED_JOBS = 100
+
+Record = Tuple[int, Dict[str, Any]]
+
+
+class ImportJob:
+    def __init__(self, import_id: str, fmt: str):
+        """
+        Progress of one catalog import.
+
+        Rejected rows are appended to an NDJSON error file, one object per
+        row with its line number, ISBN and the reasons it was rejected.
+        """
+        self.id = import_id
+        self.format = fmt
+        self.status = "running"
+        self.rows_read = 0
+        self.rows_inserted = 0
+        self.rows_rejected = 0
+        self.started_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.error_file = os.path.join(
+            settings.IMPORT_ERRORS_DIR or tempfile.gettempdir(),
+            f"book-import-{import_id}-errors.ndjson",
+        )
+        self._errors: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def reject(self, line: int, isbn: Optional[str], errors: Any) -> None:
+        with self._lock:
+            if self._errors is None:
+                self._errors = open(self.error_file, "w", encoding="utf-8")
+            self._errors.write(json.dumps(
+                {"line": line, "isbn": isbn, "errors": errors}, default=str
+            ) + "\n")
+            self.rows_rejected += 1
+
+    def finish(self, status: str) -> None:
+        with self._lock:
+            if self._errors is not None:
+                self._errors.close()
+                self._errors = None
+            self.status = status
+            self.finished_at = datetime.utcnow()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "format": self.format,
+            "status": self.status,
+            "rows_read": self.rows_read,
+            "rows_inserted": self.rows_inserted,
+            "rows_rejected": self.rows_rejected,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "has_errors": self.rows_rejected > 0,
+        }
+
+
+_jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def get_import_job(import_id: str) -> Optional[ImportJob]:
+    with _jobs_lock:
+        return _jobs.get(import_id)
+
+
+def start_import_job(fmt: str, import_id: Optional[str] = None) -> Optional[ImportJob]:
+    """Register a new job; returns None if `import_id` is already running"""
+    import_id = import_id or uuid.uuid4().hex
+    with _jobs_lock:
+        existing = _jobs.get(import_id)
+        if existing is not None and existing.status == "running":
+            return None
+        job = ImportJob(import_id, fmt)
+        _jobs[import_id] = job
+        _jobs.move_to_end(import_id)
+        while len(_jobs) > MAX_TRACKED_JOBS:
+            _jobs.popitem(last=False)
+        return job
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_length: int
+) -> AsyncIterator[Optional[str]]:
+    """
+    Decode a byte stream into lines, keeping only the unfinished line buffered.
+
+    The unfinished line is kept as a list of pieces, joined once complete. A
+    line longer than `max_length` characters is not buffered any further: the
+    rest of it is skipped up to the next newline and it is yielded as None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending: List[str] = []
+    pending_length = 0
+    overlong = False
+    async for chunk in chunks:
+        *complete, rest = decoder.decode(chunk).split("\n")
+        for piece in complete:
+            if overlong or pending_length + len(piece) > max_length:
+                yield None
+            else:
+                yield "".join(pending) + piece + "\n"
+            pending, pending_length, overlong = [], 0, False
+        if not overlong:
+            pending.append(rest)
+            pending_length += len(rest)
+            if pending_length > max_length:
+                pending, pending_length, overlong = [], 0, True
+    rest = decoder.decode(b"", final=True)
+    if overlong or pending_length + len(rest) > max_length:
+        yield None
+    elif pending_length or rest:
+        yield "".join(pending) + rest
+
+
+def _overlong(max_length: int) -> Dict[str, Any]:
+    return {"__error__": f"Line longer than {max_length} characters"}
+
+
+async def iter_ndjson_records(
+    lines: AsyncIterator[Optional[str]], max_length: int
+) -> AsyncIterator[Record]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line is None:
+            yield line_no, _overlong(max_length)
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {"__error__": f"Invalid JSON: {e}"}
+        if not isinstance(row, dict):
+            row = {"__error__": "Expected a JSON object"}
+        yield line_no, row
+
+
+async def iter_csv_records(
+    lines: AsyncIterator[Optional[str]], max_length: int
+) -> AsyncIterator[Record]:
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    record_length = 0
+    quotes = 0
+    line_no = 0
+    record_line = 1
+    async for line in lines:
+        line_no += 1
+        if line is not None:
+            record.append(line)
+            record_length += len(line)
+            quotes += line.count('"')
+        if line is None or record_length > max_length:
+            # The record is rejected; parsing restarts on the next line
+            yield record_line, _overlong(max_length)
+            record, record_length, quotes = [], 0, 0
+            record_line = line_no + 1
+            continue
+        # An odd number of quotes means a quoted field continues on the next line
+        if quotes % 2:
+            continue
+        fields = next(csv.reader(["".join(record)]), [])
+        record, record_length, quotes = [], 0, 0
+        if header is None:
+            header = [name.strip() for name in fields]
+        elif any(field.strip() for field in fields):
+            yield record_line, dict(zip(header, fields))
+        record_line = line_no + 1
+    if record:
+        yield record_line, {"__error__": "Unterminated quoted field"}
+
+
+def _insert_batch(db: Session, job: ImportJob, batch: List[Record]) -> None:
+    valid: Dict[str, Tuple[int, BookCreate]] = {}
+    for line, row in batch:
+        if "__error__" in row:
+            job.reject(line, None, [row["__error__"]])
+            continue
+        # Empty CSV cells and JSON nulls fall back to the schema defaults
+        row = {k: v for k, v in row.items() if v not in ("", None)}
+        try:
+            book_in = BookCreate(**row)
+        except ValidationError as e:
+            job.reject(line, row.get("isbn"), e.errors())
+            continue
+        if book_in.isbn in valid:
+            job.reject(line, book_in.isbn, ["Duplicate ISBN in import"])
+            continue
+        valid[book_in.isbn] = (line, book_in)
+
+    existing = book.get_existing_isbns(db, isbns=list(valid))
+    for isbn in existing:
+        line, _ = valid.pop(isbn)
+        job.reject(line, isbn, ["A book with this ISBN already exists in the system"])
+
+    if not valid:
+        return
+    try:
+        book.create_many(db, objs_in=[book_in for _, book_in in valid.values()])
+        # Each batch is its own transaction so progress survives a later failure
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent writer; report the whole batch
+        db.rollback()
+        for isbn, (line, _) in valid.items():
+            job.reject(line, isbn, ["Conflicting ISBN inserted concurrently"])
+        return
+    job.rows_inserted += len(valid)
+
+
+async def import_books(
+    db: Session, job: ImportJob, chunks: AsyncIterator[bytes]
+) -> ImportJob:
+    """
+    Stream a CSV or NDJSON catalog into the books table.
+
+    Rows are validated and deduplicated in batches of IMPORT_BATCH_SIZE;
+    each batch costs one ISBN lookup and one bulk INSERT, so memory use
+    does not grow with the size of the upload.
+    """
+    # One ISBN lookup per batch is intended, not an N+1
+    expect_repeated_queries()
+    max_length = settings.IMPORT_MAX_LINE_LENGTH
+    lines = iter_lines(chunks, max_length)
+    if job.format == "csv":
+        records = iter_csv_records(lines, max_length)
+    else:
+        records = iter_ndjson_records(lines, max_length)
+    batch: List[Record] = []
+    try:
+        async for record in records:
+            batch.append(record)
+            job.rows_read += 1
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await run_in_threadpool(_insert_batch, db, job, batch)
+                batch = []
+        if batch:
+            await run_in_threadpool(_insert_batch, db, job, batch)
+    except BaseException:
+        job.finish("failed")
+        raise
+    job.finish("completed")
+    return job
@@ -0,0 +1,162 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.crud.loan import loan
+from app.db.session import SessionLocal
+
+
+class SweepStats:
+    """Counters describing the overdue-loan sweeps run by this process"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.rows_changed_total = 0
+        self.last_rows_changed = 0
+        self.last_duration_seconds = 0.0
+        self.total_duration_seconds = 0.0
+        self.last_run_at: Optional[datetime] = None
+
+    def record(self, *, duration: float, rows_changed: int, failed: bool = False) -> None:
+        with self._lock:
+            self.runs += 1
+            self.failures += failed
+            self.rows_changed_total += rows_changed
+            self.last_rows_changed = rows_changed
+            self.last_duration_seconds = duration
+            self.total_duration_seconds += duration
+            self.last_run_at = datetime.utcnow()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "failures": self.failures,
+                "rows_changed_total": self.rows_changed_total,
+                "last_rows_changed": self.last_rows_changed,
+                "last_duration_seconds": self.last_duration_seconds,
+                "total_duration_seconds": self.total_duration_seconds,
+                "last_run_at": self.last_run_at,
+            }
+
+
+overdue_sweep_stats = SweepStats()
+
+
+class ArchiveStats:
+    """Progress of the loan archive job run by this process"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.batches_total = 0
+        self.rows_archived_total = 0
+        self.running = False
+        self.current_run_rows = 0
+        self.last_rows_archived = 0
+        self.last_duration_seconds = 0.0
+        self.last_run_at: Optional[datetime] = None
+        self.caught_up = False
+
+    def start(self) -> None:
+        with self._lock:
+            self.running = True
+            self.current_run_rows = 0
+
+    def record_batch(self, rows: int) -> None:
+        with self._lock:
+            self.batches_total += 1
+            self.rows_archived_total += rows
+            self.current_run_rows += rows
+
+    def finish(self, *, duration: float, caught_up: bool, failed: bool = False) -> None:
+        with self._lock:
+            self.runs += 1
+            self.failures += failed
+            self.running = False
+            self.last_rows_archived = self.current_run_rows
+            self.last_duration_seconds = duration
+            self.last_run_at = datetime.utcnow()
+            self.caught_up = caught_up
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "failures": self.failures,
+                "batches_total": self.batches_total,
+                "rows_archived_total": self.rows_archived_total,
+                "running": self.running,
+                "current_run_rows": self.current_run_rows,
+                "last_rows_archived": self.last_rows_archived,
+                "last_duration_seconds": self.last_duration_seconds,
+                "last_run_at": self.last_run_at,
+                "caught_up": self.caught_up,
+            }
+
+
+loan_archive_stats = ArchiveStats()
+
+
+def sweep_overdue_loans() -> int:
+    """Flag every active loan past its due date as overdue; returns rows changed"""
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        rows_changed = loan.update_loan_status(db)
+        db.commit()
+    except Exception:
+        overdue_sweep_stats.record(
+            duration=time.perf_counter() - start, rows_changed=0, failed=True
+        )
+        raise
+    finally:
+        db.close()
+    overdue_sweep_stats.record(
+        duration=time.perf_counter() - start, rows_changed=rows_changed
+    )
+    return rows_changed
+
+
+def archive_returned_loans() -> int:
+    """
+    Move loans returned more than LOAN_ARCHIVE_AFTER_DAYS ago to the archive table.
+
+    Works in committed batches of LOAN_ARCHIVE_BATCH_SIZE with a pause in
+    between, so locks stay short and replicas keep up. A run stops after
+    LOAN_ARCHIVE_MAX_BATCHES; the rest waits for the next run. Returns the
+    rows archived.
+    """
+    start = time.perf_counter()
+    # Same clock as `return_book`, which stamps `return_date`
+    before = datetime.now() - timedelta(days=settings.LOAN_ARCHIVE_AFTER_DAYS)
+    batch_size = settings.LOAN_ARCHIVE_BATCH_SIZE
+    archived = 0
+    caught_up = False
+    loan_archive_stats.start()
+    db = SessionLocal()
+    try:
+        for batch in range(settings.LOAN_ARCHIVE_MAX_BATCHES):
+            if batch:
+                time.sleep(settings.LOAN_ARCHIVE_BATCH_PAUSE_SECONDS)
+            rows = loan.archive_returned(db, before=before, limit=batch_size)
+            db.commit()
+            archived += rows
+            loan_archive_stats.record_batch(rows)
+            if rows < batch_size:
+                caught_up = True
+                break
+    except Exception:
+        loan_archive_stats.finish(
+            duration=time.perf_counter() - start, caught_up=False, failed=True
+        )
+        raise
+    finally:
+        db.close()
+    loan_archive_stats.finish(duration=time.perf_counter() - start, caught_up=caught_up)
+    return archived
@@ -0,0 +1,56 @@
+from sqlalchemy import bindparam, case, exists, func, update
+from sqlalchemy.orm import Session
+
+from app.models.book import Book, RATING_BUCKET_BOUNDS
+from app.models.review import Review
+
+RATING_COLUMNS = ("ratings_1", "ratings_2", "ratings_3", "ratings_4", "ratings_5")
+
+
+def recompute_book_ratings(db: Session) -> int:
+    """
+    Rebuild every book's rating aggregates from its reviews.
+
+    All reviews are aggregated in a single GROUP BY pass and written back
+    with one executemany UPDATE; books without reviews are reset to zero.
+    Returns the number of books that have reviews.
+    """
+    bucket = case(
+        *[(Review.rating < bound, star) for star, bound in enumerate(RATING_BUCKET_BOUNDS, 1)],
+        else_=len(RATING_BUCKET_BOUNDS) + 1,
+    )
+    rows = db.query(
+        Review.book_id,
+        func.sum(Review.rating),
+        func.count(Review.id),
+        *[func.sum(case((bucket == star, 1), else_=0)) for star in range(1, 6)],
+    ).group_by(Review.book_id).all()
+    
+    books = Book.__table__
+    reviews = Review.__table__
+    db.execute(
+        update(books)
+        .where(~exists().where(reviews.c.book_id == books.c.id))
+        .values(rating=0.0, rating_sum=0.0, rating_count=0, **{c: 0 for c in RATING_COLUMNS})
+    )
+    
+    params = []
+    for book_id, rating_sum, rating_count, *histogram in rows:
+        params.append({
+            "b_id": book_id,
+            "b_rating": rating_sum / rating_count,
+            "b_rating_sum": rating_sum,
+            "b_rating_count": rating_count,
+            **{f"b_{c}": int(n) for c, n in zip(RATING_COLUMNS, histogram)},
+        })
+    if params:
+        columns = ("rating", "rating_sum", "rating_count") + RATING_COLUMNS
+        db.execute(
+            update(books)
+            .where(books.c.id == bindparam("b_id"))
+            .values({c: bindparam(f"b_{c}") for c in columns}),
+            params,
+        )
+    
+    db.commit()
+    return len(params)
@@ -0,0 +1,147 @@
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Matches in the title outrank matches buried in the description
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "author": 2.0,
+    "genre": 1.5,
+    "description": 1.0,
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def _by_relevance(item: Tuple[int, float]) -> Tuple[float, int]:
+    # Best score first, ties by id so pages are stable
+    return -item[1], item[0]
+
+
+class BookSearchIndex:
+    """
+    In-process inverted index over the searchable book columns.
+
+    Used when the database has no FULLTEXT support (SQLite test runs). The
+    index is built from the database on first use and then kept current by
+    `CRUDBook` on every create, update and remove. Building scans the whole
+    catalog and ranking walks every posting of the query terms, so async
+    callers run both in a worker thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        # Concurrent first searches wait for one build instead of each running one
+        self._build_lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._documents: Dict[int, Dict[str, float]] = {}
+        self._built = False
+
+    def build(self, db: Session) -> None:
+        rows = db.query(
+            Book.id, Book.title, Book.author, Book.genre, Book.description
+        ).yield_per(1000)
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            for row in rows:
+                self._add(row.id, row._asdict())
+            self._built = True
+
+    def ensure_built(self, db: Session) -> None:
+        if self._built:
+            return
+        with self._build_lock:
+            if not self._built:
+                self.build(db)
+
+    def invalidate(self) -> None:
+        """Drop the index so the next search rebuilds it from the database"""
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._built = False
+
+    def add(self, book_id: int, fields: Mapping[str, Any]) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(book_id)
+            self._add(book_id, fields)
+
+    def add_book(self, book: Book) -> None:
+        self.add(book.id, {field: getattr(book, field) for field in FIELD_WEIGHTS})
+
+    def remove(self, book_id: int) -> None:
+        with self._lock:
+            if self._built:
+                self._remove(book_id)
+
+    def search(
+        self, db: Session, query: str, *, skip: int = 0, limit: int = 100
+    ) -> List[int]:
+        """Return book ids matching `query`, most relevant first"""
+        self.ensure_built(db)
+        return self.rank(query, top=skip + limit)[skip:]
+
+    def rank(self, query: str, *, top: Optional[int] = None) -> List[int]:
+        """
+        Ids of the books matching `query`, most relevant first; only the
+        `top` best when given. The index must be built.
+        """
+        terms = set(tokenize(query))
+        scores: Dict[int, float] = defaultdict(float)
+        with self._lock:
+            total = len(self._documents)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for book_id, weight in postings.items():
+                    scores[book_id] += idf * weight
+        if top is None:
+            ranked = sorted(scores.items(), key=_by_relevance)
+        else:
+            ranked = heapq.nsmallest(top, scores.items(), key=_by_relevance)
+        return [book_id for book_id, _ in ranked]
+
+    def _add(self, book_id: int, fields: Mapping[str, Any]) -> None:
+        weights: Dict[str, float] = defaultdict(float)
+        for field, field_weight in FIELD_WEIGHTS.items():
+            value = fields.get(field)
+            if value:
+                for token in tokenize(value):
+                    weights[token] += field_weight
+        # Dampen term frequency so long descriptions don't dominate
+        terms = {token: 1 + math.log(weight) if weight > 1 else weight
+                 for token, weight in weights.items()}
+        self._documents[book_id] = terms
+        for token, weight in terms.items():
+            self._postings[token][book_id] = weight
+
+    def _remove(self, book_id: int) -> None:
+        terms = self._documents.pop(book_id, None)
+        if not terms:
+            return
+        for token in terms:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(book_id, None)
+            if not postings:
+                del self._postings[token]
+
+
+book_search_index = BookSearchIndex()
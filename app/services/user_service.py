@@ -0,0 +1,101 @@
+from typing import Iterable, Optional, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+# Columns needed to authorize a request; the password hash is left out and
+# lazy-loads on the rare paths that need it
+PRINCIPAL_COLUMNS = tuple(
+    column.key for column in User.__table__.columns if column.key != "hashed_password"
+)
+
+# Keyed by (user_id, token) and grouped by user, so invalidating a user
+# drops only that user's tokens
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    group=lambda key: key[0],
+)
+
+
+def get_principal(db: Session, *, user_id: Optional[int], token: str) -> Optional[User]:
+    """
+    Load the user behind an access token, skipping the query on cache hits.
+
+    A hit builds a fresh `User` attached to `db` without touching the
+    database, so every request still owns its own instance.
+    """
+    if user_id is None:
+        return None
+    key = (user_id, token)
+    principal = _cached_principal(db, key)
+    if principal is not None:
+        return principal
+    
+    generation = principal_cache.generation(key)
+    principal = db.query(User).filter(User.id == user_id).first()
+    return _remember_principal(key, principal, generation)
+
+
+async def aget_principal(
+    db: AsyncSession, *, user_id: Optional[int], token: str
+) -> Optional[User]:
+    """
+    Like `get_principal`, for async endpoints: the query runs on `db` without
+    a threadpool hop.
+
+    A cached principal has no password hash, and an AsyncSession cannot
+    lazy-load it; async endpoints do not need it.
+    """
+    if user_id is None:
+        return None
+    key = (user_id, token)
+    principal = _cached_principal(db, key)
+    if principal is not None:
+        return principal
+    
+    generation = principal_cache.generation(key)
+    result = await db.execute(select(User).where(User.id == user_id))
+    return _remember_principal(key, result.scalars().first(), generation)
+
+
+def _cached_principal(db: Union[Session, AsyncSession], key: Tuple[int, str]) -> Optional[User]:
+    data = principal_cache.get(key)
+    if data is None:
+        return None
+    principal = User(**data)
+    make_transient_to_detached(principal)
+    db.add(principal)
+    return principal
+
+
+def _remember_principal(
+    key: Tuple[int, str], principal: Optional[User], generation: Tuple[int, int]
+) -> Optional[User]:
+    # A user invalidated while the query ran is not cached from its result
+    if principal:
+        principal_cache.set(
+            key,
+            {column: getattr(principal, column) for column in PRINCIPAL_COLUMNS},
+            generation=generation,
+        )
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Forget every cached token of a user after it was changed or removed"""
+    principal_cache.delete_group(user_id)
+
+
+def invalidate_principals(user_ids: Optional[Iterable[int]]) -> None:
+    """Forget the cached tokens of several users, or of everyone when None"""
+    if user_ids is None:
+        principal_cache.clear()
+        return
+    for user_id in set(user_ids):
+        principal_cache.delete_group(user_id)
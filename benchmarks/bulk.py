@@ -0,0 +1,130 @@
+"""
+Bulk writes against one ORM object per row: create_many, upsert_many and
+update_many on books.
+
+Runs against the configured database (DATABASE_URL; use a scratch one, the
+benchmark creates the tables if needed and leaves its rows behind). Each
+size is timed once per operation, inside one transaction committed at the
+end, on rows no earlier step has touched:
+
+* create: `Session.add_all` of new `Book`s against `create_many`
+* upsert: half existing, half new ISBNs; a lookup by ISBN per row, then
+  update or add, against `upsert_many`
+* update: loading the books and setting their status against `update_many`
+
+    python -m benchmarks.bulk [--rows 10000 100000]
+"""
+import argparse
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from app.crud.book import book
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.book import Book, BookStatus
+
+
+def rows(prefix: str, count: int, title: str = "Bench") -> List[Dict]:
+    return [
+        {
+            "title": f"{title} {n}",
+            "author": "Bench",
+            "genre": "Fiction",
+            "isbn": f"{prefix}{n:09d}",
+            "status": BookStatus.AVAILABLE,
+        }
+        for n in range(count)
+    ]
+
+
+def timed(write: Callable[..., object]) -> float:
+    """Seconds to run `write` on a fresh session and commit"""
+    db = SessionLocal()
+    try:
+        began = time.perf_counter()
+        write(db)
+        db.commit()
+        return time.perf_counter() - began
+    finally:
+        db.close()
+
+
+def orm_upsert(db, batch: List[Dict]) -> None:
+    for row in batch:
+        existing = db.query(Book).filter(Book.isbn == row["isbn"]).first()
+        if existing is None:
+            db.add(Book(**row))
+        else:
+            existing.title = row["title"]
+            existing.author = row["author"]
+            existing.genre = row["genre"]
+
+
+def orm_update(db, ids: List[int]) -> None:
+    for chunk in range(0, len(ids), 1000):
+        for loaded in db.query(Book).filter(Book.id.in_(ids[chunk:chunk + 1000])):
+            loaded.status = BookStatus.BORROWED
+
+
+def bench(count: int) -> Dict[str, List[float]]:
+    run = uuid.uuid4().hex[:6]
+    results: Dict[str, List[float]] = {}
+
+    results["create"] = [
+        timed(lambda db: db.add_all([Book(**row) for row in rows(f"a{run}", count)])),
+        timed(lambda db: book.create_many(db, objs_in=rows(f"b{run}", count))),
+    ]
+
+    # The first half of each batch updates the books created above
+    def batch(prefix: str) -> List[Dict]:
+        half = count // 2
+        existing = rows(prefix, half, title="Revised")
+        return existing + rows(f"n{prefix}", count - half)
+
+    results["upsert"] = [
+        timed(lambda db: orm_upsert(db, batch(f"a{run}"))),
+        timed(lambda db: book.upsert_many(
+            db,
+            objs_in=batch(f"b{run}"),
+            index_elements=["isbn"],
+            update_columns=["title", "author", "genre"],
+        )),
+    ]
+
+    db = SessionLocal()
+    try:
+        ids = {
+            prefix: [
+                id for id, in db.query(Book.id)
+                .filter(Book.isbn.like(f"{prefix}{run}%"))
+                .order_by(Book.id)
+            ]
+            for prefix in ("a", "b")
+        }
+    finally:
+        db.close()
+    results["update"] = [
+        timed(lambda db: orm_update(db, ids["a"][:count])),
+        timed(lambda db: book.update_many(
+            db, ids=ids["b"][:count], obj_in={"status": BookStatus.BORROWED}
+        )),
+    ]
+    return results
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    print(engine.dialect.name)
+    print(f"{'rows':>8} {'operation':>10} {'ORM s':>8} {'bulk s':>8} {'speedup':>8}")
+    for count in args.rows:
+        for operation, (orm, bulk) in bench(count).items():
+            print(f"{count:>8} {operation:>10} {orm:>8.2f} {bulk:>8.2f} {orm / bulk:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
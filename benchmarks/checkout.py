@@ -0,0 +1,112 @@
+"""
+Throughput of CRUDLoan.checkout under concurrent requests.
+
+Runs against the configured database (DATABASE_URL); use a scratch one,
+the benchmark creates the tables if needed and leaves its rows behind.
+Each round, `--threads` workers check out either the same book (contended:
+one wins, the rest back off) or a book each (uncontended).
+
+    python -m benchmarks.checkout [--threads 50] [--rounds 20]
+"""
+import argparse
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from app.crud.loan import loan
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.book import Book, BookStatus
+from app.models.user import User
+from app.schemas.loan import LoanCreate
+
+
+def seed(threads: int, books: int) -> Tuple[List[int], List[int]]:
+    run = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        users = [
+            User(
+                email=f"bench-{run}-{n}@example.com",
+                username=f"bench-{run}-{n}",
+                hashed_password="-",
+            )
+            for n in range(threads)
+        ]
+        catalog = [
+            Book(
+                title=f"Bench {n}",
+                author="Bench",
+                isbn=f"b{run}{n:08d}",
+                status=BookStatus.AVAILABLE,
+            )
+            for n in range(books)
+        ]
+        db.add_all(users + catalog)
+        db.commit()
+        return [u.id for u in users], [b.id for b in catalog]
+    finally:
+        db.close()
+
+
+def checkout(start: threading.Barrier, user_id: int, book_id: int) -> bool:
+    start.wait()
+    db = SessionLocal()
+    try:
+        obj_in = LoanCreate(
+            user_id=user_id, book_id=book_id, due_date=datetime.now() + timedelta(days=14)
+        )
+        if loan.checkout(db, obj_in=obj_in) is None:
+            db.rollback()
+            return False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def run(
+    pool: ThreadPoolExecutor, threads: int, pairs: List[Tuple[int, int]]
+) -> Tuple[int, float]:
+    start = threading.Barrier(threads)
+    began = time.perf_counter()
+    futures = [pool.submit(checkout, start, user_id, book_id) for user_id, book_id in pairs]
+    won = sum(future.result() for future in futures)
+    return won, time.perf_counter() - began
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    user_ids, book_ids = seed(args.threads, args.rounds * (args.threads + 1))
+    books = iter(book_ids)
+    print(f"{engine.dialect.name}, {args.threads} threads, {args.rounds} rounds")
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for mode in ("contended", "uncontended"):
+            attempts = wins = 0
+            seconds = 0.0
+            for _ in range(args.rounds):
+                if mode == "contended":
+                    book_id = next(books)
+                    pairs = [(user_id, book_id) for user_id in user_ids]
+                else:
+                    pairs = [(user_id, next(books)) for user_id in user_ids]
+                won, elapsed = run(pool, args.threads, pairs)
+                attempts += len(pairs)
+                wins += won
+                seconds += elapsed
+            print(
+                f"{mode:>12}: {attempts / seconds:8.0f} attempts/s, "
+                f"{wins / seconds:8.0f} loans/s, {wins} loans from {attempts} attempts"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+CPU cost against bytes saved for each response coding.
+
+Renders book list pages like GET /books/ does, then times every available
+compressor (brotli and zstd only when installed) and the compressed-body
+cache hit that replaces it for repeated ETagged bodies.
+
+    python -m benchmarks.compression [--rows 100 1000] [--repeat 50]
+"""
+import argparse
+import hashlib
+import time
+from typing import Callable, List
+
+import orjson
+
+from app.api.compression import COMPRESSORS
+
+
+def book_page(rows: int) -> bytes:
+    """A serialized page of books with the fields the API returns"""
+    return orjson.dumps([
+        {
+            "id": n,
+            "title": f"The Collected Works of Author {n % 97}, Volume {n % 13}",
+            "author": f"Author {n % 97}",
+            "isbn": f"978{n:010d}",
+            "publication_year": 1950 + n % 70,
+            "publisher": f"Publisher {n % 11}",
+            "genre": ("Fiction", "History", "Science", "Poetry")[n % 4],
+            "description": "A well-reviewed title from the catalog. " * (1 + n % 4),
+            "cover_image_url": f"https://covers.example.com/{n}.jpg",
+            "status": "available",
+            "rating": round(1 + (n * 7 % 40) / 10, 1),
+            "rating_histogram": [n % 3, n % 5, n % 7, n % 11, n % 13],
+            "created_at": "2026-01-01T00:00:00Z",
+            "updated_at": None,
+        }
+        for n in range(rows)
+    ])
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def compress_once(encoding: str, body: bytes) -> bytes:
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(body) + compressor.finish()
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>6} {'coding':>8} {'bytes':>10} {'ratio':>7} {'ms':>8} {'MB/s':>8} {'saved KB/ms':>12}")
+    for rows in args.rows:
+        body = book_page(rows)
+        print(f"{rows:>6} {'identity':>8} {len(body):>10} {1:>7.2f} {0:>8.3f} {'-':>8} {'-':>12}")
+        for encoding in COMPRESSORS:
+            compressed = compress_once(encoding, body)
+            seconds = best_of(args.repeat, lambda: compress_once(encoding, body))
+            saved_kb = (len(body) - len(compressed)) / 1024
+            print(
+                f"{rows:>6} {encoding:>8} {len(compressed):>10} "
+                f"{len(body) / len(compressed):>7.2f} {seconds * 1000:>8.3f} "
+                f"{len(body) / seconds / 1e6:>8.1f} {saved_kb / (seconds * 1000):>12.1f}"
+            )
+        # What a compressed_bodies hit costs instead: the digest of the body
+        seconds = best_of(args.repeat, lambda: hashlib.sha256(body).digest())
+        print(f"{rows:>6} {'cache hit':>8} {'':>10} {'':>7} {seconds * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Authenticated read throughput with many concurrent connections.
+
+Starts the app under uvicorn against the configured database (DATABASE_URL;
+use a scratch one, the benchmark creates the tables and seeds a reader with
+loans), then sends `--requests` GETs over `--connections` keep-alive
+connections opened at once, and reports requests per second and latency
+percentiles.
+
+    python -m benchmarks.concurrent_reads [--connections 1000] [--requests 10000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.book import Book, BookStatus
+from app.models.loan import Loan, LoanStatus
+from app.models.user import User
+
+
+def seed(loans: int) -> int:
+    run = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        reader = User(
+            email=f"bench-{run}@example.com",
+            username=f"bench-{run}",
+            hashed_password="-",
+            is_active=True,
+        )
+        books = [
+            Book(
+                title=f"Bench {n}",
+                author="Bench",
+                isbn=f"r{run}{n:06d}",
+                status=BookStatus.BORROWED,
+            )
+            for n in range(loans)
+        ]
+        db.add_all([reader, *books])
+        db.flush()
+        db.add_all([
+            Loan(
+                user_id=reader.id,
+                book_id=book.id,
+                status=LoanStatus.ACTIVE,
+                due_date=datetime.now() + timedelta(days=14),
+            )
+            for book in books
+        ])
+        db.commit()
+        return reader.id
+    finally:
+        db.close()
+
+
+async def load(url: str, token: str, connections: int, requests: int) -> List[float]:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: List[float] = []
+    errors = 0
+    queue: "asyncio.Queue[None]" = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def worker() -> None:
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(connections)))
+    if errors:
+        print(f"{errors} failed requests")
+    return latencies
+
+
+def wait_until_up(base: str) -> None:
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/docs", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("The server did not start")
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--path", default=f"{settings.API_V1_STR}/loans/?limit=20")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    token = create_access_token(seed(20))
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(args.port), "--log-level", "warning",
+            "--backlog", str(2 * args.connections),
+        ],
+        env=os.environ.copy(),
+    )
+    try:
+        wait_until_up(base)
+        # Warm up the pools and the principal cache
+        asyncio.run(load(base + args.path, token, 10, 50))
+        began = time.perf_counter()
+        latencies = asyncio.run(load(base + args.path, token, args.connections, args.requests))
+        seconds = time.perf_counter() - began
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    print(f"GET {args.path}, {args.connections} connections, {len(latencies)} requests")
+    print(f"{len(latencies) / seconds:8.0f} requests/s")
+    print(
+        f"latency ms: p50 {statistics.median(latencies) * 1000:.1f}, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}, "
+        f"max {latencies[-1] * 1000:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
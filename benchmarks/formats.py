@@ -0,0 +1,71 @@
+"""
+Payload size, encode and decode time of each response format for list pages.
+
+Loads a page of books, loans and reviews from the configured database
+(DATABASE_URL; use a scratch one, the benchmark creates the tables and seeds
+its rows), serializes it as the endpoints do, then encodes it as JSON
+(orjson, what NegotiatedResponse sends by default) and in every binary
+format the app negotiates (CBOR only when cbor2 is installed).
+
+    python -m benchmarks.formats [--rows 100 1000] [--repeat 200]
+"""
+import argparse
+from typing import Any, List
+
+import orjson
+
+from app import crud
+from app.api.negotiation import BINARY_FORMATS
+from app.api.responses import type_adapter
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.schemas.book import Book as BookSchema
+from app.schemas.loan import LoanWithDetails
+from app.schemas.review import ReviewWithDetails
+
+from benchmarks.serialization import best_of, seed
+
+# One entry per format, aliases of the same encoder left out
+FORMATS = {"application/json": (orjson.dumps, orjson.loads)}
+for media_type, binary in BINARY_FORMATS.items():
+    if binary.media_type == media_type:
+        FORMATS[media_type] = (binary.encode, binary.decode)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    seed(max(args.rows))
+    db = SessionLocal()
+    try:
+        print(f"{'endpoint':<14} {'rows':>5} {'format':<20} {'bytes':>9} {'encode ms':>10} {'decode ms':>10}")
+        for rows in args.rows:
+            pages = [
+                ("GET /books/", List[BookSchema], crud.book.get_multi(db, limit=rows)),
+                ("GET /loans/", List[LoanWithDetails], crud.loan.get_loans(db, limit=rows, load_for=LoanWithDetails)),
+                ("GET /reviews/", List[ReviewWithDetails], crud.review.get_multi(db, limit=rows, load_for=ReviewWithDetails)),
+            ]
+            for endpoint, response_type, objects in pages:
+                adapter = type_adapter(response_type)
+                content: Any = adapter.dump_python(
+                    adapter.validate_python(objects, from_attributes=True), mode="json"
+                )
+                for media_type, (encode, decode) in FORMATS.items():
+                    body = encode(content)
+                    assert decode(body) == content
+                    encode_ms = best_of(args.repeat, lambda: encode(content)) * 1000
+                    decode_ms = best_of(args.repeat, lambda: decode(body)) * 1000
+                    print(
+                        f"{endpoint:<14} {len(objects):>5} {media_type:<20} "
+                        f"{len(body):>9} {encode_ms:>10.3f} {decode_ms:>10.3f}"
+                    )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
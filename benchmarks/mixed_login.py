@@ -0,0 +1,153 @@
+"""
+Catalog read latency while a login burst runs bcrypt on the hashing pool.
+
+Starts the app under uvicorn against the configured database (DATABASE_URL;
+use a scratch one, the benchmark creates the tables and seeds books and a
+user with a real bcrypt hash). Catalog GETs run over `--readers`
+connections for `--seconds`, first alone and then next to `--logins`
+connections posting to /auth/login. Logins beyond HASHING_MAX_PENDING are
+answered with a fast 503 and counted separately.
+
+    python -m benchmarks.mixed_login [--readers 20] [--logins 20] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.book import Book, BookStatus
+from app.models.user import User
+
+from benchmarks.concurrent_reads import wait_until_up
+
+PASSWORD = "bench-password"
+
+
+def seed(books: int) -> str:
+    """Seed `books` books and a user; returns the user's email"""
+    run = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        email = f"login-{run}@example.com"
+        db.add(User(
+            email=email,
+            username=f"login-{run}",
+            hashed_password=get_password_hash(PASSWORD),
+            is_active=True,
+        ))
+        db.add_all([
+            Book(title=f"Bench {n}", author="Bench", isbn=f"m{run}{n:06d}", status=BookStatus.AVAILABLE)
+            for n in range(books)
+        ])
+        db.commit()
+        return email
+    finally:
+        db.close()
+
+
+async def traffic(
+    base: str, email: str, readers: int, logins: int, seconds: float
+) -> Tuple[List[float], List[float], Counter, float]:
+    """Catalog and login latencies, the login status codes and the seconds taken"""
+    began = time.perf_counter()
+    reads: List[float] = []
+    login_latencies: List[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=readers + logins)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as client:
+        async def request(method: str, path: str, **kwargs) -> Tuple[float, Optional[int]]:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status_code: Optional[int] = response.status_code
+            except httpx.HTTPError:
+                status_code = None
+            return time.perf_counter() - start, status_code
+
+        async def reader() -> None:
+            while time.perf_counter() < deadline:
+                latency, _ = await request("GET", f"{settings.API_V1_STR}/books/?limit=20")
+                reads.append(latency)
+
+        async def login() -> None:
+            form = {"username": email, "password": PASSWORD}
+            while time.perf_counter() < deadline:
+                latency, status_code = await request(
+                    "POST", f"{settings.API_V1_STR}/auth/login", data=form
+                )
+                statuses[status_code] += 1
+                if status_code == 200:
+                    login_latencies.append(latency)
+
+        await asyncio.gather(
+            *(reader() for _ in range(readers)), *(login() for _ in range(logins))
+        )
+    return reads, login_latencies, statuses, time.perf_counter() - began
+
+
+def summary(latencies: List[float], seconds: float) -> str:
+    if not latencies:
+        return "no requests"
+    latencies = sorted(latencies)
+    return (
+        f"{len(latencies) / seconds:7.0f} req/s, "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms"
+    )
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    email = seed(100)
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=os.environ.copy(),
+    )
+    try:
+        wait_until_up(base)
+        # Warm up the pools, including the hashing workers
+        asyncio.run(traffic(base, email, 2, 2, 1))
+        alone, _, _, alone_seconds = asyncio.run(
+            traffic(base, email, args.readers, 0, args.seconds)
+        )
+        mixed, logins, statuses, mixed_seconds = asyncio.run(
+            traffic(base, email, args.readers, args.logins, args.seconds)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"hashing workers: {settings.HASHING_WORKERS or os.cpu_count()}, max pending: {settings.HASHING_MAX_PENDING}")
+    print(f"catalog alone        {summary(alone, alone_seconds)}")
+    print(f"catalog with logins  {summary(mixed, mixed_seconds)}")
+    print(f"logins               {summary(logins, mixed_seconds)}")
+    print("login statuses: " + ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items(), key=str)))
+
+
+if __name__ == "__main__":
+    main()
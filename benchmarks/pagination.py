@@ -0,0 +1,97 @@
+"""
+Latency of one page of books at increasing depth, OFFSET against keyset.
+
+Runs CRUDBook.paginate against the configured database (DATABASE_URL; use a
+scratch one, the benchmark creates the tables if needed and leaves its rows
+behind). Page N is fetched with `skip=N*limit` and with `after=<last id of
+page N-1>`, the way `?after=<cursor>` fetches it.
+
+    python -m benchmarks.pagination [--rows 1000000] [--limit 100] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from typing import Callable, List
+
+from sqlalchemy import func, insert, select
+
+from app.crud.book import book
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.book import Book, BookStatus
+
+CHUNK = 10000
+
+
+def seed(rows: int) -> List[int]:
+    """Insert `rows` books and return their ids in order"""
+    run = uuid.uuid4().hex[:8]
+    with engine.begin() as connection:
+        for start in range(0, rows, CHUNK):
+            connection.execute(
+                insert(Book.__table__),
+                [
+                    {
+                        "title": f"Bench {n}",
+                        "author": "Bench",
+                        "isbn": f"p{run}{n:09d}",
+                        "status": BookStatus.AVAILABLE,
+                    }
+                    for n in range(start, min(start + CHUNK, rows))
+                ],
+            )
+        return list(connection.scalars(
+            select(Book.id).where(Book.isbn.like(f"p{run}%")).order_by(Book.id)
+        ))
+
+
+def timed(fetch: Callable[[], list], repeat: int) -> float:
+    """Median milliseconds of `fetch`"""
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fetch()
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples) * 1000
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    began = time.perf_counter()
+    ids = seed(args.rows)
+    print(f"{engine.dialect.name}, seeded {len(ids)} books in {time.perf_counter() - began:.1f}s")
+    pages = len(ids) // args.limit
+    depths = sorted({1, 10, 100, 1000, pages // 2, pages - 1} & set(range(1, pages)))
+
+    db = SessionLocal()
+    try:
+        # Pages are counted from the first seeded row; rows left by earlier
+        # runs are skipped by OFFSET too, as they would be in production
+        earlier = db.scalar(select(func.count()).where(Book.id < ids[0]))
+        query = db.query(Book)
+        print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+        for page in depths:
+            skip = earlier + page * args.limit
+            after = ids[page * args.limit - 1]
+            offset_page = book.paginate(query, skip=skip, limit=args.limit)
+            keyset_page = book.paginate(query, after=after, limit=args.limit)
+            assert [b.id for b in offset_page] == [b.id for b in keyset_page]
+            db.expunge_all()
+            offset_ms = timed(lambda: book.paginate(query, skip=skip, limit=args.limit), args.repeat)
+            db.expunge_all()
+            keyset_ms = timed(lambda: book.paginate(query, after=after, limit=args.limit), args.repeat)
+            db.expunge_all()
+            print(f"{page:>8} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Authenticated read throughput with and without the principal cache.
+
+Starts the app under uvicorn twice against the configured database
+(DATABASE_URL; use a scratch one, the benchmark creates the tables and seeds
+a reader with loans): once as configured and once with
+PRINCIPAL_CACHE_TTL_SECONDS=0, so every request loads its user. Each run
+sends `--requests` GETs of `/users/me` and of `/loans/` over
+`--connections` keep-alive connections.
+
+    python -m benchmarks.principal_cache [--connections 50] [--requests 2000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import engine
+
+from benchmarks.concurrent_reads import load, seed, wait_until_up
+
+PATHS = [f"{settings.API_V1_STR}/users/me", f"{settings.API_V1_STR}/loans/?limit=20"]
+
+
+def run(env: Dict[str, str], token: str, args: argparse.Namespace) -> None:
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    try:
+        wait_until_up(base)
+        for path in PATHS:
+            # Warm up the pools and, when enabled, the principal cache
+            asyncio.run(load(base + path, token, 10, 50))
+            began = time.perf_counter()
+            latencies = asyncio.run(load(base + path, token, args.connections, args.requests))
+            seconds = time.perf_counter() - began
+            latencies.sort()
+            print(
+                f"  GET {path:<24} {len(latencies) / seconds:8.0f} requests/s, "
+                f"p50 {statistics.median(latencies) * 1000:6.1f} ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.1f} ms"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    token = create_access_token(seed(20))
+    for label, ttl in (("cache on", None), ("cache off", "0")):
+        env = os.environ.copy()
+        if ttl is not None:
+            env["PRINCIPAL_CACHE_TTL_SECONDS"] = ttl
+        print(f"{label}, {args.connections} connections, {args.requests} requests per path")
+        run(env, token, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Catalog search latency: full-text search (`q=`) against the ILIKE filters.
+
+Runs against the configured database (DATABASE_URL; use a scratch one, the
+benchmark creates the tables if needed and leaves its rows behind). Books
+get titles, authors and descriptions drawn from a Zipf-like vocabulary, so
+there are rare, medium and common terms. On MySQL `q=` uses the FULLTEXT
+index; elsewhere it uses the in-process index, whose build is timed too.
+
+    python -m benchmarks.search [--rows 1000000] [--limit 20] [--repeat 5]
+"""
+import argparse
+import itertools
+import random
+import resource
+import statistics
+import time
+import uuid
+from typing import Callable, List
+
+from sqlalchemy import insert, or_
+
+from app.crud.book import book
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.book import Book, BookStatus
+from app.services.search_service import book_search_index
+
+CHUNK = 10000
+VOCABULARY = [f"w{n}" for n in range(20000)]
+# Zipf-like: the n-th word is drawn with weight 1/n
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(1 / (n + 1) for n in range(len(VOCABULARY))))
+GENRES = ["Fiction", "Fantasy", "Science Fiction", "History", "Poetry", "Mystery"]
+
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=count))
+
+
+def seed(rows: int) -> None:
+    run = uuid.uuid4().hex[:8]
+    rng = random.Random(rows)
+    with engine.begin() as connection:
+        for start in range(0, rows, CHUNK):
+            connection.execute(
+                insert(Book.__table__),
+                [
+                    {
+                        "title": words(rng, 3),
+                        "author": words(rng, 2),
+                        "genre": rng.choice(GENRES),
+                        "description": words(rng, 12),
+                        "isbn": f"s{run}{n:09d}",
+                        "status": BookStatus.AVAILABLE,
+                    }
+                    for n in range(start, min(start + CHUNK, rows))
+                ],
+            )
+
+
+def timed(fetch: Callable[[], list], repeat: int) -> float:
+    """Median milliseconds of `fetch`"""
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fetch()
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples) * 1000
+
+
+def ilike_any(db, term: str, limit: int) -> list:
+    """The ILIKE filters over the same four columns `q=` searches"""
+    pattern = f"%{term}%"
+    return db.query(Book).filter(or_(
+        Book.title.ilike(pattern),
+        Book.author.ilike(pattern),
+        Book.genre.ilike(pattern),
+        Book.description.ilike(pattern),
+    )).order_by(Book.id).limit(limit).all()
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    began = time.perf_counter()
+    seed(args.rows)
+    print(f"{engine.dialect.name}, seeded {args.rows} books in {time.perf_counter() - began:.1f}s")
+
+    db = SessionLocal()
+    try:
+        if engine.dialect.name != "mysql":
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            began = time.perf_counter()
+            book_search_index.build(db)
+            grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024
+            print(f"in-process index built in {time.perf_counter() - began:.1f}s, +{grown:.0f} MB")
+        # A common, a medium and a rare word; "w19999" barely occurs
+        terms = ["w0", "w50", "w5000", "w19999"]
+        print(f"{'term':>8} {'q= ms':>9} {'ILIKE title ms':>15} {'ILIKE 4 cols ms':>16}")
+        for term in terms:
+            search_ms = timed(lambda: book.search(db, q=term, limit=args.limit), args.repeat)
+            db.expunge_all()
+            title_ms = timed(
+                lambda: book.search_books(db, title=term, limit=args.limit), args.repeat
+            )
+            db.expunge_all()
+            any_ms = timed(lambda: ilike_any(db, term, args.limit), args.repeat)
+            db.expunge_all()
+            print(f"{term:>8} {search_ms:>9.1f} {title_ms:>15.1f} {any_ms:>16.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+A 100-row page of books with long descriptions, in full and with `fields=`.
+
+Calls GET /books/ in process against the configured database (DATABASE_URL;
+use a scratch one, the benchmark creates the tables and seeds its books)
+with the catalog cache off, so every request runs the query and the
+serialization. Reports the median latency and the payload size.
+
+    python -m benchmarks.sparse_fields [--description 4000] [--repeat 50]
+"""
+import os
+
+# Every request should reach the database; set before the app reads settings
+os.environ.setdefault("CATALOG_CACHE_BACKEND", "off")
+
+import argparse
+import statistics
+import time
+import uuid
+from typing import List, Optional
+
+from fastapi.testclient import TestClient
+
+from app.api.pagination import encode_cursor
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import engine
+from app.main import app
+from app.models.book import Book, BookStatus
+
+FIELDS = [None, "id,title,author,rating", "id,title"]
+
+
+def seed(rows: int, description: int) -> int:
+    """Insert `rows` books; returns the id just before them"""
+    run = uuid.uuid4().hex[:8]
+    with engine.begin() as connection:
+        first = connection.execute(
+            Book.__table__.insert().returning(Book.__table__.c.id),
+            [
+                {
+                    "title": f"The Collected Works of Author {n % 97}, Volume {n % 13}",
+                    "author": f"Author {n % 97}",
+                    "isbn": f"f{run}{n:06d}",
+                    "genre": "Fiction",
+                    "description": ("A well-reviewed title. " * description)[:description],
+                    "cover_image_url": f"https://covers.example.com/{n}.jpg",
+                    "status": BookStatus.AVAILABLE,
+                }
+                for n in range(rows)
+            ],
+        ).scalars().first()
+    return first - 1
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--description", type=int, default=4000, help="characters per description")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    after = seed(args.rows, args.description)
+    client = TestClient(app)
+    print(f"{engine.dialect.name}, {args.rows} rows, {args.description}-character descriptions")
+    print(f"{'fields':<24} {'median ms':>10} {'bytes':>10}")
+    for fields in FIELDS:
+        # The page starts at the seeded rows whatever earlier runs left behind
+        params = {"limit": args.rows, "after": encode_cursor(after)}
+        if fields:
+            params["fields"] = fields
+        samples = []
+        body: Optional[bytes] = None
+        for _ in range(args.repeat):
+            began = time.perf_counter()
+            response = client.get(
+                f"{settings.API_V1_STR}/books/",
+                params=params,
+                headers={"Accept-Encoding": "identity"},
+            )
+            samples.append(time.perf_counter() - began)
+            assert response.status_code == 200
+            body = response.content
+        print(f"{fields or '(all)':<24} {statistics.median(samples) * 1000:>10.2f} {len(body):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+from app.db.session import SessionLocal
+from app.services.review_service import recompute_book_ratings
+
+db = SessionLocal()
+try:
+    updated = recompute_book_ratings(db)
+finally:
+    db.close()
+print(f"Recomputed ratings for {updated} books")
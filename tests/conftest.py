@@ -0,0 +1,182 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+# Settings are read at import time; point the app at a throwaway SQLite file
+# (shared by the sync and async engines) before anything imports it
+_database = os.path.join(tempfile.mkdtemp(prefix="library-tests-"), "library.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_database}")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("MYSQL_USER", "test")
+os.environ.setdefault("MYSQL_PASSWORD", "test")
+os.environ.setdefault("MYSQL_SERVER", "localhost")
+os.environ.setdefault("MYSQL_DB", "library")
+os.environ.setdefault("FIRST_SUPERUSER", "admin@example.com")
+os.environ.setdefault("FIRST_SUPERUSER_PASSWORD", "admin")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api import routing
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.instrumentation import QueryStats
+from app.db.routing import ReplicaSet, RoutingSession
+from app.db.session import SessionLocal, async_database_url, engine, engine_options
+from app.main import app
+from app.models.book import Book, BookStatus
+from app.models.loan import Loan, LoanStatus
+from app.models.review import Review
+from app.models.user import User
+from app.services.book_service import catalog_cache, invalidate_books
+from app.services.user_service import principal_cache
+
+API = settings.API_V1_STR
+
+
+@pytest.fixture(autouse=True)
+def schema() -> Iterator[None]:
+    """A fresh schema and empty in-process caches for every test"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    invalidate_books(None)
+    yield
+    catalog_cache.invalidate()
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client() -> TestClient:
+    # Without the context manager the lifespan, and its background jobs, stay off
+    return TestClient(app)
+
+
+@pytest.fixture
+def request_queries(monkeypatch) -> List[QueryStats]:
+    """The SQL stats of every request the test makes, in order"""
+    recorded: List[QueryStats] = []
+    log_query_stats = routing.log_query_stats
+
+    def record(stats: QueryStats, **fields) -> None:
+        recorded.append(stats)
+        log_query_stats(stats, **fields)
+
+    monkeypatch.setattr(routing, "log_query_stats", record)
+    return recorded
+
+
+@pytest.fixture
+def replicated(tmp_path) -> Iterator[SimpleNamespace]:
+    """
+    A primary and one replica in two SQLite files, with routing sessions
+    built the way app.db.session builds them when DB_REPLICA_URLS is set.
+    Nothing is replicated: rows written to `primary` stay off the replica,
+    like a write the replica has not caught up with yet.
+    """
+    urls = [f"sqlite:///{tmp_path / name}.db" for name in ("primary", "replica")]
+    engines = [create_engine(url, **engine_options(url)) for url in urls]
+    async_engines = [
+        create_async_engine(async_database_url(url), **engine_options(url, is_async=True))
+        for url in urls
+    ]
+    for database in engines:
+        Base.metadata.create_all(bind=database)
+    replicas = ReplicaSet(engines[1:], async_engines[1:])
+    yield SimpleNamespace(
+        primary=engines[0],
+        replica=engines[1],
+        Session=sessionmaker(
+            class_=RoutingSession, autoflush=False, primary=engines[0], replicas=replicas
+        ),
+        AsyncSession=async_sessionmaker(
+            class_=AsyncSession,
+            sync_session_class=RoutingSession,
+            autoflush=False,
+            expire_on_commit=False,
+            primary=async_engines[0].sync_engine,
+            replicas=replicas,
+            is_async=True,
+        ),
+    )
+    for database in engines:
+        database.dispose()
+    for database in async_engines:
+        database.sync_engine.dispose()
+
+
+def make_user(db: Session, email: str, *, superuser: bool = False) -> User:
+    user = User(
+        email=email,
+        username=email.split("@")[0],
+        hashed_password="not-used",
+        is_active=True,
+        is_superuser=superuser,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def auth_headers(user: User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(user.id)}"}
+
+
+@pytest.fixture
+def admin(db: Session) -> User:
+    return make_user(db, "admin@example.com", superuser=True)
+
+
+@pytest.fixture
+def reader(db: Session) -> User:
+    return make_user(db, "reader@example.com")
+
+
+def seed_books(db: Session, count: int, **values) -> List[Book]:
+    values.setdefault("status", BookStatus.AVAILABLE)
+    books = [
+        Book(
+            title=f"Book {n}",
+            author=f"Author {n % 7}",
+            isbn=f"978{n:010d}",
+            genre="Fiction",
+            **values,
+        )
+        for n in range(count)
+    ]
+    db.add_all(books)
+    db.commit()
+    return books
+
+
+def seed_loans(db: Session, user: User, books: List[Book], **values) -> List[Loan]:
+    values.setdefault("status", LoanStatus.ACTIVE)
+    values.setdefault("due_date", datetime.utcnow() + timedelta(days=14))
+    loans = [Loan(user_id=user.id, book_id=b.id, **values) for b in books]
+    db.add_all(loans)
+    db.commit()
+    return loans
+
+
+def seed_reviews(db: Session, users: List[User], book: Book) -> List[Review]:
+    reviews = [
+        Review(user_id=u.id, book_id=book.id, rating=1 + n % 5, comment="ok")
+        for n, u in enumerate(users)
+    ]
+    db.add_all(reviews)
+    db.commit()
+    return reviews
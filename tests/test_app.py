@@ -0,0 +1,29 @@
+from tests.conftest import API, auth_headers, make_user, seed_books
+
+
+def test_read_books(client, db):
+    books = seed_books(db, 3)
+
+    response = client.get(f"{API}/books/{books[1].id}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Book 1"
+    assert len(client.get(f"{API}/books/").json()) == 3
+    filtered = client.get(f"{API}/books/", params={"title": "Book 1"}).json()
+    assert [b["title"] for b in filtered] == ["Book 1"]
+
+
+def test_writes_require_a_superuser(client, reader):
+    book = {"title": "Dune", "author": "Frank Herbert", "isbn": "9780441013593"}
+
+    assert client.post(f"{API}/books/", json=book).status_code == 401
+    assert client.post(f"{API}/books/", json=book, headers=auth_headers(reader)).status_code == 403
+
+
+def test_stored_emails_are_returned_without_revalidation(client, db):
+    # Accepted by an older validator; email-validator now rejects the domain
+    legacy = make_user(db, "librarian@library.local")
+
+    response = client.get(f"{API}/users/me", headers=auth_headers(legacy))
+
+    assert response.status_code == 200
+    assert response.json()["email"] == "librarian@library.local"
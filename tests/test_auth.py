@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import event
+
+from app.api import dependencies
+from app.core.security import create_access_token
+from app.services.user_service import get_principal, invalidate_principal, principal_cache
+
+from tests.conftest import API, auth_headers, seed_books, seed_loans
+
+
+@pytest.fixture
+def no_sync_principal(monkeypatch):
+    def get_principal(*args, **kwargs):
+        raise AssertionError("async endpoint loaded its principal through the sync session")
+
+    monkeypatch.setattr(dependencies, "get_principal", get_principal)
+
+
+def test_async_reads_load_the_principal_on_the_async_session(
+    client, db, reader, no_sync_principal
+):
+    loans = seed_loans(db, reader, seed_books(db, 2))
+    headers = auth_headers(reader)
+
+    # Cache miss, then hit
+    for _ in range(2):
+        assert client.get(f"{API}/loans/", headers=headers).status_code == 200
+    response = client.get(f"{API}/loans/{loans[0].id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["user_id"] == reader.id
+
+
+def test_async_principal_rejects_inactive_and_unknown_users(client, db, reader):
+    reader.is_active = False
+    db.commit()
+
+    inactive = client.get(f"{API}/loans/", headers=auth_headers(reader))
+    unknown = client.get(
+        f"{API}/loans/", headers={"Authorization": f"Bearer {create_access_token(9999)}"}
+    )
+    invalid = client.get(f"{API}/loans/", headers={"Authorization": "Bearer not-a-token"})
+
+    assert inactive.status_code == 400
+    assert unknown.status_code == 404
+    assert invalid.status_code == 401
+
+
+def test_invalidation_during_a_lookup_keeps_the_result_out_of_the_cache(db, reader):
+    token = create_access_token(reader.id)
+
+    # The user changes and is invalidated while the lookup's query runs
+    @event.listens_for(db, "do_orm_execute")
+    def invalidate_meanwhile(state):
+        invalidate_principal(reader.id)
+
+    assert get_principal(db, user_id=reader.id, token=token).id == reader.id
+    assert principal_cache.get((reader.id, token)) is None
+
+
+def test_invalidating_a_user_drops_only_its_tokens(db, reader, admin):
+    tokens = [create_access_token(reader.id), f"{create_access_token(reader.id)}.2"]
+    for token in tokens:
+        get_principal(db, user_id=reader.id, token=token)
+    admin_token = create_access_token(admin.id)
+    get_principal(db, user_id=admin.id, token=admin_token)
+
+    invalidate_principal(reader.id)
+
+    assert [principal_cache.get((reader.id, token)) for token in tokens] == [None, None]
+    assert principal_cache.get((admin.id, admin_token))["id"] == admin.id
+    assert principal_cache.stats()["size"] == 1
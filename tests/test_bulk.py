@@ -0,0 +1,53 @@
+from app.crud.book import book
+from app.models.book import Book, BookStatus
+
+from tests.conftest import API, auth_headers, seed_books
+
+
+def _catalog_row(existing: Book, **changes):
+    row = {
+        "title": existing.title,
+        "author": existing.author,
+        "isbn": existing.isbn,
+        "genre": existing.genre,
+    }
+    row.update(changes)
+    return row
+
+
+def test_upsert_keeps_borrowed_status_and_ratings(client, db, admin):
+    borrowed, = seed_books(db, 1, status=BookStatus.BORROWED, rating_count=3, rating_sum=12.0)
+    
+    # BookCreate defaults `status` to available; the upsert must not apply it
+    response = client.post(
+        f"{API}/books/batch?upsert=true",
+        json=[_catalog_row(borrowed, title="Revised title")],
+        headers=auth_headers(admin),
+    )
+    
+    assert response.status_code == 200
+    db.expire_all()
+    stored = db.get(Book, borrowed.id)
+    assert stored.title == "Revised title"
+    assert stored.status == BookStatus.BORROWED
+    assert stored.rating_count == 3
+    assert stored.rating_sum == 12.0
+
+
+def test_upsert_by_lookup_inserts_and_updates(db):
+    borrowed, = seed_books(db, 1, status=BookStatus.BORROWED)
+    rows = [
+        _catalog_row(borrowed, title="Revised title", status=BookStatus.AVAILABLE),
+        {"title": "New", "author": "Someone", "isbn": "9999999999", "status": BookStatus.AVAILABLE},
+    ]
+    
+    book._upsert_by_lookup(
+        db, objs_in=rows, index_elements=["isbn"], update_columns=book.catalog_columns
+    )
+    db.commit()
+    
+    db.expire_all()
+    stored = db.get(Book, borrowed.id)
+    assert stored.title == "Revised title"
+    assert stored.status == BookStatus.BORROWED
+    assert book.get_by_isbn(db, isbn="9999999999") is not None
@@ -0,0 +1,85 @@
+import asyncio
+
+from sqlalchemy import insert
+
+from app.core.cache import LocalCacheBackend, LocalSharedStore, ReadThroughCache, SharedCacheBackend
+from app.crud.book import book
+from app.db.routing import begin_request_routing, end_request_routing
+from app.models.book import Book, BookStatus
+
+
+def _list_books(replicated, *, pinned: bool) -> list:
+    async def read() -> list:
+        token = begin_request_routing(force_primary=pinned)
+        try:
+            async with replicated.AsyncSession() as db:
+                return await book.alist_cached(db)
+        finally:
+            end_request_routing(token)
+
+    return asyncio.run(read())
+
+
+def test_replica_reads_do_not_fill_the_cache(replicated):
+    # Written to the primary; the replica has not caught up
+    with replicated.primary.begin() as connection:
+        connection.execute(
+            insert(Book.__table__),
+            [{"title": "Dune", "author": "Herbert", "isbn": "9780441013593", "status": BookStatus.AVAILABLE}],
+        )
+
+    # Another client reads from the replica; the writer, pinned to the primary, sees its book
+    assert _list_books(replicated, pinned=False) == []
+    assert [b["title"] for b in _list_books(replicated, pinned=True)] == ["Dune"]
+    # The primary's answer is the one cached
+    assert [b["title"] for b in _list_books(replicated, pinned=False)] == ["Dune"]
+
+
+def _counting_loader(loads: list):
+    async def load(db) -> int:
+        loads.append(db)
+        return len(loads)
+
+    return load
+
+
+def test_bumping_a_scope_reloads_only_its_entries():
+    cache = ReadThroughCache(
+        LocalCacheBackend(maxsize=100, ttl=60), ttl=60, stale_ttl=60, session_factory=None
+    )
+    loads = []
+
+    async def read(key: str, scopes: list) -> int:
+        return await cache.get_or_load(None, key, scopes, _counting_loader(loads))
+
+    async def scenario() -> list:
+        values = [await read("book:1", ["catalog", "book:1"]), await read("book:2", ["catalog", "book:2"])]
+        cache.invalidate("book:1")
+        values += [await read("book:1", ["catalog", "book:1"]), await read("book:2", ["catalog", "book:2"])]
+        cache.invalidate("catalog")
+        values += [await read("book:1", ["catalog", "book:1"]), await read("book:2", ["catalog", "book:2"])]
+        return values
+
+    assert asyncio.run(scenario()) == [1, 2, 3, 2, 4, 5]
+    assert cache.hits == 1
+
+
+def test_shared_backend_invalidates_every_worker():
+    store = LocalSharedStore()
+    workers = [
+        ReadThroughCache(SharedCacheBackend(store), ttl=60, stale_ttl=60, session_factory=None)
+        for _ in range(2)
+    ]
+    loads = []
+
+    async def read(worker: ReadThroughCache) -> int:
+        return await worker.get_or_load(None, "books", ["catalog"], _counting_loader(loads))
+
+    async def scenario() -> list:
+        values = [await read(workers[0]), await read(workers[1])]
+        # The write lands on the first worker; the second sees it too
+        workers[0].invalidate("catalog")
+        values.append(await read(workers[1]))
+        return values
+
+    assert asyncio.run(scenario()) == [1, 1, 2]
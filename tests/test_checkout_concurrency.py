@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.crud.loan import loan
+from app.db.session import SessionLocal
+from app.models.book import Book, BookStatus
+from app.models.loan import Loan
+from app.schemas.loan import LoanCreate
+
+from tests.conftest import make_user, seed_books
+
+CHECKOUTS = 200
+
+
+def _checkout(start: threading.Event, user_id: int, book_id: int) -> bool:
+    start.wait()
+    db = SessionLocal()
+    try:
+        loan_obj = loan.checkout(
+            db,
+            obj_in=LoanCreate(
+                user_id=user_id, book_id=book_id, due_date=datetime.now() + timedelta(days=14)
+            ),
+        )
+        if loan_obj is None:
+            db.rollback()
+            return False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def test_parallel_checkouts_of_one_book_have_one_winner(db):
+    users = [make_user(db, f"reader{n}@example.com") for n in range(CHECKOUTS)]
+    book = seed_books(db, 1)[0]
+    start = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=CHECKOUTS) as pool:
+        results = [pool.submit(_checkout, start, user.id, book.id) for user in users]
+        start.set()
+        won = [result.result() for result in results]
+
+    assert won.count(True) == 1
+    db.expire_all()
+    assert db.query(Loan).count() == 1
+    assert db.get(Book, book.id).status == BookStatus.BORROWED
@@ -0,0 +1,50 @@
+import json
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.api.compression import CompressionMiddleware, compressed_bodies
+
+
+def _app(bodies):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=16)
+
+    @app.get("/items")
+    def items() -> Response:
+        # A validator that misses changes: the same ETag for every body
+        return Response(next(bodies), media_type="application/json", headers={"ETag": '"v1"'})
+
+    return app
+
+
+def _body(n: int) -> bytes:
+    return json.dumps([{"id": i, "title": f"Book {n}"} for i in range(50)]).encode()
+
+
+def test_cached_compression_follows_the_body_not_the_etag():
+    compressed_bodies.clear()
+    client = TestClient(_app(iter([_body(1), _body(2)])))
+    headers = {"Accept-Encoding": "gzip"}
+
+    first = client.get("/items", headers=headers)
+    second = client.get("/items", headers=headers)
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert second.headers["content-encoding"] == "gzip"
+    # httpx decodes the gzip body
+    assert first.content == _body(1)
+    assert second.content == _body(2)
+
+
+def test_identical_bodies_are_compressed_once():
+    compressed_bodies.clear()
+    client = TestClient(_app(iter([_body(1), _body(1)])))
+    headers = {"Accept-Encoding": "gzip"}
+
+    client.get("/items", headers=headers)
+    hits = compressed_bodies.hits
+    response = client.get("/items", headers=headers)
+
+    assert compressed_bodies.hits == hits + 1
+    assert response.content == _body(1)
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from app.api.conditional import row_modified
+
+from tests.conftest import API, auth_headers, seed_books
+
+
+def test_unchanged_book_is_not_modified(client, db):
+    book = seed_books(db, 1)[0]
+    first = client.get(f"{API}/books/{book.id}")
+    etag = first.headers["etag"]
+
+    again = client.get(f"{API}/books/{book.id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+
+def test_writes_within_one_second_change_the_etag(client, db, admin):
+    book = seed_books(db, 1)[0]
+    headers = auth_headers(admin)
+    client.put(f"{API}/books/{book.id}", json={"title": "First"}, headers=headers)
+    item = client.get(f"{API}/books/{book.id}")
+    page = client.get(f"{API}/books/")
+
+    # Same second, same row count and ids: only the content differs
+    client.put(f"{API}/books/{book.id}", json={"title": "Second"}, headers=headers)
+    item_again = client.get(
+        f"{API}/books/{book.id}", headers={"If-None-Match": item.headers["etag"]}
+    )
+    page_again = client.get(f"{API}/books/", headers={"If-None-Match": page.headers["etag"]})
+    assert item_again.status_code == 200
+    assert item_again.json()["title"] == "Second"
+    assert page_again.status_code == 200
+    assert page_again.json()[0]["title"] == "Second"
+
+
+def test_etag_differs_per_representation(client, db):
+    book = seed_books(db, 1)[0]
+    full = client.get(f"{API}/books/{book.id}")
+    sparse = client.get(f"{API}/books/{book.id}", params={"fields": "title"})
+
+    assert full.headers["etag"] != sparse.headers["etag"]
+    again = client.get(
+        f"{API}/books/{book.id}",
+        params={"fields": "title"},
+        headers={"If-None-Match": full.headers["etag"]},
+    )
+    assert again.status_code == 200
+
+
+def test_naive_timestamps_are_utc():
+    row = {"created_at": datetime(2026, 1, 2, 3, 4, 5)}
+    assert row_modified(row) == datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
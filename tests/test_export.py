@@ -0,0 +1,92 @@
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import engine
+from app.crud.loan import loan
+from app.models.book import Book, BookStatus
+from app.models.loan import LoanStatus
+from app.services.export_service import export_rows
+
+from tests.conftest import seed_books, seed_loans
+
+DESCRIPTION = "A long description that pads every exported row. " * 10
+
+
+def _seed_catalog(count: int, start: int = 0) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Book.__table__),
+            [
+                {
+                    "title": f"Book {n}",
+                    "author": f"Author {n % 97}",
+                    "isbn": f"978{n:010d}",
+                    "description": DESCRIPTION,
+                    "status": BookStatus.AVAILABLE,
+                }
+                for n in range(start, start + count)
+            ],
+        )
+
+
+def _peak_streaming(fmt: str) -> tuple:
+    """Bytes exported and the peak memory traced while streaming them"""
+    exported = 0
+    tracemalloc.start()
+    try:
+        for chunk in export_rows("books", fmt):
+            exported += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return exported, peak
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_export_memory_is_bounded_by_one_partition(monkeypatch, fmt):
+    monkeypatch.setattr(settings, "EXPORT_YIELD_PER", 500)
+    _seed_catalog(5000)
+    # Warm up statement caches, imports and the connection pool
+    list(export_rows("books", fmt))
+    small_export, small_peak = _peak_streaming(fmt)
+
+    _seed_catalog(15000, start=5000)
+    large_export, large_peak = _peak_streaming(fmt)
+
+    assert large_export > 3 * small_export
+    # Four times the rows, about the same peak: one partition at a time
+    assert large_peak < 1.5 * small_peak
+    assert large_peak < large_export / 5
+
+
+def test_since_includes_updated_and_new_rows_only(db):
+    old, updated, new = seed_books(db, 3)
+    since = datetime(2026, 6, 1)
+    before, after = since - timedelta(days=30), since + timedelta(days=1)
+    old.created_at, old.updated_at = before, None
+    updated.created_at, updated.updated_at = before, after
+    new.created_at, new.updated_at = after, None
+    db.commit()
+
+    lines = b"".join(export_rows("books", "ndjson", since=since)).decode().splitlines()
+
+    assert [json.loads(line)["id"] for line in lines] == [updated.id, new.id]
+
+
+def test_loan_export_includes_archived_loans(db, reader):
+    returned = datetime.now() - timedelta(days=400)
+    books = seed_books(db, 6)
+    loans = seed_loans(db, reader, books[:3], status=LoanStatus.RETURNED, return_date=returned)
+    loans += seed_loans(db, reader, books[3:])
+    ids = [l.id for l in loans]
+    assert loan.archive_returned(db, before=datetime.now(), limit=2) == 2
+    db.commit()
+
+    lines = b"".join(export_rows("loans", "ndjson")).decode().splitlines()
+
+    assert [json.loads(line)["id"] for line in lines] == ids
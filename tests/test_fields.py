@@ -0,0 +1,81 @@
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import async_engine, engine
+
+from tests.conftest import API, seed_books
+
+
+@pytest.fixture
+def book_selects() -> Iterator[List[str]]:
+    """Every SELECT from the books table either engine runs, until cleared"""
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM books" in statement:
+            statements.append(statement)
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", record)
+    yield statements
+    for target in (engine, async_engine.sync_engine):
+        event.remove(target, "before_cursor_execute", record)
+
+
+def _selected_columns(statement: str) -> List[str]:
+    columns = statement[statement.upper().index("SELECT") + 6:statement.index("FROM books")]
+    return [column.strip().split(" ")[0].split(".")[-1] for column in columns.split(",")]
+
+
+def test_fields_trim_the_list_query_and_payload(client, db, book_selects):
+    for book in seed_books(db, 3):
+        book.description = "x" * 1000
+    db.commit()
+    book_selects.clear()
+
+    response = client.get(f"{API}/books/", params={"fields": "title,author"})
+
+    assert response.status_code == 200
+    assert [set(item) for item in response.json()] == [{"id", "title", "author"}] * 3
+    (select,) = book_selects
+    assert set(_selected_columns(select)) == {"id", "title", "author", "created_at", "updated_at"}
+
+
+def test_fields_trim_the_detail_query_and_payload(client, db, book_selects):
+    (book,) = seed_books(db, 1, ratings_4=2)
+    book_id = book.id
+    book_selects.clear()
+
+    response = client.get(
+        f"{API}/books/{book_id}", params={"fields": "title,rating_histogram"}
+    )
+
+    assert response.json() == {
+        "id": book_id, "title": "Book 0", "rating_histogram": [0, 0, 0, 2, 0]
+    }
+    (select,) = book_selects
+    columns = set(_selected_columns(select))
+    assert {"title", "ratings_1", "ratings_5"} <= columns
+    assert not {"description", "cover_image_url", "isbn"} & columns
+
+
+def test_without_fields_every_column_is_loaded(client, db, book_selects):
+    seed_books(db, 1)
+    book_selects.clear()
+
+    response = client.get(f"{API}/books/")
+
+    assert "description" in response.json()[0]
+    assert "description" in _selected_columns(book_selects[0])
+
+
+@pytest.mark.parametrize("path", ["/books/", "/books/1"])
+def test_unknown_fields_are_rejected(client, db, path):
+    seed_books(db, 1)
+
+    response = client.get(f"{API}{path}", params={"fields": "title,shelf"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: shelf"
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import security
+from app.core.exceptions import ServiceUnavailableError
+from app.core.security import HashingExecutor
+
+from tests.conftest import API
+
+
+def test_full_queue_fails_fast_and_frees_its_slots():
+    executor = HashingExecutor(max_workers=1, max_pending=2)
+
+    async def saturate():
+        running = [asyncio.ensure_future(executor.run(time.sleep, 0.5)) for _ in range(2)]
+        await asyncio.sleep(0)
+        began = time.perf_counter()
+        with pytest.raises(ServiceUnavailableError) as rejected:
+            await executor.run(time.sleep, 0)
+        waited = time.perf_counter() - began
+        await asyncio.gather(*running)
+        # Finished calls give their slots back
+        await executor.run(time.sleep, 0)
+        return rejected.value, waited
+
+    try:
+        rejected, waited = asyncio.run(saturate())
+    finally:
+        executor.shutdown()
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert waited < 0.1
+
+
+def test_login_returns_503_when_the_hashing_queue_is_full(client, reader, monkeypatch):
+    monkeypatch.setattr(security.hashing_executor, "max_pending", 0)
+
+    response = client.post(
+        f"{API}/auth/login", data={"username": reader.email, "password": "secret"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
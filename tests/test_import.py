@@ -0,0 +1,50 @@
+import asyncio
+from typing import AsyncIterator, List
+
+from app.services.import_service import iter_csv_records, iter_lines, iter_ndjson_records
+
+
+async def _chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _collect(iterator) -> List:
+    async def collect():
+        return [item async for item in iterator]
+
+    return asyncio.run(collect())
+
+
+def test_iter_lines_joins_chunks_and_keeps_multibyte_characters():
+    data = "﻿é,1\nlong line\nlast".encode()
+
+    for size in (1, 2, 5, len(data)):
+        assert _collect(iter_lines(_chunks(data, size), 100)) == ["é,1\n", "long line\n", "last"]
+
+
+def test_overlong_line_is_rejected_and_parsing_resumes_at_the_next_line():
+    data = b'{"title": "a"}\n' + b"x" * 1000 + b'\n{"title": "b"}\n' + b"y" * 50
+
+    for size in (7, 64, len(data)):
+        lines = _collect(iter_lines(_chunks(data, size), 40))
+        assert lines == ['{"title": "a"}\n', None, '{"title": "b"}\n', None]
+
+    records = _collect(iter_ndjson_records(iter_lines(_chunks(data, 16), 40), 40))
+    assert records == [
+        (1, {"title": "a"}),
+        (2, {"__error__": "Line longer than 40 characters"}),
+        (3, {"title": "b"}),
+        (4, {"__error__": "Line longer than 40 characters"}),
+    ]
+
+
+def test_overlong_quoted_csv_record_is_rejected():
+    data = 'title,author\nA,B\n"' + "open\n" * 20 + 'C,D\n'
+
+    records = _collect(iter_csv_records(iter_lines(_chunks(data.encode(), 8), 40), 40))
+
+    assert records[0] == (2, {"title": "A", "author": "B"})
+    assert records[1] == (3, {"__error__": "Line longer than 40 characters"})
+    # Parsing restarts after the rejected record instead of buffering the rest
+    assert records[-1] == (23, {"title": "C", "author": "D"})
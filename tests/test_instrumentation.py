@@ -0,0 +1,68 @@
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import select
+
+from app.api import routing
+from app.core.config import settings
+from app.db.instrumentation import NPlusOneQueryError, begin_query_stats, end_query_stats
+from app.db.session import SessionLocal
+from app.models.loan import Loan
+
+from tests.conftest import API, auth_headers, seed_books, seed_loans
+
+
+@pytest.fixture
+def logged(monkeypatch) -> List[Dict[str, Any]]:
+    """The fields every request's SQL stats were logged with, in order"""
+    recorded: List[Dict[str, Any]] = []
+    monkeypatch.setattr(routing, "log_query_stats", lambda stats, **fields: recorded.append(fields))
+    return recorded
+
+
+def test_validation_errors_are_logged_with_their_status(client, admin, logged):
+    response = client.post(f"{API}/books/", json={"title": "No ISBN"}, headers=auth_headers(admin))
+
+    assert response.status_code == 422
+    assert "db;dur=" in response.headers["Server-Timing"]
+    assert logged[-1]["status"] == 422
+    assert logged[-1]["route"] == f"{API}/books/"
+
+
+def test_http_errors_are_logged_with_their_status(client, logged):
+    response = client.get(f"{API}/books/999999")
+
+    assert response.status_code == 404
+    assert "db;dur=" in response.headers["Server-Timing"]
+    assert logged[-1]["status"] == 404
+
+
+@pytest.fixture
+def raise_on_n_plus_one(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_MODE", "raise")
+
+
+def test_raise_mode_fails_on_a_lazy_load_per_loan(db, reader, raise_on_n_plus_one):
+    seed_loans(db, reader, seed_books(db, settings.SQL_N_PLUS_ONE_THRESHOLD + 1))
+    session = SessionLocal()
+    token = begin_query_stats()
+    try:
+        loans = session.scalars(select(Loan)).all()
+        with pytest.raises(NPlusOneQueryError, match="books"):
+            for loan in loans:
+                loan.book
+    finally:
+        end_query_stats(token)
+        session.close()
+
+
+def test_raise_mode_allows_a_lazy_load_below_the_threshold(db, reader, raise_on_n_plus_one):
+    seed_loans(db, reader, seed_books(db, settings.SQL_N_PLUS_ONE_THRESHOLD - 1))
+    session = SessionLocal()
+    token = begin_query_stats()
+    try:
+        loans = session.scalars(select(Loan)).all()
+        assert all(loan.book is not None for loan in loans)
+    finally:
+        end_query_stats(token)
+        session.close()
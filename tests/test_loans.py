@@ -0,0 +1,73 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.scheduler import Scheduler
+from app.models.loan import LoanStatus
+from app.schemas.loan import Loan as LoanSchema
+from app.services.loan_service import overdue_sweep_stats, sweep_overdue_loans
+
+from tests.conftest import seed_books, seed_loans
+
+
+@pytest.fixture
+def local_time_ahead_of_utc(monkeypatch):
+    """Run with the process clock in UTC+5"""
+    monkeypatch.setenv("TZ", "Etc/GMT-5")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_sweep_flags_active_loans_past_due(db, reader):
+    books = seed_books(db, 4)
+    past = datetime.utcnow() - timedelta(days=1)
+    overdue = seed_loans(db, reader, books[:2], due_date=past)
+    current = seed_loans(db, reader, books[2:3])
+    returned = seed_loans(db, reader, books[3:], due_date=past, status=LoanStatus.RETURNED)
+    runs = overdue_sweep_stats.snapshot()["runs"]
+
+    assert sweep_overdue_loans() == 2
+
+    db.expire_all()
+    assert [l.status for l in overdue] == [LoanStatus.OVERDUE] * 2
+    assert current[0].status == LoanStatus.ACTIVE
+    assert returned[0].status == LoanStatus.RETURNED
+    snapshot = overdue_sweep_stats.snapshot()
+    assert snapshot["runs"] == runs + 1
+    assert snapshot["last_rows_changed"] == 2
+    # A second sweep has nothing left to flag
+    assert sweep_overdue_loans() == 0
+
+
+def test_loans_read_as_overdue_in_utc(db, reader, local_time_ahead_of_utc):
+    soon, past = seed_books(db, 2)
+    # Due in an hour (UTC), which the local wall clock has already passed
+    (due_soon,) = seed_loans(db, reader, [soon], due_date=datetime.utcnow() + timedelta(hours=1))
+    (past_due,) = seed_loans(db, reader, [past], due_date=datetime.utcnow() - timedelta(hours=1))
+
+    assert LoanSchema.model_validate(due_soon).status == LoanStatus.ACTIVE
+    assert LoanSchema.model_validate(past_due).status == LoanStatus.OVERDUE
+
+
+def test_scheduler_restart_runs_each_job_once():
+    scheduler = Scheduler()
+    calls = []
+
+    async def lifespan():
+        scheduler.add("job", 60, lambda: calls.append(None))
+        scheduler.start()
+        expected = len(calls) + 1
+        while len(calls) < expected:
+            await asyncio.sleep(0.01)
+        # Give a duplicate registration the time to run as well
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+    asyncio.run(lifespan())
+    asyncio.run(lifespan())
+
+    assert len(calls) == 2
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import time
+
+from app.core.metrics import MultiprocessStore, add_sample, family
+
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _worker_families(checkouts: float, in_flight: float):
+    counter = family("library_loan_checkouts_total", "counter", "Books checked out")
+    add_sample(counter, checkouts)
+    gauge = family("library_http_requests_in_flight", "gauge", "Requests being served")
+    add_sample(gauge, in_flight)
+    return [counter, gauge]
+
+
+def _values(families):
+    return {
+        metric["name"]: sum(value for _, _, value in metric["samples"])
+        for metric in families
+    }
+
+
+def test_exited_worker_counters_are_kept(tmp_path):
+    store = MultiprocessStore(str(tmp_path), max_age=60)
+    dead = _exited_pid()
+    store._write(os.path.join(tmp_path, f"{dead}.json"), _worker_families(5, 2))
+    store.write(_worker_families(3, 1))
+
+    values = _values(store.read())
+
+    assert values["library_loan_checkouts_total"] == 8
+    # Only the live worker's gauge counts
+    assert values["library_http_requests_in_flight"] == 1
+    assert not (tmp_path / f"{dead}.json").exists()
+    assert (tmp_path / MultiprocessStore.ARCHIVE).exists()
+
+    # Folded once: reading again neither loses nor doubles the dead worker
+    assert _values(store.read())["library_loan_checkouts_total"] == 8
+
+
+def test_archive_accumulates_across_exited_workers(tmp_path):
+    store = MultiprocessStore(str(tmp_path), max_age=60)
+    for checkouts in (2, 7):
+        store._write(
+            os.path.join(tmp_path, f"{_exited_pid()}.json"), _worker_families(checkouts, 1)
+        )
+        store.read()
+
+    values = _values(store.read())
+    assert values["library_loan_checkouts_total"] == 9
+    assert "library_http_requests_in_flight" not in values
+
+
+def test_stale_file_of_live_worker_is_skipped_not_archived(tmp_path):
+    store = MultiprocessStore(str(tmp_path), max_age=60)
+    store.write(_worker_families(4, 1))
+    path = tmp_path / f"{os.getpid()}.json"
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    assert store.read() == []
+    assert path.exists()
+    assert not (tmp_path / MultiprocessStore.ARCHIVE).exists()
@@ -0,0 +1,76 @@
+import msgpack
+import pytest
+
+from app.api.negotiation import MSGPACK, negotiate
+from app.core.exceptions import NotAcceptableError
+
+from tests.conftest import API, auth_headers
+
+MSGPACK_HEADERS = {"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+
+
+def test_msgpack_round_trip_through_a_bulk_endpoint(client, admin):
+    books = [
+        {"title": "Dune", "author": "Frank Herbert", "isbn": "9780441013593"},
+        {"title": "Emma", "author": "Jane Austen", "isbn": "9780141439587"},
+    ]
+
+    created = client.post(
+        f"{API}/books/batch",
+        content=msgpack.packb(books),
+        headers={**MSGPACK_HEADERS, **auth_headers(admin)},
+    )
+    listed = client.get(f"{API}/books/", headers={"Accept": "application/msgpack"})
+
+    assert created.status_code == 200
+    assert created.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(created.content)["count"] == 2
+    assert listed.headers["content-type"] == "application/msgpack"
+    assert "Accept" in listed.headers["vary"]
+    assert [b["title"] for b in msgpack.unpackb(listed.content)] == ["Dune", "Emma"]
+    # The same document as the JSON response
+    assert msgpack.unpackb(listed.content) == client.get(f"{API}/books/").json()
+
+
+def test_malformed_msgpack_body_is_rejected(client, admin):
+    response = client.post(
+        f"{API}/books/batch",
+        content=b"\xc1",
+        headers={**MSGPACK_HEADERS, **auth_headers(admin)},
+    )
+
+    assert response.status_code == 400
+
+
+def test_unsupported_accept_returns_406(client):
+    rejected = client.get(f"{API}/books/", headers={"Accept": "text/html, application/xml"})
+    fallback = client.get(f"{API}/books/", headers={"Accept": "text/html, */*;q=0.1"})
+
+    assert rejected.status_code == 406
+    assert "application/msgpack" in rejected.json()["detail"]
+    assert fallback.status_code == 200
+    assert fallback.headers["content-type"] == "application/json"
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("application/json", None),
+    ("application/msgpack", MSGPACK),
+    ("application/json;q=0.5, application/msgpack", MSGPACK),
+    ("application/json, application/msgpack", None),
+    ("application/msgpack;q=0, */*", None),
+])
+def test_negotiate_prefers_the_highest_q_value(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_negotiate_rejects_only_unsupported_types():
+    with pytest.raises(NotAcceptableError):
+        negotiate("application/msgpack;q=0, text/plain")
+
+
+def test_openapi_schema_builds(client):
+    response = client.get(f"{API}/openapi.json")
+
+    assert response.status_code == 200
+    assert f"{API}/books/" in response.json()["paths"]
@@ -0,0 +1,90 @@
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.crud.book import book
+from app.models.book import Book
+
+from tests.conftest import API, auth_headers, seed_books, seed_loans
+
+
+def _walk(client, path, *, headers=None, **params):
+    """Follow X-Next-Cursor from the first page; returns the ids of every page"""
+    pages = []
+    response = client.get(path, params=params, headers=headers)
+    while True:
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+        response = client.get(path, params={**params, "after": cursor}, headers=headers)
+
+
+def test_cursor_walks_every_book_once(client, db):
+    books = seed_books(db, 20)
+
+    pages = _walk(client, f"{API}/books/", limit=7)
+
+    assert [len(page) for page in pages] == [7, 7, 6]
+    assert [book_id for page in pages for book_id in page] == [b.id for b in books]
+
+
+def test_cursor_continues_filtered_listings(client, db):
+    books = seed_books(db, 10)
+    books[3].genre = "Poetry"
+    db.commit()
+
+    pages = _walk(client, f"{API}/books/", genre="Fiction", limit=4)
+
+    assert [book_id for page in pages for book_id in page] == [
+        b.id for b in books if b.genre == "Fiction"
+    ]
+
+
+def test_full_last_page_ends_with_an_empty_page(client, db):
+    seed_books(db, 6)
+
+    pages = _walk(client, f"{API}/books/", limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 0]
+
+
+def test_cursor_is_not_shifted_by_deleted_rows(client, db):
+    books = seed_books(db, 6)
+    first = client.get(f"{API}/books/", params={"limit": 3})
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+
+    # With skip=3 the deletion would hide books[3]
+    db.delete(books[0])
+    db.commit()
+    second = client.get(f"{API}/books/", params={"limit": 3, "after": cursor})
+
+    assert [b["id"] for b in second.json()] == [b.id for b in books[3:]]
+
+
+def test_skip_still_pages(client, db):
+    books = seed_books(db, 5)
+
+    response = client.get(f"{API}/books/", params={"skip": 2, "limit": 2})
+
+    assert [b["id"] for b in response.json()] == [b.id for b in books[2:4]]
+
+
+def test_sync_paginate_orders_before_offset(db):
+    books = seed_books(db, 5)
+    query = db.query(Book)
+
+    assert book.paginate(query, skip=2, limit=2) == books[2:4]
+    assert book.paginate(query, after=books[1].id, limit=2) == books[2:4]
+
+
+def test_cursor_walks_loans(client, db, reader):
+    loans = seed_loans(db, reader, seed_books(db, 5))
+
+    pages = _walk(client, f"{API}/loans/", headers=auth_headers(reader), limit=2)
+
+    assert [loan_id for page in pages for loan_id in page] == [l.id for l in loans]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get(f"{API}/books/", params={"after": "not-a-cursor"})
+
+    assert response.status_code == 400
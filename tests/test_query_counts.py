@@ -0,0 +1,41 @@
+import pytest
+
+from app.models.review import Review
+
+from tests.conftest import API, auth_headers, make_user, seed_books, seed_loans, seed_reviews
+
+ROWS = 100
+
+
+def _queries(client, request_queries, url, user) -> int:
+    response = client.get(f"{API}{url}", headers=auth_headers(user))
+    assert response.status_code == 200
+    return request_queries[-1].count
+
+
+@pytest.mark.parametrize("rows", [10, ROWS])
+def test_loan_list_query_count(client, db, admin, reader, request_queries, rows):
+    seed_loans(db, reader, seed_books(db, rows))
+
+    # The principal, then the loans with their book and user joined in
+    assert _queries(client, request_queries, "/loans/", admin) == 2
+    # The principal is cached now
+    assert _queries(client, request_queries, "/loans/", admin) == 1
+    assert _queries(client, request_queries, "/loans/", reader) == 2
+
+
+@pytest.mark.parametrize("rows", [10, ROWS])
+def test_review_list_query_count(client, db, admin, reader, request_queries, rows):
+    books = seed_books(db, rows)
+    db.add_all([Review(user_id=reader.id, book_id=b.id, rating=4) for b in books])
+    db.commit()
+    users = [make_user(db, f"critic{n}@example.com") for n in range(rows - 1)]
+    seed_reviews(db, users, books[0])
+
+    # Public: just the reviews with their book and user joined in
+    assert _queries(client, request_queries, "/reviews/", admin) == 1
+    assert _queries(client, request_queries, f"/reviews/?user_id={reader.id}", admin) == 1
+    # A catalog cache miss, then a hit
+    book_reviews = f"/reviews/?book_id={books[0].id}"
+    assert _queries(client, request_queries, book_reviews, admin) == 1
+    assert _queries(client, request_queries, book_reviews, admin) == 0
@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.db.session import engine
+from app.models.loan import LoanStatus
+from tests.conftest import make_user, seed_books, seed_loans, seed_reviews
+
+USERS = 40
+BOOKS = 400
+
+
+@contextmanager
+def captured_statements() -> Iterator[List[Tuple[str, Any]]]:
+    """The SQL (and its parameters) sent to the database inside the block"""
+    statements: List[Tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def full_scans(db: Session, statement: str, parameters: Any) -> List[str]:
+    """The tables `statement` reads start to end, according to the planner"""
+    connection = db.connection()
+    if engine.dialect.name == "mysql":
+        rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).mappings()
+        return [row["table"] for row in rows if row["type"] == "ALL"]
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    # "SCAN t" reads the whole table, "SCAN t USING INDEX i" the whole index
+    return [row.detail for row in rows if row.detail.startswith("SCAN ")]
+
+
+@pytest.fixture
+def library(db: Session) -> Session:
+    users = [make_user(db, f"reader{n}@example.com") for n in range(USERS)]
+    books = seed_books(db, BOOKS)
+    for n, user in enumerate(users):
+        shelf = books[n::USERS]
+        seed_loans(db, user, shelf[:1])
+        seed_loans(
+            db,
+            user,
+            shelf[1:],
+            status=LoanStatus.RETURNED,
+            return_date=datetime.now() - timedelta(days=400),
+        )
+    for book in books[:20]:
+        seed_reviews(db, users, book)
+    # No ANALYZE: with this little data the planner would rightly prefer
+    # scans, while the point is that a usable index exists for every query
+    return db
+
+
+QUERIES: List[Tuple[str, Callable[[Session], Any]]] = [
+    ("loans by user", lambda db: crud.loan.get_loans(db, user_id=7)),
+    (
+        "loans by user and status",
+        lambda db: crud.loan.get_loans(db, user_id=7, status=LoanStatus.RETURNED),
+    ),
+    ("active loans", lambda db: crud.loan.get_loans(db, status=LoanStatus.ACTIVE)),
+    ("overdue loans", lambda db: crud.loan.get_loans(db, status=LoanStatus.OVERDUE)),
+    ("active loans of a user", lambda db: crud.loan.get_active_loans_by_user(db, user_id=7)),
+    ("active loans of a book", lambda db: crud.loan.get_active_loans_by_book(db, book_id=7)),
+    ("overdue sweep", lambda db: crud.loan.get_overdue_loans(db)),
+    (
+        "archive batch",
+        lambda db: crud.loan.archive_returned(
+            db, before=datetime.now() - timedelta(days=365), limit=10
+        ),
+    ),
+    ("reviews of a book", lambda db: crud.review.get_reviews_by_book(db, book_id=3)),
+    ("reviews by a user", lambda db: crud.review.get_reviews_by_user(db, user_id=7)),
+    (
+        "review of a book by a user",
+        lambda db: crud.review.get_user_review_for_book(db, user_id=7, book_id=3),
+    ),
+    ("book by isbn", lambda db: crud.book.get_by_isbn(db, isbn="9780000000007")),
+    ("user by email", lambda db: crud.user.get_by_email(db, email="reader7@example.com")),
+]
+
+
+@pytest.mark.parametrize("name, run", QUERIES, ids=[name for name, _ in QUERIES])
+def test_crud_query_uses_an_index(library: Session, name: str, run: Callable) -> None:
+    with captured_statements() as statements:
+        run(library)
+    library.rollback()
+
+    assert statements
+    for statement, parameters in statements:
+        scans = full_scans(library, statement, parameters)
+        assert not scans, f"{name}: full scan {scans} in {statement}"
@@ -0,0 +1,91 @@
+import pytest
+
+from app.core.exceptions import NotFoundError
+from app.crud.review import review
+from app.models.book import Book, rating_bucket
+from app.services.review_service import recompute_book_ratings
+
+from tests.conftest import API, auth_headers, make_user, seed_books
+
+AGGREGATES = ("rating", "rating_sum", "rating_count", "rating_histogram")
+
+
+def _aggregates(db, book_id):
+    db.expire_all()
+    stored = db.get(Book, book_id)
+    return {name: getattr(stored, name) for name in AGGREGATES}
+
+
+def _assert_matches_recount(db, book_id):
+    """The incrementally maintained aggregates equal a full rebuild from the reviews"""
+    maintained = _aggregates(db, book_id)
+    recompute_book_ratings(db)
+    assert _aggregates(db, book_id) == {
+        **maintained,
+        "rating": pytest.approx(maintained["rating"]),
+        "rating_sum": pytest.approx(maintained["rating_sum"]),
+    }
+    return maintained
+
+
+def _histogram(*ratings):
+    histogram = [0] * 5
+    for rating in ratings:
+        histogram[rating_bucket(rating) - 1] += 1
+    return histogram
+
+
+def test_rating_deltas_follow_review_changes(client, db):
+    (book,) = seed_books(db, 1)
+    book_id = book.id
+    users = [make_user(db, f"critic{n}@example.com") for n in range(3)]
+
+    created = [
+        client.post(
+            f"{API}/reviews/",
+            json={"book_id": book_id, "rating": rating},
+            headers=auth_headers(user),
+        ).json()
+        for user, rating in zip(users, (4.0, 2.5, 5.0))
+    ]
+    assert _assert_matches_recount(db, book_id) == {
+        "rating": pytest.approx(11.5 / 3),
+        "rating_sum": 11.5,
+        "rating_count": 3,
+        "rating_histogram": _histogram(4.0, 2.5, 5.0),
+    }
+
+    client.put(
+        f"{API}/reviews/{created[1]['id']}", json={"rating": 1.0}, headers=auth_headers(users[1])
+    )
+    assert _assert_matches_recount(db, book_id)["rating_histogram"] == _histogram(4.0, 1.0, 5.0)
+
+    # Reviewing the same book again edits the review instead of adding one
+    client.post(
+        f"{API}/reviews/", json={"book_id": book_id, "rating": 3.0}, headers=auth_headers(users[2])
+    )
+    assert _assert_matches_recount(db, book_id) == {
+        "rating": pytest.approx(8.0 / 3),
+        "rating_sum": 8.0,
+        "rating_count": 3,
+        "rating_histogram": _histogram(4.0, 1.0, 3.0),
+    }
+
+    client.delete(f"{API}/reviews/{created[0]['id']}", headers=auth_headers(users[0]))
+    assert _assert_matches_recount(db, book_id) == {
+        "rating": pytest.approx(2.0),
+        "rating_sum": 4.0,
+        "rating_count": 2,
+        "rating_histogram": _histogram(1.0, 3.0),
+    }
+
+    for user, created_review in zip(users[1:], created[1:]):
+        client.delete(f"{API}/reviews/{created_review['id']}", headers=auth_headers(user))
+    assert _assert_matches_recount(db, book_id) == {
+        "rating": 0.0, "rating_sum": 0.0, "rating_count": 0, "rating_histogram": [0] * 5
+    }
+
+
+def test_removing_a_missing_review_raises_not_found(db):
+    with pytest.raises(NotFoundError):
+        review.remove(db, id=12345)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select, text, union_all
+
+from app.db.routing import begin_request_routing, current_request_routing, end_request_routing
+from app.models.book import Book, BookStatus
+
+
+@pytest.fixture
+def copies(replicated):
+    """Book 1 under a different title on each database, showing which one answered"""
+    for database, title in ((replicated.primary, "primary"), (replicated.replica, "replica")):
+        with database.begin() as connection:
+            connection.execute(
+                insert(Book.__table__),
+                [{"id": 1, "title": title, "author": "A", "isbn": "1", "status": BookStatus.AVAILABLE}],
+            )
+    return replicated
+
+
+@pytest.fixture
+def request_routing():
+    token = begin_request_routing(force_primary=False)
+    yield current_request_routing()
+    end_request_routing(token)
+
+
+TITLE = select(Book.title).where(Book.id == 1)
+
+READS = {
+    "select": TITLE,
+    "union": union_all(TITLE, TITLE.where(Book.id == 0)),
+    "text": text("SELECT title FROM books WHERE id = 1"),
+}
+
+
+@pytest.mark.parametrize("statement", READS.values(), ids=READS.keys())
+def test_reads_go_to_the_replica_without_pinning(copies, request_routing, statement):
+    with copies.Session() as db:
+        assert db.scalar(statement) == "replica"
+        assert db.scalar(statement) == "replica"
+        assert not db.use_primary
+    assert not request_routing.wrote
+
+
+def test_locking_reads_go_to_the_primary(copies, request_routing):
+    with copies.Session() as db:
+        assert db.scalar(TITLE.with_for_update()) == "primary"
+        # SQLite has no FOR UPDATE; check where the statement would go
+        locking = text("SELECT title FROM books WHERE id = 1\nFOR  UPDATE")
+        assert db.get_bind(clause=locking) is copies.primary
+        assert db.scalar(TITLE) == "replica"
+    assert not request_routing.wrote
+
+
+@pytest.mark.parametrize("write", ["orm", "text"])
+def test_a_write_pins_the_session_and_the_request(copies, request_routing, write):
+    with copies.Session() as db:
+        if write == "orm":
+            db.add(Book(title="New", author="A", isbn="2", status=BookStatus.AVAILABLE))
+            db.flush()
+        else:
+            db.execute(text("UPDATE books SET author = 'B' WHERE id = 1"))
+        # Reads its own write
+        assert db.scalar(TITLE) == "primary"
+        db.rollback()
+    assert request_routing.wrote
+    with copies.Session() as db:
+        assert db.scalar(TITLE) == "replica"
+
+
+def test_a_pinned_request_reads_from_the_primary(copies):
+    token = begin_request_routing(force_primary=True)
+    try:
+        with copies.Session() as db:
+            assert db.scalar(TITLE) == "primary"
+    finally:
+        end_request_routing(token)
+
+
+def test_async_sessions_route_the_same_way(copies, request_routing):
+    async def read():
+        async with copies.AsyncSession() as db:
+            replica = await db.scalar(TITLE)
+            await db.execute(text("UPDATE books SET author = 'B' WHERE id = 1"))
+            return replica, await db.scalar(TITLE)
+
+    assert asyncio.run(read()) == ("replica", "primary")
+    assert request_routing.wrote
+
+
+def test_reads_fall_back_to_the_primary_when_replicas_are_down(copies, request_routing):
+    with copies.Session() as db:
+        db.replicas.mark_down(0)
+        assert db.scalar(TITLE) == "primary"
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.services.search_service import book_search_index
+
+from tests.conftest import API, auth_headers, seed_books
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    book_search_index.invalidate()
+    yield
+    book_search_index.invalidate()
+
+
+def _search(client, q, **params):
+    response = client.get(f"{API}/books/", params={"q": q, **params})
+    assert response.status_code == 200
+    return [b["title"] for b in response.json()]
+
+
+def test_title_matches_outrank_description_matches(client, db):
+    mention, title = seed_books(db, 2)
+    mention.title, mention.description = "Arrakis", "A novel in the spirit of Dune"
+    title.title = "Dune"
+    db.commit()
+
+    assert _search(client, "dune") == ["Dune", "Arrakis"]
+
+
+def test_index_follows_creates_updates_and_deletes(client, db, admin):
+    seed_books(db, 3)
+    assert _search(client, "foundation") == []
+
+    created = client.post(
+        f"{API}/books/",
+        json={"title": "Foundation", "author": "Isaac Asimov", "isbn": "9780553293357"},
+        headers=auth_headers(admin),
+    ).json()
+    assert _search(client, "foundation") == ["Foundation"]
+
+    client.put(
+        f"{API}/books/{created['id']}",
+        json={"title": "Second Foundation"},
+        headers=auth_headers(admin),
+    )
+    assert _search(client, "second") == ["Second Foundation"]
+
+    client.delete(f"{API}/books/{created['id']}", headers=auth_headers(admin))
+    assert _search(client, "foundation") == []
+
+
+def test_filters_narrow_the_matches(client, db):
+    books = seed_books(db, 6)
+    for n, book in enumerate(books):
+        book.description = "A space opera"
+        book.genre = "Science Fiction" if n % 2 else "Fantasy"
+    db.commit()
+
+    assert _search(client, "space", genre="fantasy") == ["Book 0", "Book 2", "Book 4"]
+    assert _search(client, "space", genre="fantasy", skip=1, limit=1) == ["Book 2"]
+    assert _search(client, "space", title="Book 3") == ["Book 3"]
+
+
+def test_search_rejects_a_cursor(client):
+    response = client.get(f"{API}/books/", params={"q": "dune", "after": "eyJpZCI6MX0"})
+
+    assert response.status_code == 400
+
+
+def test_index_is_built_off_the_event_loop(client, db, monkeypatch):
+    seed_books(db, 2)
+    loops = []
+    build = book_search_index.build
+
+    def record(session):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        build(session)
+
+    monkeypatch.setattr(book_search_index, "build", record)
+
+    assert _search(client, "book") == ["Book 0", "Book 1"]
+    assert loops == [None]
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.routing import LibraryRoute
+from app.core.exceptions import ConflictError
+from app.db.session import get_async_db, get_db
+from app.db.unit_of_work import run_after_commit
+from app.models.book import Book, BookStatus
+
+from tests.conftest import API, auth_headers, seed_books, seed_loans
+
+
+def _commits(request_queries, response) -> int:
+    assert response.status_code < 400, response.text
+    return request_queries[-1].commits
+
+
+def test_writes_commit_once_per_request(client, db, admin, reader, request_queries):
+    books = seed_books(db, 3)
+    loan_id = seed_loans(db, reader, books[2:])[0].id
+    book_ids = [b.id for b in books]
+    admin_headers = auth_headers(admin)
+
+    review = client.post(
+        f"{API}/reviews/",
+        json={"book_id": book_ids[0], "rating": 4, "comment": "Good"},
+        headers=auth_headers(reader),
+    )
+    assert _commits(request_queries, review) == 1
+    edited = client.put(
+        f"{API}/reviews/{review.json()['id']}", json={"rating": 5}, headers=auth_headers(reader)
+    )
+    assert _commits(request_queries, edited) == 1
+    book_edit = client.put(
+        f"{API}/books/{book_ids[1]}", json={"title": "Retitled"}, headers=admin_headers
+    )
+    assert _commits(request_queries, book_edit) == 1
+    due_date = (datetime.utcnow() + timedelta(days=7)).isoformat()
+    checkout = client.post(
+        f"{API}/loans/",
+        json={"book_id": book_ids[1], "due_date": due_date},
+        headers=auth_headers(reader),
+    )
+    assert _commits(request_queries, checkout) == 1
+    deleted = client.delete(f"{API}/loans/{loan_id}", headers=admin_headers)
+    assert _commits(request_queries, deleted) == 1
+    rows = [{"title": f"Batch {n}", "author": "A", "isbn": f"97900000000{n:02d}"} for n in range(20)]
+    batch = client.post(f"{API}/books/batch", json=rows, headers=admin_headers)
+    assert _commits(request_queries, batch) == 1
+
+
+def test_reads_do_not_commit(client, db, reader, request_queries):
+    seed_loans(db, reader, seed_books(db, 2))
+
+    for url in ("/books/", "/loans/", "/users/me", "/reviews/"):
+        response = client.get(f"{API}{url}", headers=auth_headers(reader))
+        assert _commits(request_queries, response) == 0
+
+
+@pytest.fixture(params=["sync", "async"])
+def failing_app(request):
+    """
+    An app whose only endpoint inserts, updates and deletes books, then
+    fails; once on a sync and once on an async session.
+    """
+    callbacks = []
+    router = APIRouter(route_class=LibraryRoute)
+
+    def write(db: Session) -> None:
+        db.add(Book(title="New", author="A", isbn="9790000000001", status=BookStatus.AVAILABLE))
+        kept, gone = db.query(Book).order_by(Book.id).all()
+        kept.title = "Retitled"
+        db.delete(gone)
+        db.flush()
+        run_after_commit(db, callbacks.append, "written")
+
+    if request.param == "sync":
+        @router.post("/fail")
+        def write_then_fail(db: Session = Depends(get_db)):
+            write(db)
+            raise ConflictError(detail="Failed after writing")
+    else:
+        @router.post("/fail")
+        async def write_then_fail(db: AsyncSession = Depends(get_async_db)):
+            await db.run_sync(write)
+            raise ConflictError(detail="Failed after writing")
+
+    failing = FastAPI()
+    failing.include_router(router)
+    return TestClient(failing), callbacks
+
+
+def test_failed_handler_rolls_back_every_pending_write(db, failing_app, request_queries):
+    client, callbacks = failing_app
+    seed_books(db, 2)
+
+    response = client.post("/fail")
+
+    assert response.status_code == 409
+    assert request_queries[-1].commits == 0
+    db.expire_all()
+    assert [b.title for b in db.query(Book).order_by(Book.id)] == ["Book 0", "Book 1"]
+    # Side effects of the rolled back writes never ran
+    assert callbacks == []